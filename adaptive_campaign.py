@@ -0,0 +1,313 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import math
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from campaign import (DEFAULT_CORES_PER_RUN, DEFAULT_MEMORY_PER_RUN_MB, OUTPUT_DIR, SCENARIOS, TOPOLOGIES,
+                      SubprocessBackend, default_concurrency, prepare_keys)
+from iteration_stats import DEFAULT_CONFIDENCE, DEFAULT_OUTLIER_THRESHOLD, summarize_runs
+from keystore import ENC_MODES
+from rpl_metrics import extract_metrics, find_pcaps
+from utils import topology_id_arg
+
+METRIC = "key_exchange_time"
+REPORT_FILE = "output/adaptive_campaign.json"
+
+DEFAULT_TARGET = 0.05
+DEFAULT_MIN_ITERATIONS = 3
+DEFAULT_MAX_ITERATIONS = 30
+
+
+class CaptureMeasurement:
+    """
+    Runs one iteration with a campaign backend and reads the key exchange time
+    from the capture it wrote.
+    """
+
+    def __init__(self, backend, output_dir=OUTPUT_DIR):
+        self.backend = backend
+        self.output_dir = output_dir
+
+    def measure(self, scenario, topology, iteration, slot):
+        """
+        Returns (metrics, None) for a completed run, or (None, reason) for a failed one.
+        """
+        run = {"scenario": scenario, "topology": topology, "iteration": iteration, "iterations": 1}
+        returncode = self.backend.run(run, slot)
+        if returncode != 0:
+            return None, f"exit code {returncode}"
+        pcaps = find_pcaps(self.output_dir, [scenario], [iteration], [topology])
+        if not pcaps:
+            return None, "no capture"
+        return extract_metrics(next(iter(pcaps.values()))), None
+
+
+class SimulatedMeasurement:
+    """
+    Stands in for Containernet with the discrete-event simulator of rpl_sim, one
+    seed per iteration, to check the iteration policy without containers.
+    """
+
+    def __init__(self, loss=0.0):
+        self.loss = loss
+
+    def measure(self, scenario, topology, iteration, slot):
+        from rpl_sim import simulate
+        return simulate(topology, scenario, loss=self.loss, seed=iteration)["metrics"], None
+
+
+class Cell:
+    """
+    Iterations of one scenario and topology: the key exchange time of each
+    completed run, the failed runs with their reason and the runs in flight.
+    Scenarios without a key exchange only need a capture with RPL traffic, and
+    run min_iterations times.
+    """
+
+    def __init__(self, scenario, topology, first_iteration=1):
+        self.scenario = scenario
+        self.topology = topology
+        self.key_exchange = scenario in ENC_MODES
+        self.next_iteration = first_iteration
+        self.values = {}
+        self.failed = {}
+        self.in_flight = 0
+
+    @property
+    def name(self):
+        return f"{self.scenario}_{self.topology}"
+
+    @property
+    def attempts(self):
+        return len(self.values) + len(self.failed) + self.in_flight
+
+    def record(self, iteration, metrics, reason):
+        if reason is None and self.key_exchange and metrics[METRIC] <= 0:
+            reason = "key exchange not completed"
+        elif reason is None and metrics["total_packets"] == 0:
+            reason = "no RPL packets captured"
+        if reason is None:
+            self.values[iteration] = metrics[METRIC]
+        else:
+            self.failed[iteration] = reason
+
+    def summary(self, confidence, outlier_threshold):
+        if not self.key_exchange:
+            return {"runs": len(self.values) + len(self.failed), "failed": len(self.failed), "outliers": 0,
+                    "kept": len(self.values), "mean": None, "half_width": None, "relative_half_width": None}
+        return summarize_runs(list(self.values.values()), len(self.failed), confidence, outlier_threshold)
+
+
+class IterationPolicy:
+    """
+    Decides how many iterations each cell gets: at least min_iterations and at
+    most max_iterations runs (failed runs included), stopping once the
+    confidence interval of the key exchange time is narrower than target (its
+    half-width relative to the mean).
+    """
+
+    def __init__(self, target=DEFAULT_TARGET, min_iterations=DEFAULT_MIN_ITERATIONS,
+                 max_iterations=DEFAULT_MAX_ITERATIONS, confidence=DEFAULT_CONFIDENCE,
+                 outlier_threshold=DEFAULT_OUTLIER_THRESHOLD):
+        self.target = target
+        self.min_iterations = min_iterations
+        self.max_iterations = max_iterations
+        self.confidence = confidence
+        self.outlier_threshold = outlier_threshold
+
+    def status(self, cell):
+        """
+        Returns "converged", "max_iterations" or None while the cell needs runs.
+        """
+        completed = len(cell.values) + len(cell.failed)
+        if not cell.key_exchange and len(cell.values) >= self.min_iterations:
+            return "converged"
+        if cell.key_exchange and len(cell.values) >= self.min_iterations:
+            relative = cell.summary(self.confidence, self.outlier_threshold)["relative_half_width"]
+            if relative is not None and relative <= self.target:
+                return "converged"
+        if completed >= self.max_iterations:
+            return "max_iterations"
+        return None
+
+    def wanted_runs(self, cell):
+        """
+        Runs the cell is expected to need in total, from the current width of
+        its interval (the width shrinks with the square root of the runs).
+        """
+        wanted = self.min_iterations + len(cell.failed)
+        if cell.key_exchange and len(cell.values) >= self.min_iterations:
+            summary = cell.summary(self.confidence, self.outlier_threshold)
+            relative = summary["relative_half_width"]
+            if relative is not None:
+                wanted = max(wanted, math.ceil(summary["kept"] * (relative / self.target) ** 2)
+                             + summary["outliers"] + len(cell.failed))
+            else:
+                wanted = max(wanted, cell.attempts + 1)
+        return min(wanted, self.max_iterations)
+
+
+def next_cell(cells, policy):
+    """
+    Picks the cell to run next: among the cells that still need runs and are
+    below their expected number of runs, the one with the fewest runs so far.
+    """
+    candidates = [cell for cell in cells
+                  if policy.status(cell) is None and cell.attempts < policy.wanted_runs(cell)]
+    return min(candidates, key=lambda cell: cell.attempts, default=None)
+
+
+def run_adaptive(cells, measurement, concurrency, policy):
+    """
+    Runs iterations of every cell, at most concurrency at a time, until each cell
+    has converged or reached max_iterations. Runs go to the cells that need them
+    the most, so converged cells free their slots for the noisy ones.
+    """
+    condition = threading.Condition()
+    free_slots = list(range(concurrency))
+
+    def execute(cell, iteration, slot):
+        try:
+            metrics, reason = measurement.measure(cell.scenario, cell.topology, iteration, slot)
+        except Exception as e:
+            metrics, reason = None, f"raised: {e}"
+        with condition:
+            cell.in_flight -= 1
+            cell.record(iteration, metrics, reason)
+            free_slots.append(slot)
+            if iteration in cell.failed:
+                status = f"FAILED ({cell.failed[iteration]})"
+            else:
+                status = f"{cell.values[iteration] * 1e3:.4f} ms" if cell.key_exchange else "completed"
+            print(f"   -> {cell.name} iteration {iteration}: {status}\n", end="", flush=True)
+            condition.notify()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        with condition:
+            while True:
+                cell = next_cell(cells, policy) if free_slots else None
+                if cell is None:
+                    if not any(c.in_flight for c in cells):
+                        break
+                    condition.wait()
+                    continue
+                iteration = cell.next_iteration
+                cell.next_iteration += 1
+                cell.in_flight += 1
+                executor.submit(execute, cell, iteration, free_slots.pop())
+
+
+def cell_report(cell, policy):
+    summary = cell.summary(policy.confidence, policy.outlier_threshold)
+    return {"scenario": cell.scenario, "topology": cell.topology,
+            "status": policy.status(cell) if cell.values else "failed",
+            **summary,
+            "values": {str(i): value for i, value in sorted(cell.values.items())},
+            "failed_runs": {str(i): reason for i, reason in sorted(cell.failed.items())}}
+
+
+def print_report(reports):
+    print(f"{'cell':<28} {'status':<15} {'runs':>5} {'failed':>7} {'outliers':>9} "
+          f"{'mean (ms)':>10} {'+/- (ms)':>9} {'rel.':>7}")
+    for report in reports:
+        name = f"{report['scenario']}_{report['topology']}"
+        mean = "-" if report["mean"] is None else f"{report['mean'] * 1e3:.4f}"
+        half_width = "-" if report["half_width"] is None else f"{report['half_width'] * 1e3:.4f}"
+        relative = "-" if report["relative_half_width"] is None else f"{report['relative_half_width']:.1%}"
+        print(f"{name:<28} {report['status']:<15} {report['runs']:>5} {report['failed']:>7} "
+              f"{report['outliers']:>9} {mean:>10} {half_width:>9} {relative:>7}")
+
+
+def set_adaptive_parser():
+    parser = argparse.ArgumentParser(
+        description="Run each scenario and topology until the confidence interval of its key exchange "
+                    "time is narrow enough.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-s', '--scenarios', nargs='+', default=SCENARIOS,
+                        choices=['no_cryptography', 'rsa', 'kyber'], help="Scenarios to run.")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=TOPOLOGIES,
+                        help="Topology IDs to run (1-12 or generated families such as grid-10-10).")
+    parser.add_argument('-p', '--target', type=float, default=DEFAULT_TARGET,
+                        help="Half-width of the confidence interval relative to the mean at which a cell "
+                             "stops (0.05 for +/-5%%).")
+    parser.add_argument('-c', '--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help="Confidence level of the interval.")
+    parser.add_argument('--min_iterations', type=int, default=DEFAULT_MIN_ITERATIONS,
+                        help="Successful runs per cell before its interval is checked.")
+    parser.add_argument('--max_iterations', type=int, default=DEFAULT_MAX_ITERATIONS,
+                        help="Runs per cell, failed ones included, after which it stops anyway.")
+    parser.add_argument('--outlier_threshold', type=float, default=DEFAULT_OUTLIER_THRESHOLD,
+                        help="Modified z-score above which a run is rejected as an outlier.")
+    parser.add_argument('-i', '--first_iteration', type=int, default=1,
+                        help="Iteration number of the first run of each cell.")
+    parser.add_argument('-j', '--concurrency', type=int, default=None,
+                        help="Experiments run at the same time. Derived from cores and memory by default.")
+    parser.add_argument('-o', '--output_dir', default=OUTPUT_DIR,
+                        help="Directory where captures are written.")
+    parser.add_argument('-r', '--report', default=REPORT_FILE, help="JSON file for the per-cell results.")
+    parser.add_argument('--simulate', action='store_true',
+                        help="Measure runs with the discrete-event simulator instead of Containernet.")
+    parser.add_argument('--loss', type=float, default=0.0, help="Frame loss probability with --simulate.")
+    parser.add_argument('network_args', nargs=argparse.REMAINDER,
+                        help="Extra arguments passed to network.py after '--' (e.g. -- -a).")
+    return parser
+
+
+def main():
+    parsed_args = set_adaptive_parser().parse_args(sys.argv[1:])
+    if not 0 < parsed_args.min_iterations <= parsed_args.max_iterations:
+        print("--min_iterations must be positive and at most --max_iterations")
+        return 2
+
+    if parsed_args.simulate:
+        measurement = SimulatedMeasurement(parsed_args.loss)
+        concurrency = parsed_args.concurrency or os.cpu_count() or 1
+    else:
+        network_args = [arg for arg in parsed_args.network_args if arg != "--"]
+        backend = SubprocessBackend(parsed_args.output_dir, extra_args=network_args)
+        measurement = CaptureMeasurement(backend, parsed_args.output_dir)
+        concurrency = parsed_args.concurrency or default_concurrency(DEFAULT_CORES_PER_RUN,
+                                                                     DEFAULT_MEMORY_PER_RUN_MB)
+        prepare_keys(parsed_args.scenarios, parsed_args.topologies)
+
+    policy = IterationPolicy(parsed_args.target, parsed_args.min_iterations, parsed_args.max_iterations,
+                             parsed_args.confidence, parsed_args.outlier_threshold)
+    cells = [Cell(scenario, topology, parsed_args.first_iteration)
+             for scenario in parsed_args.scenarios for topology in parsed_args.topologies]
+
+    print("========================================================")
+    print(f"Starting adaptive campaign of {len(cells)} cells, {concurrency} runs at a time")
+    print(f"Target: +/-{parsed_args.target:.1%} at {parsed_args.confidence:.0%} confidence, "
+          f"{parsed_args.min_iterations}-{parsed_args.max_iterations} runs per cell")
+    print("========================================================")
+
+    start = time.time()
+    run_adaptive(cells, measurement, concurrency, policy)
+    reports = [cell_report(cell, policy) for cell in cells]
+
+    print("========================================================")
+    print(f"Adaptive campaign finished in {time.time() - start:.1f}s, "
+          f"{sum(report['runs'] for report in reports)} runs")
+    print_report(reports)
+    for cell in cells:
+        for iteration, reason in sorted(cell.failed.items()):
+            print(f"Failed run: {cell.scenario}_{iteration}_{cell.topology} ({reason})")
+
+    os.makedirs(os.path.dirname(parsed_args.report) or ".", exist_ok=True)
+    with open(parsed_args.report, "w") as f:
+        json.dump({"target": parsed_args.target, "confidence": parsed_args.confidence,
+                   "min_iterations": parsed_args.min_iterations, "max_iterations": parsed_args.max_iterations,
+                   "cells": reports}, f, indent=2)
+    print(f"Report written to {parsed_args.report}")
+    return 0 if all(report["status"] == "converged" for report in reports) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
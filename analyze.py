@@ -0,0 +1,201 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import sys
+
+# Heavy modules (numpy, matplotlib, the capture parsers) are imported by the
+# commands that need them, so that summarizing stored results starts quickly.
+
+PCAP_FOLDER = "results"
+OUTPUT_FOLDER = "output"
+PLOTS = ["key_exchange", "packet_sizes"]
+
+
+def open_db(parsed_args):
+    from results_db import ResultsDB, default_db_path
+    db = ResultsDB(parsed_args.db or default_db_path(parsed_args.pcap_folder))
+    if not parsed_args.no_ingest:
+        db.ingest_folder(parsed_args.pcap_folder)
+    return db
+
+
+def selection(parsed_args):
+    return {"scenarios": parsed_args.scenarios, "topologies": parsed_args.topologies,
+            "iterations": parsed_args.iterations}
+
+
+def selected_metrics(parsed_args):
+    """
+    Returns {(scenario, iteration, topology): metrics} for the selected runs,
+    read from the results database.
+    """
+    with open_db(parsed_args) as db:
+        runs = db.runs(with_metrics=True, **selection(parsed_args))
+    return {(run["scenario"], run["iteration"], run["topology"]): run for run in runs}
+
+
+def print_rows(rows, columns):
+    widths = [max(len(column), *(len(format_cell(row.get(column))) for row in rows)) for column in columns]
+    print("  ".join(f"{column:<{width}}" for column, width in zip(columns, widths)))
+    for row in rows:
+        print("  ".join(f"{format_cell(row.get(column)):<{width}}" for column, width in zip(columns, widths)))
+
+
+def format_cell(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def extract(parsed_args):
+    """
+    Records the captures of the folder in the results database (only new or
+    rewritten ones are parsed) and optionally writes the metrics of the selected
+    runs to a JSON file.
+    """
+    from results_db import ResultsDB, default_db_path
+    with ResultsDB(parsed_args.db or default_db_path(parsed_args.pcap_folder)) as db:
+        count = db.ingest_folder(parsed_args.pcap_folder, parsed_args.processes)
+        runs = db.runs(with_metrics=True, **selection(parsed_args))
+    print(f"{count} captures parsed, {len(runs)} runs selected")
+    if parsed_args.output:
+        os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+        with open(parsed_args.output, "w") as f:
+            json.dump(runs, f, indent=1)
+        print(f"Metrics written to {parsed_args.output}")
+    return 0
+
+
+def summarize(parsed_args):
+    with open_db(parsed_args) as db:
+        rows = db.aggregate(parsed_args.metric, parsed_args.by, completed=parsed_args.completed,
+                            **selection(parsed_args))
+    if parsed_args.json:
+        print(json.dumps(rows, indent=1))
+    else:
+        print_rows(rows, parsed_args.by + ["runs", "mean", "std", "min", "max"])
+    return 0
+
+
+def plot(parsed_args):
+    run_metrics = selected_metrics(parsed_args)
+    if parsed_args.plot == "key_exchange":
+        from compare_key_exchange import CRYPTO_SCENARIOS, average_key_exchange_times, plot_key_exchange_times
+        scenarios = parsed_args.scenarios or CRYPTO_SCENARIOS
+        output_file = os.path.join(parsed_args.output_folder, "key_exchange_time_comparison.png")
+        plot_key_exchange_times(average_key_exchange_times(run_metrics, scenarios), output_file, scenarios)
+    else:
+        from packet_size_symmetric import CRYPTO_SCENARIOS, TOPOLOGIES_TO_PLOT, plot_packet_sizes, representative_sizes
+        scenarios = parsed_args.scenarios or CRYPTO_SCENARIOS
+        topologies = parsed_args.topologies or TOPOLOGIES_TO_PLOT
+        output_file = os.path.join(parsed_args.output_folder, "packet_size_symmetric.png")
+        plot_packet_sizes(representative_sizes(run_metrics, scenarios, topologies), output_file, scenarios)
+    print(f"Plot written to {output_file}")
+    return 0
+
+
+def compare(parsed_args):
+    """
+    Compares one metric between scenarios, per topology: the mean of each
+    scenario and its ratio to the reference scenario.
+    """
+    with open_db(parsed_args) as db:
+        rows = db.aggregate(parsed_args.metric, ["topology", "scenario"], completed=parsed_args.completed,
+                            **selection(parsed_args))
+    means = {}
+    for row in rows:
+        means.setdefault(row["topology"], {})[row["scenario"]] = row
+    scenarios = parsed_args.scenarios or sorted({row["scenario"] for row in rows})
+    table = []
+    for topology, by_scenario in means.items():
+        reference = by_scenario.get(parsed_args.reference)
+        for scenario in scenarios:
+            row = by_scenario.get(scenario)
+            if row is None:
+                continue
+            ratio = None
+            if reference is not None and reference["mean"]:
+                ratio = row["mean"] / reference["mean"]
+            table.append({"topology": topology, "scenario": scenario, "runs": row["runs"], "mean": row["mean"],
+                          "std": row["std"], f"x {parsed_args.reference}": ratio})
+    if parsed_args.json:
+        print(json.dumps(table, indent=1))
+    else:
+        print_rows(table, ["topology", "scenario", "runs", "mean", "std", f"x {parsed_args.reference}"])
+    return 0
+
+
+def add_selection_args(parser):
+    from utils import topology_id_arg
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('--db', default=None, help="Results database (<pcap_folder>/results.db by default).")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include.")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include.")
+    parser.add_argument('-i', '--iterations', nargs='+', type=int, default=None, help="Iterations to include.")
+
+
+def add_metric_args(parser):
+    parser.add_argument('-m', '--metric', default="key_exchange_time",
+                        help="key_exchange_time, total_packets, total_bytes or <metric>.<type>, e.g. counts.DAO.")
+    parser.add_argument('-c', '--completed', action='store_true',
+                        help="Only include runs whose key exchange completed.")
+    parser.add_argument('-j', '--json', action='store_true', help="Print the result as JSON.")
+    parser.add_argument('--no_ingest', action='store_true',
+                        help="Use the results database as it is, without looking for new captures.")
+
+
+def set_analyze_parser():
+    from results_db import DIMENSIONS
+    parser = argparse.ArgumentParser(
+        description="Analysis of the captured runs: extract metrics, summarize, plot and compare scenarios.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    formatter = argparse.ArgumentDefaultsHelpFormatter
+
+    parser_extract = subparsers.add_parser('extract', formatter_class=formatter,
+                                           help="Parse new captures into the results database.")
+    add_selection_args(parser_extract)
+    parser_extract.add_argument('-p', '--processes', type=int, default=None,
+                                help="Captures parsed at the same time (one per core by default).")
+    parser_extract.add_argument('-o', '--output', default=None, help="JSON file for the metrics of the selected runs.")
+    parser_extract.set_defaults(handler=extract)
+
+    parser_summarize = subparsers.add_parser('summarize', formatter_class=formatter,
+                                             help="Aggregate a metric over the selected runs.")
+    add_selection_args(parser_summarize)
+    add_metric_args(parser_summarize)
+    parser_summarize.add_argument('-b', '--by', nargs='*', default=["scenario", "topology"],
+                                  choices=DIMENSIONS, help="Dimensions to group by.")
+    parser_summarize.set_defaults(handler=summarize)
+
+    parser_plot = subparsers.add_parser('plot', formatter_class=formatter,
+                                        help="Plot the key exchange times or the packet sizes.")
+    parser_plot.add_argument('plot', choices=PLOTS, help="Plot to draw.")
+    add_selection_args(parser_plot)
+    parser_plot.add_argument('-o', '--output_folder', default=OUTPUT_FOLDER, help="Folder for the plot.")
+    parser_plot.add_argument('--no_ingest', action='store_true',
+                             help="Use the results database as it is, without looking for new captures.")
+    parser_plot.set_defaults(handler=plot)
+
+    parser_compare = subparsers.add_parser('compare', formatter_class=formatter,
+                                           help="Compare a metric between scenarios, per topology.")
+    add_selection_args(parser_compare)
+    add_metric_args(parser_compare)
+    parser_compare.add_argument('-r', '--reference', default="rsa", help="Scenario the others are compared to.")
+    parser_compare.set_defaults(handler=compare)
+    return parser
+
+
+def main():
+    parsed_args = set_analyze_parser().parse_args(sys.argv[1:])
+    return parsed_args.handler(parsed_args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
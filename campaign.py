@@ -0,0 +1,420 @@
+#!/usr/bin/env python
+
+import argparse
+import importlib.util
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+import types
+from concurrent.futures import ThreadPoolExecutor
+
+from keystore import ENC_MODES, KeyStore, legacy_pairs
+from pcap_reader import PCAP_SUFFIX
+from topologies import ROOT_NAME, get_topology
+from utils import topology_id_arg
+
+SCENARIOS = ["no_cryptography", "rsa", "kyber"]
+TOPOLOGIES = [1, 4, 12]
+NUM_ITERATIONS = 10
+
+LOG_DIR = "log"
+OUTPUT_DIR = "results"
+
+# Resources reserved for one Containernet experiment when sizing the pool
+DEFAULT_CORES_PER_RUN = 2
+DEFAULT_MEMORY_PER_RUN_MB = 2048
+
+BASE_PANID = 0xbe00
+
+# Linux limits interface names to 15 characters
+MAX_INTERFACE_NAME = 15
+PAN_INTERFACE_SUFFIX = "-pan0"
+
+NETWORK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "network.py")
+
+
+def available_memory_mb():
+    """
+    Returns the memory available for new processes in MB, read from /proc/meminfo
+    when possible and from the total physical memory otherwise.
+    """
+    try:
+        with open("/proc/meminfo") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // (1024 * 1024)
+
+
+def default_concurrency(cores_per_run=DEFAULT_CORES_PER_RUN, memory_per_run_mb=DEFAULT_MEMORY_PER_RUN_MB):
+    by_cores = (os.cpu_count() or 1) // cores_per_run
+    by_memory = available_memory_mb() // memory_per_run_mb
+    return max(1, min(by_cores, by_memory))
+
+
+def longest_node_name(topologies):
+    return max((name for topo_id in topologies for name, _ in get_topology(topo_id)["nodes"]), key=len)
+
+
+def slot_prefix(slot, node_name=ROOT_NAME):
+    """
+    Returns the node name prefix of a slot, e.g. 'r3'. Raises ValueError if the
+    interface of node_name ('r3sensor1-pan0') would exceed MAX_INTERFACE_NAME.
+    """
+    prefix = f"r{slot}"
+    interface = f"{prefix}{node_name}{PAN_INTERFACE_SUFFIX}"
+    if len(interface) > MAX_INTERFACE_NAME:
+        raise ValueError(f"Interface name {interface} of slot {slot} exceeds {MAX_INTERFACE_NAME} characters")
+    return prefix
+
+
+def max_concurrency(topologies):
+    """
+    Returns the number of slots whose prefixes keep the interface names of every
+    node of topologies within MAX_INTERFACE_NAME characters: 100 ('r0' to 'r99')
+    when the longest name is 'sensor1'.
+    """
+    digits = MAX_INTERFACE_NAME - len(PAN_INTERFACE_SUFFIX) - len(longest_node_name(topologies)) - 1
+    return 10 ** digits if digits > 0 else 0
+
+
+def slot_panid(slot):
+    return f"0x{BASE_PANID + slot:04x}"
+
+
+def prepare_keys(scenarios, topologies):
+    """
+    Generates the per-node keys of every scenario and topology up front, so the
+    concurrent runs only read the key store.
+    """
+    node_names = []
+    for topo_id in topologies:
+        for name, _ in get_topology(topo_id)["nodes"]:
+            if name not in node_names:
+                node_names.append(name)
+    for scenario in scenarios:
+        if scenario in ENC_MODES:
+            KeyStore(scenario).ensure(node_names, legacy_pairs(scenario))
+
+
+def campaign_runs(scenarios, topologies, num_iterations, warm=False):
+    """
+    Lists the runs of a campaign in the order run_topologies.sh used.
+    With warm, all iterations of a scenario and topology form a single run that
+    reuses the same containers.
+    """
+    if warm:
+        return [{"scenario": scenario, "topology": topo_id, "iteration": 1, "iterations": num_iterations}
+                for scenario in scenarios
+                for topo_id in topologies]
+    return [{"scenario": scenario, "topology": topo_id, "iteration": i, "iterations": 1}
+            for scenario in scenarios
+            for topo_id in topologies
+            for i in range(1, num_iterations + 1)]
+
+
+def run_name(run):
+    iterations = str(run["iteration"])
+    if run["iterations"] > 1:
+        iterations += f"-{run['iteration'] + run['iterations'] - 1}"
+    return f"{run['scenario']}_{iterations}_{run['topology']}"
+
+
+def network_args(run, slot, output_dir):
+    """
+    Arguments of network.py for a run in batch mode, with the node prefix, PAN ID
+    and output directory of its slot.
+    """
+    prefix = slot_prefix(slot, longest_node_name([run["topology"]]))
+    return ["-s", run["scenario"], "-t", str(run["topology"]), "-i", str(run["iteration"]),
+            "-n", str(run["iterations"]), "-b",
+            "--prefix", prefix, "--panid", slot_panid(slot),
+            "-o", output_dir]
+
+
+class SubprocessBackend:
+    """
+    Runs each experiment as a separate network.py process in batch mode, with the
+    node prefix, PAN ID and output directory of the slot it was given.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, log_dir=LOG_DIR, extra_args=()):
+        self.output_dir = output_dir
+        self.log_dir = log_dir
+        self.extra_args = list(extra_args)
+
+    def command(self, run, slot):
+        return [sys.executable, NETWORK_FILE] + network_args(run, slot, self.output_dir) + self.extra_args
+
+    def run(self, run, slot):
+        os.makedirs(self.log_dir, exist_ok=True)
+        log_file = os.path.join(self.log_dir, f"{run_name(run)}.log")
+        with open(log_file, "w") as log:
+            log.write(f"--- LOG START: Scenario={run['scenario']}, Topology={run['topology']}, "
+                      f"Iteration={run['iteration']}, Slot={slot} @ {time.ctime()} ---\n")
+            log.flush()
+            result = subprocess.run(self.command(run, slot), stdout=log, stderr=subprocess.STDOUT)
+            log.write(f"--- LOG END: exit code {result.returncode} ---\n")
+        return result.returncode
+
+
+class FakeSensor:
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+
+    def cmd(self, command):
+        return ""
+
+
+class FakeContainernet:
+    """
+    Stands in for Containernet: every container, interface and PAN ID of the
+    network is claimed from backend on creation and released by stop().
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.sensors = []
+        self.claimed = []
+
+    def claim(self, kind, name):
+        self.backend.claim(kind, name)
+        self.claimed.append((kind, name))
+
+    def addSensor(self, name, cls=None, **params):
+        if not self.sensors:
+            self.claim("PAN ID", params.get("panid"))
+        self.claim("container", f"mn.{name}")
+        sensor = FakeSensor(name, params)
+        self.sensors.append(sensor)
+        return sensor
+
+    def addLink(self, node1, node2, cls=None, **params):
+        for node in (node1, node2):
+            interface = f"{node.name}{PAN_INTERFACE_SUFFIX}"
+            if len(interface) > MAX_INTERFACE_NAME:
+                raise RuntimeError(f"Interface name {interface} exceeds {MAX_INTERFACE_NAME} characters")
+            if ("interface", interface) not in self.claimed:
+                self.claim("interface", interface)
+
+    def configureNodes(self):
+        pass
+
+    def build(self):
+        pass
+
+    def configRPLD(self, sensors):
+        pass
+
+    def stop(self):
+        self.backend.release(self.claimed)
+        self.claimed = []
+
+
+def fake_modules(backend):
+    """
+    Returns the containernet, mininet and mn_wifi modules imported by network.py,
+    with fake classes that claim their names from backend and do nothing else.
+    """
+    modules = {name: types.ModuleType(name) for name in [
+        "containernet", "containernet.net", "containernet.node", "containernet.cli", "containernet.energy",
+        "mininet", "mininet.log", "mininet.term",
+        "mn_wifi", "mn_wifi.energy", "mn_wifi.sixLoWPAN", "mn_wifi.sixLoWPAN.link"]}
+    modules["containernet.net"].Containernet = backend.new_network
+    modules["containernet.node"].DockerSensor = FakeSensor
+    modules["containernet.cli"].CLI = lambda net: None
+    modules["containernet.energy"].Energy = lambda sensors: None
+    modules["mininet.log"].info = lambda message: None
+    modules["mininet.log"].error = lambda message: sys.stderr.write(message)
+    modules["mininet.log"].setLogLevel = lambda level: None
+    modules["mininet.term"].makeTerm = lambda node, title=None, cmd=None: None
+    modules["mn_wifi.energy"].Energy = lambda sensors: None
+    modules["mn_wifi.sixLoWPAN.link"].LoWPAN = object
+    return modules
+
+
+class FakeBackend:
+    """
+    Runs each experiment through network.topology() in batch mode with the same
+    arguments as SubprocessBackend, but on fake Containernet, mininet and mn_wifi
+    classes (see fake_modules), without keys, and with a capture() that sleeps
+    for run_time seconds and only records the path of its capture, so no file
+    is written. The containers and interfaces get their names from network.py
+    and PrefixedNet; the backend raises if two concurrent runs share a
+    container, interface, PAN ID or output file, or if an interface name is
+    too long.
+    """
+
+    def __init__(self, output_dir=OUTPUT_DIR, run_time=0.05):
+        self.output_dir = output_dir
+        self.run_time = run_time
+        self.lock = threading.Lock()
+        self.active = set()
+        self.active_runs = 0
+        self.max_active_runs = 0
+        self.history = []
+        self.outputs = []
+        self.local = threading.local()
+        self.network = self.load_network()
+
+    def load_network(self):
+        from unittest import mock
+        spec = importlib.util.spec_from_file_location("fake_network", NETWORK_FILE)
+        network = importlib.util.module_from_spec(spec)
+        with mock.patch.dict(sys.modules, fake_modules(self)):
+            spec.loader.exec_module(network)
+        network.get_crypto_args = lambda scenario_name, node_names: {name: {} for name in node_names}
+        network.capture = self.capture
+        return network
+
+    def new_network(self):
+        self.local.net = FakeContainernet(self)
+        return self.local.net
+
+    def claim(self, kind, name):
+        with self.lock:
+            if (kind, name) in self.active:
+                raise RuntimeError(f"Concurrent runs share the {kind} {name}")
+            self.active.add((kind, name))
+
+    def release(self, resources):
+        with self.lock:
+            self.active -= set(resources)
+
+    def capture(self, nodes, parsed_args, output_file_base, image=None, start_network=None):
+        pcap_file = os.path.join(os.path.abspath(parsed_args.output_dir), output_file_base + PCAP_SUFFIX)
+        self.claim("output", pcap_file)
+        try:
+            if start_network is not None:
+                start_network()
+            time.sleep(self.run_time)
+            # Only the path is recorded: the output directory may hold real captures
+            with self.lock:
+                self.outputs.append(pcap_file)
+        finally:
+            self.release([("output", pcap_file)])
+
+    def run(self, run, slot):
+        with self.lock:
+            self.active_runs += 1
+            self.max_active_runs = max(self.max_active_runs, self.active_runs)
+            self.history.append((run_name(run), slot_prefix(slot)))
+        self.local.net = None
+        try:
+            self.network.topology(network_args(run, slot, self.output_dir))
+        finally:
+            # Releases the names of a run that failed before stopping its network
+            if self.local.net is not None:
+                self.local.net.stop()
+            with self.lock:
+                self.active_runs -= 1
+        return 0
+
+
+def run_campaign(runs, backend, concurrency):
+    """
+    Runs every experiment in runs on backend, at most concurrency at a time.
+    Each running experiment holds one slot, whose node prefix, PAN ID and output
+    paths no other running experiment uses.
+    Returns the exit code of each run, in the order of runs.
+    """
+    slots = queue.Queue()
+    for slot in range(concurrency):
+        slots.put(slot)
+
+    def execute(run):
+        slot = slots.get()
+        try:
+            # One write per line, so lines of concurrent runs do not interleave
+            print(f"   -> Running {run_name(run)} (slot {slot})\n", end="", flush=True)
+            try:
+                returncode = backend.run(run, slot)
+            except Exception as e:
+                print(f"   -> {run_name(run)} raised: {e}\n", end="", flush=True)
+                returncode = 1
+            status = "completed" if returncode == 0 else f"FAILED (exit code {returncode})"
+            print(f"   -> {run_name(run)} {status}.\n", end="", flush=True)
+            return returncode
+        finally:
+            slots.put(slot)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return list(executor.map(execute, runs))
+
+
+def set_campaign_parser():
+    parser = argparse.ArgumentParser(
+        description="Run a campaign of Containernet experiments concurrently.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-s', '--scenarios', nargs='+', default=SCENARIOS,
+                        choices=['no_cryptography', 'rsa', 'kyber'], help="Scenarios to run.")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=TOPOLOGIES,
+                        help="Topology IDs to run (1-12 or generated families such as grid-10-10).")
+    parser.add_argument('-n', '--num_iterations', type=int, default=NUM_ITERATIONS,
+                        help="Iterations per scenario and topology.")
+    parser.add_argument('-j', '--concurrency', type=int, default=None,
+                        help="Experiments run at the same time. Derived from cores and memory by default.")
+    parser.add_argument('--cores_per_run', type=int, default=DEFAULT_CORES_PER_RUN,
+                        help="Cores reserved per experiment when deriving the concurrency.")
+    parser.add_argument('--memory_per_run', type=int, default=DEFAULT_MEMORY_PER_RUN_MB,
+                        help="Memory (MB) reserved per experiment when deriving the concurrency.")
+    parser.add_argument('-w', '--warm', action='store_true',
+                        help="Run all iterations of a scenario and topology on the same containers.")
+    parser.add_argument('-o', '--output_dir', default=OUTPUT_DIR,
+                        help="Directory where captures are written.")
+    parser.add_argument('--fake', action='store_true',
+                        help="Use a fake backend instead of Containernet, to check the scheduling.")
+    parser.add_argument('network_args', nargs=argparse.REMAINDER,
+                        help="Extra arguments passed to network.py after '--' (e.g. -- -a).")
+    return parser
+
+
+def main():
+    parsed_args = set_campaign_parser().parse_args(sys.argv[1:])
+    concurrency = parsed_args.concurrency or default_concurrency(parsed_args.cores_per_run,
+                                                                 parsed_args.memory_per_run)
+    limit = max_concurrency(parsed_args.topologies)
+    if limit == 0:
+        print(f"Node {longest_node_name(parsed_args.topologies)} is too long for a prefixed interface name")
+        return 2
+    if concurrency > limit:
+        print(f"Running at most {limit} experiments at a time, so interface names fit in "
+              f"{MAX_INTERFACE_NAME} characters")
+        concurrency = limit
+    runs = campaign_runs(parsed_args.scenarios, parsed_args.topologies, parsed_args.num_iterations,
+                         parsed_args.warm)
+
+    if parsed_args.fake:
+        backend = FakeBackend(parsed_args.output_dir)
+    else:
+        network_args = [arg for arg in parsed_args.network_args if arg != "--"]
+        backend = SubprocessBackend(parsed_args.output_dir, extra_args=network_args)
+        prepare_keys(parsed_args.scenarios, parsed_args.topologies)
+
+    print("========================================================")
+    print(f"Starting campaign of {len(runs)} runs, {concurrency} at a time")
+    print(f"Scenarios: {' '.join(parsed_args.scenarios)}")
+    print(f"Topologies: {' '.join(str(t) for t in parsed_args.topologies)}")
+    print("========================================================")
+
+    start = time.time()
+    returncodes = run_campaign(runs, backend, concurrency)
+    failed = [run_name(run) for run, returncode in zip(runs, returncodes) if returncode != 0]
+
+    print("========================================================")
+    print(f"Campaign finished in {time.time() - start:.1f}s, {len(runs) - len(failed)}/{len(runs)} runs completed.")
+    if failed:
+        print(f"Failed runs: {' '.join(failed)}")
+    print("========================================================")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from convergence import ConvergenceMonitor, expected_nodes
+from packet_table import build_packet_table
+from rpl_metrics import CODE_TYPE_LUT, RPL_MESSAGE_TYPES, ROOT_ADDR, find_pcaps, run_sort_key
+from utils import topology_id_arg
+
+PCAP_FOLDER = "results"
+OUTPUT_FILE = "output/control_rates.json"
+PLOT_FOLDER = "output/control_rates"
+
+DEFAULT_RESOLUTION = 1.0
+
+
+def binned(rows, bins, n_rows, n_bins, weights=None):
+    """
+    Sums weights (or counts packets) per (row, bin) with a single bincount over
+    the flattened index. Returns an (n_rows, n_bins) array.
+    """
+    flat = rows.astype(np.int64) * n_bins + bins
+    return np.bincount(flat, weights=weights, minlength=n_rows * n_bins).reshape(n_rows, n_bins)
+
+
+def convergence_time(table, address_ids, offset, expected=()):
+    """
+    Seconds from the start of the capture until the DODAG converged, with the
+    criterion of ConvergenceMonitor: the last progress event (new node, key
+    exchange, first DAO-ACK to a node or larger DAO) once every key exchange and
+    DAO was answered, and each expected address got a DAO-ACK. The grace
+    period is left out, the end of the capture stands for it. None if the
+    capture ends before convergence.
+    """
+    addresses = {node_id: address for address, node_id in address_ids.items()}
+    monitor = ConvergenceMonitor(expected=expected)
+    for timestamp, src, dst, code, length in zip(table["timestamp"].tolist(), table["src"].tolist(),
+                                                 table["dst"].tolist(), table["code"].tolist(),
+                                                 table["length"].tolist()):
+        monitor.update((timestamp, addresses[src], addresses[dst], code, length))
+    converged = monitor.converged_at()
+    return None if converged is None else float(converged - offset)
+
+
+def capture_series(file_path, resolution=DEFAULT_RESOLUTION, topology_id=None):
+    """
+    Bins the RPL messages of a capture into intervals of resolution seconds,
+    starting at its first message. Returns a dictionary with:
+    - packets, bytes: {message type: per-bin count / bytes}
+    - node_packets, node_bytes: {source address: per-bin count / bytes}
+    - convergence: seconds until the DODAG converged (see convergence_time),
+      waiting for the root's neighbours in topology_id when given
+    - steady_rates: {message type: packets/s} from convergence to the end
+    - root_dio_intervals: seconds between consecutive DIOs of the root, which
+      grow as its trickle timer doubles and reset on inconsistencies
+    """
+    table, address_ids = build_packet_table(file_path)
+    series = {"duration": 0.0, "bins": 0, "convergence": None,
+              "packets": {}, "bytes": {}, "node_packets": {}, "node_bytes": {},
+              "steady_rates": {}, "root_dio_intervals": []}
+    type_index = CODE_TYPE_LUT[table["code"]]
+    known = type_index >= 0
+    # PK replies are not a message type of their own but count for convergence
+    all_messages = table
+    table, type_index = table[known], type_index[known]
+    if len(table) == 0:
+        return series
+
+    offset = table["timestamp"][0]
+    elapsed = table["timestamp"] - offset
+    bins = (elapsed // resolution).astype(np.int64)
+    n_bins = int(bins[-1]) + 1
+    lengths = table["length"].astype(np.float64)
+    n_types = len(RPL_MESSAGE_TYPES)
+    type_packets = binned(type_index, bins, n_types, n_bins)
+    type_bytes = binned(type_index, bins, n_types, n_bins, lengths)
+
+    sources, node_index = np.unique(table["src"], return_inverse=True)
+    node_packets = binned(node_index.reshape(-1), bins, len(sources), n_bins)
+    node_bytes = binned(node_index.reshape(-1), bins, len(sources), n_bins, lengths)
+    addresses = {node_id: address for address, node_id in address_ids.items()}
+
+    series["duration"] = float(elapsed[-1])
+    series["bins"] = n_bins
+    series["packets"] = {msg_type: type_packets[i].astype(int).tolist() for i, msg_type in enumerate(RPL_MESSAGE_TYPES)}
+    series["bytes"] = {msg_type: type_bytes[i].astype(int).tolist() for i, msg_type in enumerate(RPL_MESSAGE_TYPES)}
+    series["node_packets"] = {addresses[int(node)]: node_packets[k].astype(int).tolist()
+                              for k, node in enumerate(sources)}
+    series["node_bytes"] = {addresses[int(node)]: node_bytes[k].astype(int).tolist()
+                            for k, node in enumerate(sources)}
+
+    expected = expected_nodes(topology_id) if topology_id is not None else ()
+    convergence = convergence_time(all_messages, address_ids, offset, expected)
+    series["convergence"] = convergence
+    if convergence is not None and series["duration"] > convergence:
+        after = elapsed > convergence
+        steady_counts = np.bincount(type_index[after], minlength=n_types)
+        series["steady_rates"] = {msg_type: float(steady_counts[i]) / (series["duration"] - convergence)
+                                  for i, msg_type in enumerate(RPL_MESSAGE_TYPES)}
+
+    root_dio = (type_index == RPL_MESSAGE_TYPES.index("DIO")) & (table["src"] == address_ids.get(ROOT_ADDR, -1))
+    series["root_dio_intervals"] = np.diff(elapsed[root_dio]).round(6).tolist()
+    return series
+
+
+def aggregate_series(run_series, resolution=DEFAULT_RESOLUTION):
+    """
+    Combines the series of every iteration of each (scenario, topology) into
+    mean, min and max rate curves (messages/s and bytes/s per message type and
+    in total). Runs shorter than the longest one do not count past their end.
+    run_series maps (scenario, iteration, topology) to the result of capture_series.
+    """
+    groups = {}
+    for (scenario, iteration, topology), series in run_series.items():
+        groups.setdefault((scenario, topology), []).append(series)
+
+    summary = []
+    for scenario, topology in sorted(groups, key=lambda key: run_sort_key((key[0], 0, key[1]))):
+        runs = [series for series in groups[(scenario, topology)] if series["bins"]]
+        if not runs:
+            continue
+        n_bins = max(series["bins"] for series in runs)
+        row = {"scenario": scenario, "topology": topology, "runs": len(runs), "resolution": resolution,
+               "time": (np.arange(n_bins) * resolution).tolist()}
+        for field, unit in (("packets", "rate"), ("bytes", "byte_rate")):
+            # (run, type, bin), NaN past the end of shorter runs
+            stacked = np.full((len(runs), len(RPL_MESSAGE_TYPES) + 1, n_bins), np.nan)
+            for r, series in enumerate(runs):
+                values = np.array([series[field][msg_type] for msg_type in RPL_MESSAGE_TYPES], dtype=float)
+                stacked[r, :-1, :series["bins"]] = values
+                stacked[r, -1, :series["bins"]] = values.sum(axis=0)
+            stacked /= resolution
+            curves = {}
+            for statistic, reduce in (("mean", np.nanmean), ("min", np.nanmin), ("max", np.nanmax)):
+                reduced = reduce(stacked, axis=0)
+                curves[statistic] = {msg_type: reduced[i].round(3).tolist()
+                                     for i, msg_type in enumerate(RPL_MESSAGE_TYPES + ["total"])}
+            row[unit] = curves
+
+        converged = [series["convergence"] for series in runs if series["convergence"] is not None]
+        row["convergence"] = float(np.mean(converged)) if converged else None
+        steady = [series["steady_rates"] for series in runs if series["steady_rates"]]
+        row["steady_rates"] = {msg_type: float(np.mean([rates[msg_type] for rates in steady]))
+                               for msg_type in RPL_MESSAGE_TYPES} if steady else {}
+        summary.append(row)
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'scenario':<16} {'topology':<10} {'runs':>4} {'converged (s)':>14} "
+          + " ".join(f"{msg_type + '/s':>9}" for msg_type in RPL_MESSAGE_TYPES))
+    for row in summary:
+        convergence = "-" if row["convergence"] is None else f"{row['convergence']:.2f}"
+        rates = " ".join(f"{row['steady_rates'][msg_type]:>9.3f}" if row["steady_rates"] else f"{'-':>9}"
+                         for msg_type in RPL_MESSAGE_TYPES)
+        print(f"{row['scenario']:<16} {str(row['topology']):<10} {row['runs']:>4} {convergence:>14} {rates}")
+
+
+def plot_rates(summary, output_folder):
+    import matplotlib.pyplot as plt
+
+    os.makedirs(output_folder, exist_ok=True)
+    for row in summary:
+        fig, (ax_rate, ax_bytes) = plt.subplots(2, 1, figsize=(12, 8), sharex=True)
+        time = np.array(row["time"])
+        for i, msg_type in enumerate(RPL_MESSAGE_TYPES):
+            for ax, unit in ((ax_rate, "rate"), (ax_bytes, "byte_rate")):
+                mean = np.array(row[unit]["mean"][msg_type])
+                if not mean.any():
+                    continue
+                ax.step(time, mean, where="post", color=f"C{i}", label=msg_type)
+                ax.fill_between(time, row[unit]["min"][msg_type], row[unit]["max"][msg_type],
+                                step="post", color=f"C{i}", alpha=0.2)
+        for ax in (ax_rate, ax_bytes):
+            if row["convergence"] is not None:
+                ax.axvline(row["convergence"], color="grey", linestyle="--", linewidth=1)
+            ax.yaxis.grid(True, linestyle='--', color='grey', alpha=0.6)
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+        ax_rate.set_title(f"RPL control traffic, {row['scenario']} topology {row['topology']} "
+                          f"({row['runs']} runs)", fontsize=14)
+        ax_rate.set_ylabel("Messages/s")
+        ax_bytes.set_ylabel("Bytes/s")
+        ax_bytes.set_xlabel("Time since the first RPL message (s)")
+        ax_rate.legend(loc="upper right")
+        plt.tight_layout()
+        plt.savefig(os.path.join(output_folder, f"{row['scenario']}_{row['topology']}.png"), dpi=150)
+        plt.close(fig)
+
+
+def set_rates_parser():
+    parser = argparse.ArgumentParser(
+        description="Time series of the RPL control traffic rates of the captures, per message type and node.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include (all by default).")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include (all by default).")
+    parser.add_argument('-i', '--iterations', nargs='+', type=int, default=None,
+                        help="Iterations to include (all by default).")
+    parser.add_argument('-r', '--resolution', type=float, default=DEFAULT_RESOLUTION, help="Bin width in seconds.")
+    parser.add_argument('-n', '--per_run', action='store_true',
+                        help="Also write the series of every run, per message type and per node.")
+    parser.add_argument('-p', '--plot', nargs='?', const=PLOT_FOLDER, default=None,
+                        help="Folder for a plot of the curves of each scenario and topology.")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help="JSON file for the aggregated curves.")
+    return parser
+
+
+def main():
+    parsed_args = set_rates_parser().parse_args(sys.argv[1:])
+    if parsed_args.resolution <= 0:
+        print("The resolution must be positive")
+        return 2
+    pcaps = find_pcaps(parsed_args.pcap_folder, parsed_args.scenarios, parsed_args.iterations, parsed_args.topologies)
+    run_series = {key: capture_series(file_path, parsed_args.resolution, key[2]) for key, file_path in pcaps.items()}
+    summary = aggregate_series(run_series, parsed_args.resolution)
+    print_summary(summary)
+
+    results = {"summary": summary}
+    if parsed_args.per_run:
+        results["runs"] = [{"scenario": scenario, "iteration": iteration, "topology": topology, **series}
+                           for (scenario, iteration, topology), series in sorted(run_series.items(), key=lambda item: run_sort_key(item[0]))]
+    os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+    with open(parsed_args.output, "w") as f:
+        json.dump(results, f)
+    print(f"Results written to {parsed_args.output}")
+
+    if parsed_args.plot:
+        plot_rates(summary, parsed_args.plot)
+        print(f"Plots written to {parsed_args.plot}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,94 @@
+from rpl_metrics import PK_REPLY_CODE, RPL_CODES, ROOT_ADDR
+from topologies import get_topology, neighbors
+
+DEFAULT_GRACE_PERIOD = 10.0
+
+
+def expected_nodes(topology_id):
+    """
+    Returns the addresses of the root's neighbours in a topology: the nodes whose
+    key exchange and DAO the root itself answers.
+    """
+    topology = get_topology(topology_id)
+    addresses = dict(topology["nodes"])
+    root = topology["nodes"][0][0]
+    return {addresses[name] for name in neighbors(topology)[root]}
+
+
+class ConvergenceMonitor:
+    """
+    Follows the RPL records captured on the root and decides when the DODAG has
+    converged: every expected node (see expected_nodes) got a DAO-ACK, every node
+    that sent a public key got the root's reply, every node that sent a DAO to
+    the root got a DAO-ACK, and nothing new (node, key exchange, DAO-ACK or larger
+    DAO) has been seen for grace_period seconds.
+    The grace period must cover the DAO refresh interval, since DAOs from deeper
+    nodes only reach the root with a later refresh. All times are capture times.
+    """
+
+    def __init__(self, grace_period=DEFAULT_GRACE_PERIOD, expected=()):
+        self.grace_period = grace_period
+        self.expected = set(expected)
+        self.last_progress = None
+        self.last_timestamp = None
+        self.known_nodes = set()
+        self.pending_keys = set()
+        self.pending_acks = set()
+        self.acked_nodes = set()
+        self.max_dao_size = 0
+
+    def progress(self, timestamp):
+        self.last_progress = timestamp
+
+    def update(self, record):
+        timestamp, src, dst, code, length = record
+        self.last_timestamp = timestamp
+        if self.last_progress is None:
+            self.progress(timestamp)
+
+        if src != ROOT_ADDR and src.startswith("fe80:") and src not in self.known_nodes:
+            self.known_nodes.add(src)
+            self.progress(timestamp)
+
+        if code == RPL_CODES["PK"][0] and src != ROOT_ADDR:
+            if src not in self.pending_keys:
+                self.pending_keys.add(src)
+                self.progress(timestamp)
+        elif code == PK_REPLY_CODE and src == ROOT_ADDR:
+            if dst in self.pending_keys:
+                self.pending_keys.discard(dst)
+                self.progress(timestamp)
+        elif code in RPL_CODES["DAO"] and dst == ROOT_ADDR:
+            if src not in self.acked_nodes:
+                self.pending_acks.add(src)
+            if length > self.max_dao_size:
+                self.max_dao_size = length
+                self.progress(timestamp)
+        elif code in RPL_CODES["DAO-ACK"] and src == ROOT_ADDR:
+            if dst not in self.acked_nodes:
+                self.acked_nodes.add(dst)
+                self.pending_acks.discard(dst)
+                self.progress(timestamp)
+
+    def complete(self):
+        return (bool(self.acked_nodes) and self.expected <= self.acked_nodes
+                and not self.pending_keys and not self.pending_acks)
+
+    def converged_at(self):
+        """
+        Time of the last progress event if every expected node was answered and
+        every key exchange and DAO seen so far too, i.e. when the DODAG converged
+        if nothing follows; else None.
+        """
+        return self.last_progress if self.complete() else None
+
+    def converged(self, now=None):
+        """
+        Whether the DODAG converged by capture time now, by default the time of
+        the last record.
+        """
+        if now is None:
+            now = self.last_timestamp
+        if not self.complete():
+            return False
+        return now - self.last_progress >= self.grace_period
@@ -0,0 +1,195 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+
+import numpy as np
+
+import kyber
+from keystore import RSA_BITS, RSA_PUBLIC_EXPONENT, KYBER_LEVEL, rsa_primes
+
+RSA_SIZES = [32, 1024, 2048, 3072]
+KYBER_LEVELS = [512, 768, 1024]
+
+DEFAULT_SAMPLES = 200
+DEFAULT_MIN_SAMPLES = 3
+DEFAULT_MAX_TIME = 5.0
+OUTPUT_FILE = "output/crypto_bench.json"
+
+PERCENTILES = [50, 90, 99]
+
+
+def time_operation(operation, samples=DEFAULT_SAMPLES, min_samples=DEFAULT_MIN_SAMPLES, max_time=DEFAULT_MAX_TIME):
+    """
+    Calls operation() up to samples times, stopping early once max_time seconds
+    have passed and at least min_samples calls were timed.
+    Returns the latency of each call in seconds.
+    """
+    latencies = []
+    deadline = time.perf_counter() + max_time
+    while len(latencies) < samples:
+        start = time.perf_counter()
+        operation()
+        end = time.perf_counter()
+        latencies.append(end - start)
+        if end > deadline and len(latencies) >= min_samples:
+            break
+    return latencies
+
+
+def latency_stats(latencies):
+    values = np.array(latencies)
+    stats = {"samples": len(values), "mean_s": float(values.mean()),
+             "ops_per_s": float(1 / values.mean())}
+    for p in PERCENTILES:
+        stats[f"p{p}_s"] = float(np.percentile(values, p))
+    return stats
+
+
+def rsa_byte_size(bits):
+    return (bits + 7) // 8
+
+
+def bench_rsa(bits, crt, e=RSA_PUBLIC_EXPONENT, **timing):
+    """
+    Times RSA key generation, encryption and decryption (with or without the
+    CRT) for a bits-bit modulus. Keygen includes the CRT parameters when crt is set.
+    """
+    rng = random.SystemRandom()
+
+    def keygen():
+        p, q = rsa_primes(bits, e, rng)
+        d = pow(e, -1, (p - 1) * (q - 1))
+        if crt:
+            return p * q, d, p, q, d % (p - 1), d % (q - 1), pow(q, -1, p)
+        return p * q, d, p, q
+
+    n, d, p, q = keygen()[:4]
+    dp, dq, q_inv = d % (p - 1), d % (q - 1), pow(q, -1, p)
+    message = rng.randrange(2, n - 1)
+    ciphertext = pow(message, e, n)
+
+    def decrypt():
+        if not crt:
+            return pow(ciphertext, d, n)
+        m1 = pow(ciphertext, dp, p)
+        m2 = pow(ciphertext, dq, q)
+        return m2 + (q_inv * (m1 - m2) % p) * q
+
+    if decrypt() != message:
+        raise RuntimeError(f"RSA-{bits} decryption does not invert encryption")
+
+    # Public key (n, e) from the node, ciphertext of the modulus size back
+    public_key_bytes = rsa_byte_size(bits) + rsa_byte_size(e.bit_length())
+    ciphertext_bytes = rsa_byte_size(bits)
+    return {
+        "scheme": "rsa", "parameter": bits, "crt": crt,
+        "name": f"RSA-{bits}{'-CRT' if crt else ''}",
+        "configured": bits == RSA_BITS,
+        "operations": {
+            "keygen": latency_stats(time_operation(keygen, **timing)),
+            "encrypt": latency_stats(time_operation(lambda: pow(message, e, n), **timing)),
+            "decrypt": latency_stats(time_operation(decrypt, **timing)),
+        },
+        "wire_bytes": {"public_key": public_key_bytes, "ciphertext": ciphertext_bytes,
+                       "handshake": public_key_bytes + ciphertext_bytes},
+    }
+
+
+def bench_kyber(level, **timing):
+    """
+    Times ML-KEM key generation, encapsulation and decapsulation with kyber.py.
+    """
+    public_key, secret_key = kyber.keygen(level)
+    shared_secret, ciphertext = kyber.encaps(public_key)
+    if kyber.decaps(secret_key, ciphertext) != shared_secret:
+        raise RuntimeError(f"Kyber-{level} decapsulation does not match encapsulation")
+
+    public_key_bytes = kyber.public_key_size(level)
+    ciphertext_bytes = kyber.ciphertext_size(level)
+    return {
+        "scheme": "kyber", "parameter": level, "crt": None,
+        "name": f"Kyber-{level}",
+        "configured": level == KYBER_LEVEL,
+        "operations": {
+            "keygen": latency_stats(time_operation(lambda: kyber.keygen(level), **timing)),
+            "encrypt": latency_stats(time_operation(lambda: kyber.encaps(public_key), **timing)),
+            "decrypt": latency_stats(time_operation(lambda: kyber.decaps(secret_key, ciphertext), **timing)),
+        },
+        "wire_bytes": {"public_key": public_key_bytes, "ciphertext": ciphertext_bytes,
+                       "handshake": public_key_bytes + ciphertext_bytes},
+    }
+
+
+def run_benchmarks(rsa_sizes=RSA_SIZES, kyber_levels=KYBER_LEVELS, crt_modes=(False, True), **timing):
+    results = []
+    for bits in rsa_sizes:
+        for crt in crt_modes:
+            results.append(bench_rsa(bits, crt, **timing))
+            print_result(results[-1])
+    for level in kyber_levels:
+        results.append(bench_kyber(level, **timing))
+        print_result(results[-1])
+    return results
+
+
+def print_result(result):
+    marker = " *" if result["configured"] else ""
+    for operation, stats in result["operations"].items():
+        print(f"{result['name'] + marker:<16} {operation:<8} "
+              f"p50 {stats['p50_s'] * 1e3:10.3f} ms  p99 {stats['p99_s'] * 1e3:10.3f} ms  "
+              f"{stats['ops_per_s']:12.1f} ops/s  ({stats['samples']} samples)", flush=True)
+    print(f"{result['name'] + marker:<16} wire     {result['wire_bytes']['handshake']} bytes per handshake "
+          f"(public key {result['wire_bytes']['public_key']} + ciphertext {result['wire_bytes']['ciphertext']})",
+          flush=True)
+
+
+def set_bench_parser():
+    parser = argparse.ArgumentParser(
+        description="Time keygen, encrypt/encapsulate and decrypt/decapsulate of RSA and Kyber.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('--rsa', nargs='*', type=int, default=RSA_SIZES, help="RSA modulus sizes in bits.")
+    parser.add_argument('--kyber', nargs='*', type=int, default=KYBER_LEVELS,
+                        choices=KYBER_LEVELS, help="Kyber levels.")
+    parser.add_argument('--crt', choices=['both', 'on', 'off'], default='both',
+                        help="Time RSA decryption with the CRT, without it or both.")
+    parser.add_argument('-n', '--samples', type=int, default=DEFAULT_SAMPLES,
+                        help="Maximum timed calls per operation.")
+    parser.add_argument('--min_samples', type=int, default=DEFAULT_MIN_SAMPLES,
+                        help="Minimum timed calls per operation.")
+    parser.add_argument('--max_time', type=float, default=DEFAULT_MAX_TIME,
+                        help="Seconds after which an operation stops once it has --min_samples calls.")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help="JSON report file.")
+    return parser
+
+
+def main():
+    parsed_args = set_bench_parser().parse_args(sys.argv[1:])
+    crt_modes = {"both": (False, True), "on": (True,), "off": (False,)}[parsed_args.crt]
+    print(f"Configured schemes (*): RSA-{RSA_BITS} with e={RSA_PUBLIC_EXPONENT}, Kyber-{KYBER_LEVEL}")
+
+    results = run_benchmarks(parsed_args.rsa, parsed_args.kyber, crt_modes,
+                             samples=parsed_args.samples, min_samples=parsed_args.min_samples,
+                             max_time=parsed_args.max_time)
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "rsa_public_exponent": RSA_PUBLIC_EXPONENT,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+    with open(parsed_args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {parsed_args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+from energy_monitor import energy_file_path, read_energy_samples
+from hop_latency import run_captures
+from packet_table import build_packet_table
+from rpl_metrics import PK_REPLY_CODE, RPL_CODES, find_pcaps, run_sort_key
+from topologies import get_topology
+from utils import topology_id_arg
+
+PCAP_FOLDER = "results"
+OUTPUT_FILE = "output/energy.json"
+
+PK_CODE = RPL_CODES["PK"][0]
+
+
+def node_energy(samples):
+    """
+    Returns {node: (energy consumed between its first and last sample, seconds
+    between them)} from the samples of read_energy_samples.
+    """
+    return {node: (node_samples[-1][1] - node_samples[0][1], node_samples[-1][0] - node_samples[0][0])
+            for node, node_samples in samples.items() if node_samples}
+
+
+def key_exchange_window(pcap_file, topology_id):
+    """
+    Returns (start, end, exchanges) of the key exchanges of a run, from the first
+    PK to the last PK reply, with the number of nodes that got a reply in
+    between; None if no PK reply was captured. The captures of every node
+    (network.py -m) are used when present, as the root's capture only holds the
+    exchanges of its neighbours.
+    """
+    keys, replies, answered = [], [], set()
+    for path in run_captures(pcap_file, get_topology(topology_id)).values():
+        table, address_ids = build_packet_table(path)
+        addresses = {node_id: address for address, node_id in address_ids.items()}
+        is_reply = table["code"] == PK_REPLY_CODE
+        keys.extend(table["timestamp"][table["code"] == PK_CODE].tolist())
+        replies.extend(table["timestamp"][is_reply].tolist())
+        answered.update(addresses[int(dst)] for dst in table["dst"][is_reply])
+    if not keys or not replies:
+        return None
+    return min(keys), max(replies), len(answered)
+
+
+def enclosing_samples(node_samples, start, end):
+    """
+    Returns the indices of the last sample at or before start and the first at or
+    after end (clamped to the samples), so the energy between them holds all of
+    the energy spent from start to end.
+    """
+    times = np.array([timestamp for timestamp, _ in node_samples])
+    first = max(0, int(np.searchsorted(times, start, side="right")) - 1)
+    last = min(len(times) - 1, int(np.searchsorted(times, end, side="left")))
+    return first, last
+
+
+def key_exchange_energy(samples, window):
+    """
+    Energy of the key exchanges: per node, the energy consumed over the sample
+    interval enclosing the window, minus what the node consumes idle over that
+    interval, where the idle rate is its mean power outside it. Negative
+    differences (noise) count as zero.
+    """
+    energy = 0.0
+    for node_samples in samples.values():
+        if len(node_samples) < 2:
+            continue
+        first, last = enclosing_samples(node_samples, *window)
+        span = node_samples[last][0] - node_samples[first][0]
+        in_window = node_samples[last][1] - node_samples[first][1]
+        idle_time = node_samples[-1][0] - node_samples[0][0] - span
+        idle_energy = node_samples[-1][1] - node_samples[0][1] - in_window
+        idle_rate = idle_energy / idle_time if idle_time > 0 else 0.0
+        energy += max(0.0, in_window - idle_rate * span)
+    return energy
+
+
+def run_energy(pcap_file, topology_id):
+    """
+    Returns the energy of one run: per node, in total, and per key exchange,
+    or None when the run has no energy samples. The energy per key exchange is
+    the energy spent above the idle baseline between the first PK and the last
+    PK reply (see key_exchange_energy), divided by the key exchanges captured
+    in that window (see key_exchange_window).
+    """
+    energy_file = energy_file_path(pcap_file)
+    if not os.path.exists(energy_file):
+        return None
+    samples = read_energy_samples(energy_file)
+    per_node = node_energy(samples)
+    if not per_node:
+        return None
+    total = sum(energy for energy, _ in per_node.values())
+    window = key_exchange_window(pcap_file, topology_id)
+    key_exchanges = window[2] if window is not None else 0
+    exchange_energy = key_exchange_energy(samples, window[:2]) if window is not None else None
+    return {
+        "nodes": {node: energy for node, (energy, _) in sorted(per_node.items())},
+        "duration": max(duration for _, duration in per_node.values()),
+        "total": total,
+        "key_exchanges": key_exchanges,
+        "key_exchange_window": window[1] - window[0] if window is not None else None,
+        "key_exchange_energy": exchange_energy,
+        "per_key_exchange": exchange_energy / key_exchanges if exchange_energy is not None and key_exchanges else None,
+    }
+
+
+def summarize(runs):
+    """
+    Averages the runs of each (scenario, topology) over their iterations.
+    runs maps (scenario, iteration, topology) to the result of run_energy.
+    """
+    groups = {}
+    for (scenario, iteration, topology), result in runs.items():
+        groups.setdefault((scenario, topology), []).append(result)
+
+    summary = []
+    for scenario, topology in sorted(groups, key=lambda key: run_sort_key((key[0], 0, key[1]))):
+        results = groups[(scenario, topology)]
+        node_names = sorted({node for result in results for node in result["nodes"]})
+        per_node = {node: float(np.mean([r["nodes"][node] for r in results if node in r["nodes"]]))
+                    for node in node_names}
+        per_key_exchange = [r["per_key_exchange"] for r in results if r["per_key_exchange"] is not None]
+        summary.append({
+            "scenario": scenario,
+            "topology": topology,
+            "runs": len(results),
+            "duration": float(np.mean([r["duration"] for r in results])),
+            "total": float(np.mean([r["total"] for r in results])),
+            "mean_per_node": float(np.mean(list(per_node.values()))),
+            "max_per_node": max(per_node.values()),
+            "per_key_exchange": float(np.mean(per_key_exchange)) if per_key_exchange else None,
+            "nodes": per_node,
+        })
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'scenario':<16} {'topology':<10} {'runs':>5} {'duration (s)':>13} {'total':>12} "
+          f"{'mean/node':>12} {'max/node':>12} {'per key exchange':>17}")
+    for row in summary:
+        per_key_exchange = "-" if row["per_key_exchange"] is None else f"{row['per_key_exchange']:.6f}"
+        print(f"{row['scenario']:<16} {str(row['topology']):<10} {row['runs']:>5} {row['duration']:>13.1f} "
+              f"{row['total']:>12.6f} {row['mean_per_node']:>12.6f} {row['max_per_node']:>12.6f} "
+              f"{per_key_exchange:>17}")
+
+
+def set_energy_parser():
+    parser = argparse.ArgumentParser(
+        description="Energy per node and per key exchange from the energy samples written next to the captures.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include (all by default).")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include (all by default).")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help="JSON file for the per-run and summary results.")
+    return parser
+
+
+def main():
+    parsed_args = set_energy_parser().parse_args(sys.argv[1:])
+    pcaps = find_pcaps(parsed_args.pcap_folder, parsed_args.scenarios, None, parsed_args.topologies)
+    runs = {key: run_energy(pcap_file, key[2]) for key, pcap_file in pcaps.items()}
+    runs = {key: result for key, result in runs.items() if result is not None}
+    if not runs:
+        print(f"No energy samples found in {parsed_args.pcap_folder}")
+        return 1
+
+    summary = summarize(runs)
+    print("Energy in the unit of the energy model's consumption counters")
+    print_summary(summary)
+
+    os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+    with open(parsed_args.output, "w") as f:
+        json.dump({"summary": summary,
+                   "runs": [{"scenario": scenario, "iteration": iteration, "topology": topology, **result}
+                            for (scenario, iteration, topology), result in runs.items()]}, f, indent=2)
+    print(f"Results written to {parsed_args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+import csv
+import os
+import threading
+import time
+
+from pcap_reader import capture_base
+
+ENERGY_FILE_SUFFIX = ".energy.csv"
+DEFAULT_SAMPLE_INTERVAL = 1.0
+
+CSV_FIELDS = ["timestamp", "node", "consumption"]
+
+
+def energy_file_path(pcap_file):
+    """
+    Returns the energy samples file stored next to a capture:
+    results/kyber_1_4.pcap -> results/kyber_1_4.energy.csv
+    """
+    return capture_base(pcap_file) + ENERGY_FILE_SUFFIX
+
+
+def node_consumption(sensor):
+    """
+    Returns the energy consumed so far by a sensor, as accumulated by the energy
+    model started with DockerEnergy(net.sensors): the sum of the consumption
+    counters of its wireless interfaces. Returns None if the model has not set
+    any counter yet.
+    """
+    values = [getattr(intf, "consumption", None) for intf in getattr(sensor, "wintfs", {}).values()]
+    values = [float(value) for value in values if value is not None]
+    return sum(values) if values else None
+
+
+class EnergySampler:
+    """
+    Samples the energy counters of every node every interval seconds on a
+    background thread while a capture runs, and writes the samples to a CSV file
+    (timestamp, node, consumption) when stopped. Timestamps use the host clock,
+    like the packet timestamps of the captures.
+    """
+
+    def __init__(self, nodes, output_file, interval=DEFAULT_SAMPLE_INTERVAL):
+        self.nodes = nodes
+        self.output_file = output_file
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def sample(self):
+        now = time.time()
+        for name, sensor in self.nodes.items():
+            consumption = node_consumption(sensor)
+            if consumption is not None:
+                self.samples.append((now, name, consumption))
+
+    def run(self):
+        self.sample()
+        while not self.stop_event.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Takes a last sample, writes every sample to output_file and returns the
+        number of samples written.
+        """
+        self.stop_event.set()
+        self.thread.join()
+        self.sample()
+        os.makedirs(os.path.dirname(self.output_file) or ".", exist_ok=True)
+        with open(self.output_file, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_FIELDS)
+            writer.writerows(self.samples)
+        return len(self.samples)
+
+
+def read_energy_samples(file_path):
+    """
+    Reads an energy samples file into {node: [(timestamp, consumption), ...]}
+    sorted by timestamp.
+    """
+    samples = {}
+    with open(file_path, newline="") as f:
+        for row in csv.DictReader(f):
+            samples.setdefault(row["node"], []).append((float(row["timestamp"]), float(row["consumption"])))
+    for node_samples in samples.values():
+        node_samples.sort()
+    return samples
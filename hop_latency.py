@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+
+import argparse
+import bisect
+import json
+import os
+import sys
+
+import numpy as np
+
+from live_capture import node_capture_path
+from pcap_reader import read_rpl_records
+from rpl_metrics import CODE_TO_TYPE, PK_REPLY_CODE, find_pcaps, run_sort_key
+from topologies import get_topology
+from utils import topology_id_arg
+
+PCAP_FOLDER = "results"
+OUTPUT_FILE = "output/hop_latency.json"
+
+# Longest delay accepted between a transmission and its reception, or between a
+# message and the response it triggers
+DEFAULT_MATCH_WINDOW = 0.5
+
+MESSAGE_TYPES = {**CODE_TO_TYPE, PK_REPLY_CODE: "PK-REPLY"}
+
+# Processing stages: (name, received type, sent type, destination of the response)
+# "sender" means the response goes back to whoever sent the trigger, "other" to
+# another node, "multicast" to ff02::1a.
+STAGES = [
+    ("pk-reply", "PK", "PK-REPLY", "sender"),
+    ("key-install", "PK-REPLY", "DIS", "multicast"),
+    ("dis-dio", "DIS", "DIO", "multicast"),
+    ("dio-dao", "DIO", "DAO", "sender"),
+    ("dao-ack", "DAO", "DAO-ACK", "sender"),
+    ("dao-forward", "DAO", "DAO", "other"),
+]
+CRYPTO_STAGES = ["pk-reply", "key-install"]
+RELAY_STAGES = ["dao-forward"]
+
+
+def run_captures(pcap_file, topology):
+    """
+    Returns {node name: capture path} for the nodes of a run captured with
+    --all_nodes: the root's capture is pcap_file itself.
+    """
+    root = topology["nodes"][0][0]
+    captures = {root: pcap_file}
+    for name, _ in topology["nodes"][1:]:
+        path = node_capture_path(pcap_file, name)
+        if os.path.exists(path):
+            captures[name] = path
+    return captures
+
+
+def merge_captures(captures, topology):
+    """
+    Reads the capture of every node and merges them on one timeline.
+    All containers share the host clock, so timestamps are comparable.
+    Returns a time-sorted list of (timestamp, capture node, src node, dst node
+    or None for multicast, message type, length).
+    """
+    names = {ip6: name for name, ip6 in topology["nodes"]}
+    events = []
+    for node, path in captures.items():
+        for timestamp, src, dst, code, length in read_rpl_records(path):
+            msg_type = MESSAGE_TYPES.get(code)
+            if msg_type is None or src not in names:
+                continue
+            events.append((timestamp, node, names[src], names.get(dst), msg_type, length))
+    events.sort()
+    return events
+
+
+def match_links(events, window=DEFAULT_MATCH_WINDOW):
+    """
+    Matches every transmission (a message seen in its sender's capture) with
+    its reception in the capture of each node that heard it: the first unmatched
+    copy with the same source, destination, type and length within window.
+    Returns a list of (message type, sender, receiver, tx time, latency).
+    """
+    received = {}
+    for timestamp, node, src, dst, msg_type, length in events:
+        if node != src:
+            copies = received.setdefault((src, dst, msg_type, length), {})
+            copies.setdefault(node, [[], []])
+            copies[node][0].append(timestamp)
+            copies[node][1].append(False)
+
+    links = []
+    for timestamp, node, src, dst, msg_type, length in events:
+        if node != src:
+            continue
+        for receiver, (times, used) in received.get((src, dst, msg_type, length), {}).items():
+            if dst is not None and receiver != dst:
+                continue
+            # A copy may be stamped slightly before the transmission (timestamp resolution)
+            i = bisect.bisect_left(times, timestamp - 1e-3)
+            while i < len(times) and used[i]:
+                i += 1
+            if i < len(times) and times[i] - timestamp <= window:
+                used[i] = True
+                links.append((msg_type, src, receiver, timestamp, max(times[i] - timestamp, 0.0)))
+    return links
+
+
+def match_processing(events, window=DEFAULT_MATCH_WINDOW):
+    """
+    Matches, in each node's own capture, every received message with the first
+    response that node sent within window (see STAGES), e.g. a PK reply to a PK
+    or the DAO a relay sends after a DAO from its child.
+    Returns a list of (stage, node, peer, rx time, latency).
+    """
+    per_node = {}
+    for timestamp, node, src, dst, msg_type, length in events:
+        per_node.setdefault(node, []).append((timestamp, src, dst, msg_type))
+
+    results = []
+    for node, node_events in per_node.items():
+        sent = [(timestamp, dst, msg_type) for timestamp, src, dst, msg_type in node_events if src == node]
+        sent_times = [timestamp for timestamp, _, _ in sent]
+        answered = set()
+        for timestamp, src, dst, msg_type in node_events:
+            if src == node:
+                continue
+            for stage, trigger, response, target in STAGES:
+                if msg_type != trigger:
+                    continue
+                i = bisect.bisect_left(sent_times, timestamp)
+                while i < len(sent) and sent_times[i] - timestamp <= window:
+                    _, response_dst, response_type = sent[i]
+                    if response_type == response and (stage, i) not in answered and (
+                            (target == "sender" and response_dst == src)
+                            or (target == "other" and response_dst not in (src, None))
+                            or (target == "multicast" and response_dst is None)):
+                        if target != "multicast":
+                            answered.add((stage, i))
+                        results.append((stage, node, src, timestamp, sent_times[i] - timestamp))
+                        break
+                    i += 1
+    return results
+
+
+def node_roles(topology, processing):
+    """
+    Returns {node: "root" | "relay" | "leaf"}; relays are nodes that forwarded a DAO.
+    """
+    root = topology["nodes"][0][0]
+    relays = {node for stage, node, _, _, _ in processing if stage == "dao-forward"}
+    return {name: "root" if name == root else "relay" if name in relays else "leaf"
+            for name, _ in topology["nodes"]}
+
+
+def latency_stats(values):
+    values = np.array(values)
+    return {"count": len(values), "mean": float(values.mean()), "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)), "max": float(values.max())}
+
+
+def analyze_run(pcap_file, topology_id, window=DEFAULT_MATCH_WINDOW):
+    """
+    Per-hop breakdown of one run captured with --all_nodes: link latency per
+    message type and sender role, and processing latency per stage and role.
+    Returns None if only the root was captured.
+    """
+    topology = get_topology(topology_id)
+    captures = run_captures(pcap_file, topology)
+    if len(captures) < 2:
+        return None
+    events = merge_captures(captures, topology)
+    links = match_links(events, window)
+    processing = match_processing(events, window)
+    roles = node_roles(topology, processing)
+
+    link_groups = {}
+    for msg_type, src, receiver, _, latency in links:
+        link_groups.setdefault((msg_type, roles[src]), []).append(latency)
+    stage_groups = {}
+    for stage, node, _, _, latency in processing:
+        stage_groups.setdefault((stage, roles[node]), []).append(latency)
+
+    return {
+        "captured_nodes": sorted(captures),
+        "roles": roles,
+        "links": [{"type": msg_type, "sender_role": role, **latency_stats(values)}
+                  for (msg_type, role), values in sorted(link_groups.items())],
+        "processing": [{"stage": stage, "role": role, **latency_stats(values)}
+                       for (stage, role), values in sorted(stage_groups.items())],
+        "events": {"links": links, "processing": processing},
+    }
+
+
+def mean_latency(rows, names, key):
+    values = [row["mean"] for row in rows if row[key] in names]
+    return float(np.mean(values)) if values else None
+
+
+def print_run(key, result):
+    scenario, iteration, topology = key
+    print(f"=== {scenario} iteration {iteration} topology {topology} "
+          f"({len(result['captured_nodes'])} nodes captured)")
+    print(f"  {'hop':<24} {'count':>6} {'mean (ms)':>10} {'p50 (ms)':>10} {'p95 (ms)':>10}")
+    for row in result["links"]:
+        print(f"  {'link ' + row['type'] + ' from ' + row['sender_role']:<24} {row['count']:>6} "
+              f"{row['mean'] * 1e3:>10.3f} {row['p50'] * 1e3:>10.3f} {row['p95'] * 1e3:>10.3f}")
+    for row in result["processing"]:
+        print(f"  {row['stage'] + ' at ' + row['role']:<24} {row['count']:>6} "
+              f"{row['mean'] * 1e3:>10.3f} {row['p50'] * 1e3:>10.3f} {row['p95'] * 1e3:>10.3f}")
+
+    crypto = [mean_latency(result["processing"], [stage], "stage") for stage in CRYPTO_STAGES]
+    relay = mean_latency(result["processing"], RELAY_STAGES, "stage")
+    relay_link = mean_latency([row for row in result["links"] if row["sender_role"] == "relay"], ["DAO"], "type")
+    if all(value is not None for value in crypto):
+        print(f"  endpoint crypto per key exchange: {sum(crypto) * 1e3:.3f} ms")
+    if relay is not None:
+        print(f"  relay cost per hop (DAO forward + link): {(relay + (relay_link or 0.0)) * 1e3:.3f} ms")
+
+
+def set_hop_parser():
+    parser = argparse.ArgumentParser(
+        description="Per-hop forwarding and processing latency from runs captured on every node (network.py -m).",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include (all by default).")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include (all by default).")
+    parser.add_argument('-w', '--window', type=float, default=DEFAULT_MATCH_WINDOW,
+                        help="Longest delay (s) accepted when matching a message across hops or with its response.")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help="JSON file for the results.")
+    return parser
+
+
+def main():
+    parsed_args = set_hop_parser().parse_args(sys.argv[1:])
+    pcaps = find_pcaps(parsed_args.pcap_folder, parsed_args.scenarios, None, parsed_args.topologies)
+    results = {}
+    for key, pcap_file in pcaps.items():
+        result = analyze_run(pcap_file, key[2], parsed_args.window)
+        if result is not None:
+            results[key] = result
+            print_run(key, result)
+    if not results:
+        print(f"No runs captured on every node in {parsed_args.pcap_folder}")
+        return 1
+
+    os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+    with open(parsed_args.output, "w") as f:
+        json.dump([{"scenario": scenario, "iteration": iteration, "topology": topology, **result}
+                   for (scenario, iteration, topology), result in sorted(results.items(),
+                                                                         key=lambda item: run_sort_key(item[0]))],
+                  f, indent=1)
+    print(f"Results written to {parsed_args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
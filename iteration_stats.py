@@ -0,0 +1,122 @@
+import math
+
+import numpy as np
+
+DEFAULT_CONFIDENCE = 0.95
+# Modified z-score above which a run is an outlier (Iglewicz and Hoaglin)
+DEFAULT_OUTLIER_THRESHOLD = 3.5
+# Fewest runs needed before outliers are looked for
+MIN_OUTLIER_SAMPLES = 4
+
+
+def t_cdf(t, df):
+    """
+    Cumulative distribution function of Student's t with an integer number of
+    degrees of freedom, from the exact finite series in cos(theta).
+    """
+    if df < 1:
+        raise ValueError("df must be at least 1")
+    theta = math.atan(abs(t) / math.sqrt(df))
+    cos2 = math.cos(theta) ** 2
+    if df % 2:
+        term, total = 1.0, 1.0 if df > 1 else 0.0
+        for k in range(3, df - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        central = 2 / math.pi * (theta + math.sin(theta) * math.cos(theta) * total)
+    else:
+        term = total = 1.0
+        for k in range(2, df - 1, 2):
+            term *= cos2 * (k - 1) / k
+            total += term
+        central = math.sin(theta) * total
+    return 0.5 + math.copysign(central / 2, t)
+
+
+def t_quantile(probability, df):
+    """
+    Inverse of t_cdf, found by bisection.
+    """
+    if not 0 < probability < 1:
+        raise ValueError("probability must be between 0 and 1")
+    if probability < 0.5:
+        return -t_quantile(1 - probability, df)
+    low, high = 0.0, 1.0
+    while t_cdf(high, df) < probability:
+        high *= 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if t_cdf(middle, df) < probability:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def reject_outliers(values, threshold=DEFAULT_OUTLIER_THRESHOLD):
+    """
+    Splits values into (kept, outliers) with the modified z-score
+    0.6745 * |x - median| / MAD. Nothing is rejected below MIN_OUTLIER_SAMPLES
+    values or when more than half of the values are equal (MAD of 0).
+    """
+    values = np.asarray(values, dtype=float)
+    if len(values) < MIN_OUTLIER_SAMPLES:
+        return values, values[:0]
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return values, values[:0]
+    outlier = 0.6745 * np.abs(values - median) / mad > threshold
+    return values[~outlier], values[outlier]
+
+
+def confidence_interval(values, confidence=DEFAULT_CONFIDENCE):
+    """
+    Returns (mean, half-width) of the Student's t confidence interval of the mean
+    of values. The half-width is None with fewer than two values.
+    """
+    values = np.asarray(values, dtype=float)
+    mean = float(values.mean())
+    if len(values) < 2:
+        return mean, None
+    std_error = values.std(ddof=1) / math.sqrt(len(values))
+    return mean, float(t_quantile((1 + confidence) / 2, len(values) - 1) * std_error)
+
+
+def summarize_runs(values, failed=0, confidence=DEFAULT_CONFIDENCE, outlier_threshold=DEFAULT_OUTLIER_THRESHOLD):
+    """
+    Summarizes the values measured by the successful runs of one scenario and
+    topology: outliers are rejected, then the mean and its confidence interval
+    are computed over the runs kept. failed is the number of runs that produced
+    no value. relative_half_width is the half-width divided by the mean.
+    """
+    kept, outliers = reject_outliers(values, outlier_threshold)
+    summary = {"runs": len(values) + failed, "failed": failed, "outliers": len(outliers),
+               "kept": len(kept), "mean": None, "half_width": None, "relative_half_width": None}
+    if len(kept):
+        mean, half_width = confidence_interval(kept, confidence)
+        summary["mean"] = mean
+        summary["half_width"] = half_width
+        if half_width is not None and mean != 0:
+            summary["relative_half_width"] = half_width / abs(mean)
+    return summary
+
+
+def welch_t_test(a, b):
+    """
+    Welch's t-test for a difference between the means of a and b. Returns the
+    two-sided p-value, or None with fewer than two values on either side.
+    The degrees of freedom are rounded down, which makes the test conservative.
+    Identical constant samples give 1.0, different constant samples 0.0.
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if len(a) < 2 or len(b) < 2:
+        return None
+    var_a = a.var(ddof=1) / len(a)
+    var_b = b.var(ddof=1) / len(b)
+    if var_a + var_b == 0:
+        return 1.0 if a.mean() == b.mean() else 0.0
+    t = (b.mean() - a.mean()) / math.sqrt(var_a + var_b)
+    df = (var_a + var_b) ** 2 / (var_a ** 2 / (len(a) - 1) + var_b ** 2 / (len(b) - 1))
+    return 2 * (1 - t_cdf(abs(t), max(1, int(df))))
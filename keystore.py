@@ -0,0 +1,668 @@
+import argparse
+import fcntl
+import json
+import math
+import mmap
+import os
+import random
+import time
+
+import kyber
+from topologies import TOPOLOGIES, get_topology
+
+KEYS_DIR = "keys"
+
+RSA_BITS = 32
+RSA_PUBLIC_EXPONENT = 131073
+KYBER_LEVEL = 768
+
+ENC_MODES = {"rsa": 1, "kyber": 2}
+
+
+SMALL_PRIMES = [p for p in range(3, 1000, 2) if all(p % q for q in range(3, int(p ** 0.5) + 1, 2))]
+
+
+def is_probable_prime(n, rng, rounds=32):
+    if n < 2:
+        return False
+    for p in [2] + SMALL_PRIMES:
+        if n % p == 0:
+            return n == p
+    d, r = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+    for _ in range(rounds):
+        x = pow(rng.randrange(2, n - 1), d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(r - 1):
+            x = pow(x, 2, n)
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def random_prime(bits, e, rng):
+    while True:
+        # The two top bits keep the product of two such primes at 2 * bits
+        candidate = rng.getrandbits(bits) | (3 << (bits - 2)) | 1
+        if is_probable_prime(candidate, rng) and math.gcd(candidate - 1, e) == 1:
+            return candidate
+
+
+def rsa_primes(bits=RSA_BITS, e=RSA_PUBLIC_EXPONENT, rng=None):
+    """
+    Returns two distinct primes p, q whose product is a bits-bit RSA modulus
+    for the public exponent e.
+    """
+    rng = rng or random.SystemRandom()
+    while True:
+        p = random_prime(bits // 2, e, rng)
+        q = random_prime(bits - bits // 2, e, rng)
+        if p != q:
+            return p, q
+
+
+def rsa_keygen(bits=RSA_BITS, e=RSA_PUBLIC_EXPONENT, rng=None):
+    """
+    Generates an RSA key pair with a bits-bit modulus.
+    Returns (n, e, d).
+    """
+    p, q = rsa_primes(bits, e, rng)
+    d = pow(e, -1, (p - 1) * (q - 1))
+    return p * q, e, d
+
+
+class KeyStore:
+    """
+    Per-node key pairs of one scheme ("rsa" or "kyber"), stored in keys_dir as a
+    binary file of fixed-size records plus a JSON index {node name: record}.
+    RSA records hold n, e and d as big-endian integers; Kyber records hold the
+    public key followed by the secret key. The binary file is memory-mapped on
+    first use and a node's key is only decoded when it is requested.
+    """
+
+    def __init__(self, scheme, keys_dir=KEYS_DIR, rsa_bits=RSA_BITS, kyber_level=KYBER_LEVEL):
+        if scheme not in ENC_MODES:
+            raise ValueError(f"Unknown scheme: {scheme}")
+        self.scheme = scheme
+        self.keys_dir = keys_dir
+        if scheme == "rsa":
+            self.name = f"rsa{rsa_bits}"
+            self.params = {"bits": rsa_bits, "e": RSA_PUBLIC_EXPONENT}
+            self.record_size = 3 * ((rsa_bits + 7) // 8)
+        else:
+            self.name = f"kyber{kyber_level}"
+            self.params = {"level": kyber_level}
+            self.record_size = kyber.public_key_size(kyber_level) + kyber.secret_key_size(kyber_level)
+
+        self.data_path = os.path.join(keys_dir, f"{self.name}.keys")
+        self.index_path = os.path.join(keys_dir, f"{self.name}.index.json")
+        self.mmap = None
+        self.data_file = None
+        self.reload_index()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, node_name):
+        return node_name in self.index
+
+    def close(self):
+        if self.mmap is not None:
+            self.mmap.close()
+            self.data_file.close()
+            self.mmap = None
+            self.data_file = None
+
+    def record(self, node_name):
+        if self.mmap is None:
+            self.data_file = open(self.data_path, "rb")
+            self.mmap = mmap.mmap(self.data_file.fileno(), 0, access=mmap.ACCESS_READ)
+        start = self.index[node_name] * self.record_size
+        return self.mmap[start:start + self.record_size]
+
+    def get(self, node_name):
+        """
+        Returns (public_key, secret_key) of node_name in the format rpld expects:
+        "n,e" and "n,d" for RSA, uppercase hex for Kyber.
+        Raises KeyError if the node has no key.
+        """
+        record = self.record(node_name)
+        if self.scheme == "rsa":
+            size = self.record_size // 3
+            n, e, d = (int.from_bytes(record[i:i + size], "big") for i in range(0, self.record_size, size))
+            return f"{n},{e}", f"{n},{d}"
+        pk_size = kyber.public_key_size(self.params["level"])
+        return record[:pk_size].hex().upper(), record[pk_size:].hex().upper()
+
+    def encode(self, public_key, secret_key):
+        if self.scheme == "rsa":
+            n, e = (int(x) for x in public_key.split(","))
+            d = int(secret_key.split(",")[1])
+            size = self.record_size // 3
+            return b"".join(x.to_bytes(size, "big") for x in (n, e, d))
+        return bytes.fromhex(public_key) + bytes.fromhex(secret_key)
+
+    def generate_pairs(self, count):
+        if self.scheme == "rsa":
+            keys = [rsa_keygen(self.params["bits"], self.params["e"]) for _ in range(count)]
+            return [(f"{n},{e}", f"{n},{d}") for n, e, d in keys]
+        return [(pk.hex().upper(), sk.hex().upper()) for pk, sk in kyber.keygen_batch(count, self.params["level"])]
+
+    def add(self, pairs):
+        """
+        Appends {node name: (public_key, secret_key)} to the store.
+        Nodes that already have a key are left unchanged.
+        """
+        pairs = {name: pair for name, pair in pairs.items() if name not in self.index}
+        if not pairs:
+            return
+        self.close()
+        os.makedirs(self.keys_dir, exist_ok=True)
+        with open(self.data_path, "ab") as f:
+            next_record = f.tell() // self.record_size
+            for name, (public_key, secret_key) in pairs.items():
+                f.write(self.encode(public_key, secret_key))
+                self.index[name] = next_record
+                next_record += 1
+
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"scheme": self.scheme, "params": self.params, "nodes": self.index}, f)
+        os.replace(tmp_path, self.index_path)
+
+    def reload_index(self):
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)["nodes"]
+        except (OSError, ValueError, KeyError):
+            self.index = {}
+
+    def ensure(self, node_names, legacy_pairs=None):
+        """
+        Generates and stores key pairs, in bulk, for the nodes that do not have one yet.
+        legacy_pairs ({node name: pair}) seed an empty store, so those nodes keep the
+        keys they had before the store existed. A lock file serializes concurrent
+        experiments extending the same store.
+        """
+        if all(name in self.index for name in node_names):
+            return
+        os.makedirs(self.keys_dir, exist_ok=True)
+        with open(os.path.join(self.keys_dir, f"{self.name}.lock"), "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.reload_index()
+            if legacy_pairs and len(self.index) == 0:
+                self.add(legacy_pairs)
+            missing = [name for name in node_names if name not in self.index]
+            if missing:
+                self.add(dict(zip(missing, self.generate_pairs(len(missing)))))
+
+
+def legacy_pairs(scheme):
+    """
+    Returns the key pairs that were hard-coded for sensor1 to sensor4 before the
+    key store existed, as {node name: (public_key, secret_key)}.
+    """
+    keys = get_rsa_keys() if scheme == "rsa" else get_kyber_keys()
+    return {f"sensor{i // 2 + 1}": (keys[i], keys[i + 1]) for i in range(0, len(keys), 2)}
+
+
+def get_node_keys(scheme, node_names, keys_dir=KEYS_DIR):
+    """
+    Returns {node name: (public_key, secret_key)} for node_names, generating the
+    missing keys. An empty store is first seeded with legacy_pairs(scheme), so
+    sensor1 to sensor4 keep the keys they had before the store existed.
+    """
+    store = KeyStore(scheme, keys_dir)
+    store.ensure(node_names, legacy_pairs(scheme))
+    keys = {name: store.get(name) for name in node_names}
+    store.close()
+    return keys
+
+
+def get_rsa_keys():
+    s1_rsa_pk = "2176045891,131073"
+    s1_rsa_sk = "2176045891,1682770865"
+
+    s2_rsa_pk = "1300148893,131073"
+    s2_rsa_sk = "1300148893,580502977"
+
+    s3_rsa_pk = "3307657711,131073"
+    s3_rsa_sk = "3307657711,910832617"
+
+    s4_rsa_pk = "1360080853,131073"
+    s4_rsa_sk = "1360080853,782220861"
+
+    return (s1_rsa_pk, s1_rsa_sk, s2_rsa_pk, s2_rsa_sk,
+            s3_rsa_pk, s3_rsa_sk, s4_rsa_pk, s4_rsa_sk,)
+
+def get_kyber_keys():
+    s1_kyber_pk = ("A3A6197FE1496816A40689A300E3492A6683A1082A79E8AE9D42A17FFA8EF6AC6B785080C0"
+                   "56C3D9536721F41113302B8D4328A188A2A302677D761AB6B67A73708481A2201FE50266D1"
+                   "746678786A4BC080187E0A352B2D693C51543CDE0C013B02134B643ECCF01B40B734FE630C"
+                   "E7E9008708CC0898118DCCC8FD9B648FA6589CE8516B46B909715E2263C731637ED367B75A"
+                   "600456927707B781F5D3B2E23168F3E17BB1C0685664B121098893E5250F1A949B110D69C4"
+                   "4601902B4CD7A3B6A35FC10B78B397C7CC6A1EC77686EE12C6D88693FAB7132DF684D1947E"
+                   "8ED82818C06F3208BD2DDA339D2505B0BC5C10FC3F37450FD26A4B89F659378094E1C5313A"
+                   "7275D3E2AAB804B414B1C297E804577AB3AE024FE17872BB5AA1925873843679C4FB838AC0"
+                   "35E3B3255A0CB7A0A16103A17E97F894C66732EEFC6DCC85CBD60B9642F5A2D2B1706D9872"
+                   "1DA0B7F630373E01C78B35937F9C50AC2484F0840BA0D9AAB4861E00808150A616E783213A"
+                   "7A36A0C858A4A299B855C304988C36E10477CB92DB1AAAE9F766BCB101DD80AB84D7044B59"
+                   "04E6925D6E1616D0F37BB77B0641056D14DA5C2F4A16E0A25492C868BDCA56F0C73888C683"
+                   "719BB8B97A2AF5487866B4AD65DC3C82549D9D7861E1BC518DA3B83333B4E15C69128715A4"
+                   "1944F688C44704B6AE93AD4C32A85EB862CA7832EB852DF9D53FEEB51B99AC73ADDB4DA948"
+                   "09ABD5B7EA295F1E96983CB61CD2B3AFC33CCA6990555B0352D50A957617CA859A1853E372"
+                   "5FD84711595C1FA423EEF04C7AC68A2EF7A9518C29E513A80AAC7641C34A1519297B0339E7"
+                   "2A5F2D502691CA981E368CF77538A12C930B3AC48DAB60B9ECCED1A972891C7CE69ABE7590"
+                   "77BDF18F8EC1B4B1DC8EFBB03001A517F4910F6F0711DD573D65F9537833C7EE7B6CDD849E"
+                   "66B016C0E437172A2AEDEB75D0082856131FE787580EF48282D752F6B45159634E00C017CF"
+                   "C539F8BA8EEC6A4CF5E4164C444C12D92ADC397A7189CD431B5FC0F64A320A648235A2BBF5"
+                   "C192BC12D5B54B34F42E1AE9709DB41637F80B6EF1C15E25A3281B3A19BC62C131B73D20A4"
+                   "536B5DD7E412AC726B644C8E606826DEF7A8A6D29EA3928FA9F7C7B4A28E19645C71A9A0D2"
+                   "D40561CA346EF7BC95077030E84DB47C7C7D4164F64822586731B4397672400C4A3AA5FA32"
+                   "1248086A57F16B66594CCC452EDDB884B533000BF2AD5C6B363DC396B8B3502A15AC514654"
+                   "577301D4859E18647946B07BC5C48533C2604311A08ED4B7F883BBA4C056741BC1A83116C3"
+                   "280D54083585A4054CD9727B9940BD2BCAF7A2CA4552CC347890034C327069C9EEB222DB20"
+                   "4D2EA7C4AF907BA23C62FA1113002574E2507BD5DB9106A130DD138B8827A7489235B2820D"
+                   "83B43F3C746B02D44E78370A1FD717FA1364F3A1912AE79A2DA5540622B686F0A5561C7EDA"
+                   "8739BA53AD38014CAF781261F1AF28F3C5A4DA06019C2969A73E56906A6CE22CFE30BE85EA"
+                   "4B591C1A44863D292445909568F7D3BC192014B0BACE4ECCC888203EFB9570FC4A6B47D7A4"
+                   "F1D30CC770ACA809BB105225C15C0CAD62309E505B73B0825BA85CF5DACFD099AAF8DC47D4"
+                   "A4B97C6CB46CE20DB15E5A2355C45677884F16BD7D69789D0A853D94ADC2659D329CF79519")
+
+    s1_kyber_sk = ("423710DE5B6D3D1046D32520C33045742A2E11682AAF840BCAA43ECF489E2F94BC9BE0512D"
+                   "6433F993A91AFB18B383C655F126EE4954708C7BD9603190F3CA37307E0FF345FB65800CD8"
+                   "BA4B2A2F5704406220A6F0216F0CA98B05089ECA16AC264A303F974431C20BEC6B1E567160"
+                   "3FD7050E6B9839700EF78B6BBA07A9A3B69F36CC52F2D76097F50CC5160562570BEC009B22"
+                   "5039B9DAAD96375089E62CBFB18DB035BB12E08EB7633C5DAAB37725032E426DF9EBC8B2E9"
+                   "3EC5AA45602B5B0C2BA4C6A56CE8093344981DDFE9BF84F175D15031317241069480E5E0B1"
+                   "48F75F2C19503CF125EE660EB069553648502650CF416B5E661471353595D8FCCE99337DC0"
+                   "FCC440D59867EC56A7D70F3D1772179A9FA4603504551CF29CAAF1F11187097B10B7362A62"
+                   "602474BCBCF5C690756DF4F05B226801B025953C9A1E0C004DA017C7AA101946568F2FE05D"
+                   "1A74A828A81FA663435E8C76BAF6CD0F3CB9435481E5416236A3AC4262B431B87A8EC58D67"
+                   "2A12F2C223477833074C08BBB9B1FEC1C40A28AD0F905E529A9C7041311060A80ABB0C3D0A"
+                   "774FC28614D24ED0909635D217B8440CC72B5A5A2B13755A8A85B05F45150E69F398CA796F"
+                   "3919748BA7119CF657307425E4FA88C3583ABBF5C92C5A83A63311B70C25D0E14B498B298C"
+                   "83C2176C44625205E179479D238151CC6C10E0444A211716DA5325679EE37067E75201C378"
+                   "9D5C62937679087E700D91708C845886E58BA5E67A3BEE908E68FA3DD7A56FCE32005DDA59"
+                   "610B7A855212758663680599A93608DB4506E2310AD89798D85377ACE80956EA3D074857B7"
+                   "6060DAFA96043BC609843AF4A6BE570964CB249921FB54232C0E4A090CB66CAC3905CA3699"
+                   "B68227680ED4278BFB9B2996AC075B0B10CC003C512589733B1D6B61B34BAC8C875D20883A"
+                   "D06953EFB09DCA61AC0432205B581246891E0B880E77FC4A56B50D7AD09A70A4548BDB126B"
+                   "996A248484D885C07929C773D96471D703B8E3B158012D06F2B8DC3B3CC5246E396AB9C54B"
+                   "48DC71326D1227C0F7394F961F24B0403952BF7D32B54F6044F1FA50CCF85DA0A6204C49B8"
+                   "9358307F73AF9786AFFF6A39C25407087A49AC87073F595BDA902D81EBC9E886C76C70BB59"
+                   "F279F639B80290C6F5509EA7301EDB632B2227762E7A337B0B9E3E9162CD41426693B0F9C2"
+                   "79CBAAC8ACE2B5B4ECCECC21CD423470D2205B72C3AA95E4290FCA806A7B45031464D17783"
+                   "9A909C2DCA63A308B06AC6A24616A3E7D23B9440B74621900E0A96B7C3A8EDD186BC718354"
+                   "C3709E462D5158106834CD2894B7E6383CDAACBE235193C21A93B5F74ED99222CF9CC95281"
+                   "C7D2B01A75253FBD138FE480AB10F11A098CB4D6FC4FF4FB6A42D6388C20945544A08C074A"
+                   "08A639CF13254268685CD9967F80A51E96BB1CBC9F2206844025345F9907DC1A70C37A9EC8"
+                   "59367CCBA7960045B77A0C8BB8672CF42E9DD5C1A0D868C1053144366E295512DB9A3B60A9"
+                   "31FA6835D777A0D0155CC6EABC42735C9373B2F688280F53BF8DF5628715BFC1F90EFB7544"
+                   "B95771A350CBC32525A5A332C9180E32722756B0B701C410BAB7B3C02B31DE01A109AB925A"
+                   "960C543142A3A6197FE1496816A40689A300E3492A6683A1082A79E8AE9D42A17FFA8EF6AC"
+                   "6B785080C056C3D9536721F41113302B8D4328A188A2A302677D761AB6B67A73708481A220"
+                   "1FE50266D1746678786A4BC080187E0A352B2D693C51543CDE0C013B02134B643ECCF01B40"
+                   "B734FE630CE7E9008708CC0898118DCCC8FD9B648FA6589CE8516B46B909715E2263C73163"
+                   "7ED367B75A600456927707B781F5D3B2E23168F3E17BB1C0685664B121098893E5250F1A94"
+                   "9B110D69C44601902B4CD7A3B6A35FC10B78B397C7CC6A1EC77686EE12C6D88693FAB7132D"
+                   "F684D1947E8ED82818C06F3208BD2DDA339D2505B0BC5C10FC3F37450FD26A4B89F6593780"
+                   "94E1C5313A7275D3E2AAB804B414B1C297E804577AB3AE024FE17872BB5AA1925873843679"
+                   "C4FB838AC035E3B3255A0CB7A0A16103A17E97F894C66732EEFC6DCC85CBD60B9642F5A2D2"
+                   "B1706D98721DA0B7F630373E01C78B35937F9C50AC2484F0840BA0D9AAB4861E00808150A6"
+                   "16E783213A7A36A0C858A4A299B855C304988C36E10477CB92DB1AAAE9F766BCB101DD80AB"
+                   "84D7044B5904E6925D6E1616D0F37BB77B0641056D14DA5C2F4A16E0A25492C868BDCA56F0"
+                   "C73888C683719BB8B97A2AF5487866B4AD65DC3C82549D9D7861E1BC518DA3B83333B4E15C"
+                   "69128715A41944F688C44704B6AE93AD4C32A85EB862CA7832EB852DF9D53FEEB51B99AC73"
+                   "ADDB4DA94809ABD5B7EA295F1E96983CB61CD2B3AFC33CCA6990555B0352D50A957617CA85"
+                   "9A1853E3725FD84711595C1FA423EEF04C7AC68A2EF7A9518C29E513A80AAC7641C34A1519"
+                   "297B0339E72A5F2D502691CA981E368CF77538A12C930B3AC48DAB60B9ECCED1A972891C7C"
+                   "E69ABE759077BDF18F8EC1B4B1DC8EFBB03001A517F4910F6F0711DD573D65F9537833C7EE"
+                   "7B6CDD849E66B016C0E437172A2AEDEB75D0082856131FE787580EF48282D752F6B4515963"
+                   "4E00C017CFC539F8BA8EEC6A4CF5E4164C444C12D92ADC397A7189CD431B5FC0F64A320A64"
+                   "8235A2BBF5C192BC12D5B54B34F42E1AE9709DB41637F80B6EF1C15E25A3281B3A19BC62C1"
+                   "31B73D20A4536B5DD7E412AC726B644C8E606826DEF7A8A6D29EA3928FA9F7C7B4A28E1964"
+                   "5C71A9A0D2D40561CA346EF7BC95077030E84DB47C7C7D4164F64822586731B4397672400C"
+                   "4A3AA5FA321248086A57F16B66594CCC452EDDB884B533000BF2AD5C6B363DC396B8B3502A"
+                   "15AC514654577301D4859E18647946B07BC5C48533C2604311A08ED4B7F883BBA4C056741B"
+                   "C1A83116C3280D54083585A4054CD9727B9940BD2BCAF7A2CA4552CC347890034C327069C9"
+                   "EEB222DB204D2EA7C4AF907BA23C62FA1113002574E2507BD5DB9106A130DD138B8827A748"
+                   "9235B2820D83B43F3C746B02D44E78370A1FD717FA1364F3A1912AE79A2DA5540622B686F0"
+                   "A5561C7EDA8739BA53AD38014CAF781261F1AF28F3C5A4DA06019C2969A73E56906A6CE22C"
+                   "FE30BE85EA4B591C1A44863D292445909568F7D3BC192014B0BACE4ECCC888203EFB9570FC"
+                   "4A6B47D7A4F1D30CC770ACA809BB105225C15C0CAD62309E505B73B0825BA85CF5DACFD099"
+                   "AAF8DC47D4A4B97C6CB46CE20DB15E5A2355C45677884F16BD7D69789D0A853D94ADC2659D"
+                   "329CF795197A49DEA26F62961DEF8A3FCFC679A40BFAA5603E601B848F62C03A1DA67C8202"
+                   "EA58BFB97444D278E61D54AC063A0D5FB52DF9600AECA72579F5F529FCB8B792")
+
+    s2_kyber_pk = ("BD8B3DE5D002A2B23E86162E021429378438BCA51DD9D11603D30C137A05F610981037C00F"
+                   "757D81C96C25B888B6AB761876646EC901FC36C8AA085157038864E3C308370167F31EA09C"
+                   "86F47101C611A08E389B1EF06A91E037F97437F9793581545E16F1CA46C91BE5A130291060"
+                   "92724D64D1A920C83937D5576EF8560A3066218434B90B463B18A6E483183C993E279A6A9A"
+                   "891AE798227EC9051476895F5CB44097A6C7C65078108B55D77041B1376BAB2E50AA661574"
+                   "4D6126C478D73AE337BE8A3C6B4C694E954B0BD4A6C45BA185C0DABB775C91707A39603581"
+                   "A841CE812134CC605F4411AA0EF8A007904C7EB53FB106C871A729D5B845DC322F9EF818E6"
+                   "A1C8F89B370DDA98EFD69AF9DC6E63869FD9E37415968999668380C312EB4187FB37625839"
+                   "99FD0798AEC24BD252BAA0A3C4BA5BBA048B7E2D01160A1074A120316403155438A14EC1B6"
+                   "3720943A0A5842764E622722B58C80C6644768FC4B9B9C43AAB082E752CE952B049C65A79B"
+                   "1357DEEBAB10910E9DCC57D92BA71195029455AE7B0A3F5DC17BA008A565E35D60BAC3ED22"
+                   "B6D347B6421C36A947013A4C6406EC5EA4D490B1EBC846D281496432A6F380E660CDF188B2"
+                   "1E1C5E8BA0A634913DEB477B8D6B8C1C734803C603C46C7C435670FC3324F70340C652C1D5"
+                   "4A478374539DBB9288736A6EB5A6B5278382F766F13B9AAC38A2DEEB1CCEF4C62F51643D58"
+                   "075D61294EB447690052C3B4ABB9EC46463A35C1140A5FD00B0F457ED2E2B7491B9EDDAA65"
+                   "4E7726CCC2ADDA6C938E5CC76AAC02947838238229153B774FA768C8CCA63E268AE44A80C2"
+                   "B7A67454C32F54A13D824C71B0AEDEF7985685AF1FE0219A202F6D2C5F8DD75A1D4648F1A5"
+                   "29FC4BC73D4AC5BC072169607FD4122849F8C0AA138BE3503DAD15B4B689011B7221E2A825"
+                   "6C15A269C624BF356032D32FA1852D3D18AACCEA3649736E56A35A6299B794B7B25A6C00D5"
+                   "BB804D5C7BB9E9C3AAE6BBB1735528D27A9571C882F5164699A681FA56B733BEF8A3B47406"
+                   "2E5ABAC2E498481310949E8A4C68D012426A04CBD2C58D63A7DE378754EC7FF72A26ABF308"
+                   "4C270D9E36CACD53552C14BF51D91D137AAB72619F51D6B69C064B9F592036B3C3C852630A"
+                   "DC7E986664A7CA9128100CA77576FBA4787B08BC21D43370D5C5B4B17D8CB086C31A65E5A9"
+                   "20C1B8CC7D89230631035A36430CF34CAEC132E3A22454E99113BA272DC90BF6537C39242A"
+                   "3BD4A2B3E626038A2BCBDCBF76FAC43A5B50599647AB3C36112CAF2979B1EEB05558210142"
+                   "00C6A13C62F3E48861225AB91B4B589BA47A3AB1710209D9A4B8ED93666E58305412A07B41"
+                   "6C0C872151EA8FFCA815E5D41EDA708018734F7D004C7BCC70A469BD90556EC808119188C4"
+                   "2A84824EF23DBDFB35BB6441671C9BCB699F9DFC887E69842F2883EB009C0129621BF0AA68"
+                   "BCCF9597366B1C90B7152E4D4C8AE41739A819033FC6A127E8B02C923C4DE13951915F7201"
+                   "951383BFC30629A930872AC2C23A1BB4DC2106F5C82EA8C9B081868CB38028BF0BCF67704D"
+                   "F460AEA893701311B811D9CF89A27B0CB8734FC423A92A6AFE815044BB5AB98C91A83302F9"
+                   "8C8EB3639A54D65BB9FB536CD3461F9054969BC3E523C3269B724314A49D361C442247EF74")
+
+    s2_kyber_sk =("65026ABCB00382CC842AC7BD94B83F9CFA5D5613A82D171F33C1A3774528767B74BD0754821"
+                  "4182AFCC4D0C1489B7C97AA54AA276C4224584DB4B9C20B3938A6A301296922D2C2AE87D943"
+                  "B83BB61B339D91995A8C65B34965361E52AE397560136261A820BB630392ED581F231AAD501"
+                  "CCBD368840880631A5A88B0649B08B12FD1EBAC01164791F70236ECB025D4AE09EC05E6E843"
+                  "80A17E74268B0B7805BF4649601320FC1B4FC03B4EA24C32C85112B5C331172962CD5A24927"
+                  "B179B0CC010BCA50EB17DC7B396E379BE60D9A9A48C0BAA7B24BD84402505ABF0423318CC5F"
+                  "0AC7A46603948D643EA5F6274EA0CC643BAADBF00BB3B36AC3D07CA01B1B42C80F172298B79"
+                  "3624AEA3C2BCB7E2664CB560C3BC78182D73775C884214D5025115555935A0599306184B1B7"
+                  "9E8353E7C6CADA0490F4385839945F4FB4161CA1B1CEE169D5256E6178B1E2E192608028770"
+                  "7BBFBC72508343D3AA3AD58E75D1354A5A2ECCA5807C5AABAAEA30448EB7231AE922F621B50"
+                  "65B8A7D18C6391F677E3283C8A0C98F858C55B626986251642D89FAF8181F70898D4818A490"
+                  "27A5C14CFAD284FB1611F016B42AA4A73B7290CA0C88D7656184DE85B55C019DC85565B5117"
+                  "19983FCA5930658006C6E6A530B982FED9AB5AA2933036B0F6937A75E7921F6B19E5113933C"
+                  "B6CFAB3076FB643E0D2252B68B6A058B401523990F79CEFEACD137C0B51E56F675AB75FB639"
+                  "7C55A81D726BCBC58AE3AA65FCC440439A7D684BC78A0C04AFB172E0D89EFC6478396B7D74B"
+                  "A3494759D5449A973483FBC83ADEA3CC7195C14607A3A4E109208CA4F8D4A0BC8D8575F9AB2"
+                  "E1EB07762B00D2BC1032836D63A5755C3A76F45010F02861157C57DEE24A9C77B44E55A97CA"
+                  "1498207A6D1544438E17902D01F6371C5AFA59E2D424819377032968DAE652B5082C95C4416"
+                  "62092269947A5B290857873459B3628FE9AADBF37AC2524321356673D20D976C54C015776E9"
+                  "6A386B22F0F0CBEB927B8C805AB464122D64B580A94BD26031CC84739FC2A8B2F79C93A83AF"
+                  "C24B2F5B6731426106116918E8B89F08E19A3B27940129117E351B94C41D1048C59B818FBE1"
+                  "370C7E21DEEA81633F28DB9B96B4D5608CF5298DF7A99C87768D8D67ABC40C7565ABB1C903C"
+                  "54BC10E443C741139B4715126FF9890E86911AA40B621235BFC1C430D861707920EB5312B96"
+                  "572D7E07FD4C02108258E1F071ECDB63E10280F867449FEF4369C143DA51345E699681C557E"
+                  "5727526C3503E1F3C57E7321C38811C7764B15A349FF2A21B982B0DA0089659B9883114D324"
+                  "C608829CA27722114B31B7C708053269021BC14A9350894C23B6EC22709E9B0834401CE34B1"
+                  "3FF1C7D7471827A5B4CD24CD57359CE6DBA1B580A061BC46FEC7B553EC5ED51ACA05BC8C02F"
+                  "94959DB31ECD2C46FD3BE80849B9FC622BD6CC6C1533DACC78295CC69C3557E4EB278D24583"
+                  "34E0B0E9F313BEB0CD964707A51C985D9571E65797B5190FDC4335ABC794C8BA5340513B372"
+                  "56E9F495317446605306E9A2469B4B354030228B19461655B55D12210573C6F79A525D3B666"
+                  "6E319C44D87D0FA49D4E617161A917702B157E848EDD65681F38CDBD8B3DE5D002A2B23E861"
+                  "62E021429378438BCA51DD9D11603D30C137A05F610981037C00F757D81C96C25B888B6AB76"
+                  "1876646EC901FC36C8AA085157038864E3C308370167F31EA09C86F47101C611A08E389B1EF"
+                  "06A91E037F97437F9793581545E16F1CA46C91BE5A13029106092724D64D1A920C83937D557"
+                  "6EF8560A3066218434B90B463B18A6E483183C993E279A6A9A891AE798227EC9051476895F5"
+                  "CB44097A6C7C65078108B55D77041B1376BAB2E50AA6615744D6126C478D73AE337BE8A3C6B"
+                  "4C694E954B0BD4A6C45BA185C0DABB775C91707A39603581A841CE812134CC605F4411AA0EF"
+                  "8A007904C7EB53FB106C871A729D5B845DC322F9EF818E6A1C8F89B370DDA98EFD69AF9DC6E"
+                  "63869FD9E37415968999668380C312EB4187FB3762583999FD0798AEC24BD252BAA0A3C4BA5"
+                  "BBA048B7E2D01160A1074A120316403155438A14EC1B63720943A0A5842764E622722B58C80"
+                  "C6644768FC4B9B9C43AAB082E752CE952B049C65A79B1357DEEBAB10910E9DCC57D92BA7119"
+                  "5029455AE7B0A3F5DC17BA008A565E35D60BAC3ED22B6D347B6421C36A947013A4C6406EC5E"
+                  "A4D490B1EBC846D281496432A6F380E660CDF188B21E1C5E8BA0A634913DEB477B8D6B8C1C7"
+                  "34803C603C46C7C435670FC3324F70340C652C1D54A478374539DBB9288736A6EB5A6B52783"
+                  "82F766F13B9AAC38A2DEEB1CCEF4C62F51643D58075D61294EB447690052C3B4ABB9EC46463"
+                  "A35C1140A5FD00B0F457ED2E2B7491B9EDDAA654E7726CCC2ADDA6C938E5CC76AAC02947838"
+                  "238229153B774FA768C8CCA63E268AE44A80C2B7A67454C32F54A13D824C71B0AEDEF798568"
+                  "5AF1FE0219A202F6D2C5F8DD75A1D4648F1A529FC4BC73D4AC5BC072169607FD4122849F8C0"
+                  "AA138BE3503DAD15B4B689011B7221E2A8256C15A269C624BF356032D32FA1852D3D18AACCE"
+                  "A3649736E56A35A6299B794B7B25A6C00D5BB804D5C7BB9E9C3AAE6BBB1735528D27A9571C8"
+                  "82F5164699A681FA56B733BEF8A3B474062E5ABAC2E498481310949E8A4C68D012426A04CBD"
+                  "2C58D63A7DE378754EC7FF72A26ABF3084C270D9E36CACD53552C14BF51D91D137AAB72619F"
+                  "51D6B69C064B9F592036B3C3C852630ADC7E986664A7CA9128100CA77576FBA4787B08BC21D"
+                  "43370D5C5B4B17D8CB086C31A65E5A920C1B8CC7D89230631035A36430CF34CAEC132E3A224"
+                  "54E99113BA272DC90BF6537C39242A3BD4A2B3E626038A2BCBDCBF76FAC43A5B50599647AB3"
+                  "C36112CAF2979B1EEB0555821014200C6A13C62F3E48861225AB91B4B589BA47A3AB1710209"
+                  "D9A4B8ED93666E58305412A07B416C0C872151EA8FFCA815E5D41EDA708018734F7D004C7BC"
+                  "C70A469BD90556EC808119188C42A84824EF23DBDFB35BB6441671C9BCB699F9DFC887E6984"
+                  "2F2883EB009C0129621BF0AA68BCCF9597366B1C90B7152E4D4C8AE41739A819033FC6A127E"
+                  "8B02C923C4DE13951915F7201951383BFC30629A930872AC2C23A1BB4DC2106F5C82EA8C9B0"
+                  "81868CB38028BF0BCF67704DF460AEA893701311B811D9CF89A27B0CB8734FC423A92A6AFE8"
+                  "15044BB5AB98C91A83302F98C8EB3639A54D65BB9FB536CD3461F9054969BC3E523C3269B72"
+                  "4314A49D361C442247EF74F9B0AA3D5F576777FCAEED8105888AAF71E1BA3E907123F4B6F79"
+                  "D6A5F14B6BE6A11128FFBA14D8EEC7456B53B084FFBEE1BAB193F116035553D3B29FE4486F3")
+
+    s3_kyber_pk = ("F60B6D19C76AFCFA503FAA3E1F63C976D772C14085A7D11258504A4053A3208766AAA34720"
+                   "B8CBE2130C6D7B6C6EF72A105119F8458232306E00E2CD6954397ED2C7E634B0155C70A28C"
+                   "6624E8AC0A79B4696AA1A5475AE1E016DA2ACBBFD3C8E6033A86F5C4880BB928A8CF658932"
+                   "21809439A6811D1468FC3239076593020B2A36431B3242B4F08214ECEB74227A4543307A1E"
+                   "D3842A0A3956B491D0E2B29E872DE1E1278A474F039C59FF06182C85337CFB57EBB38C82B1"
+                   "C232B219134444671451014007AB836DAE7902485B0DE66788FDE32833B977B8DB67E1A043"
+                   "C5A39F978394605400BDBAA90D395E18A32D38BBBFCB408DD08AA16151046AB4C2CA10A95A"
+                   "9167F289B36D75742A290D9DDA6751E0062A568A7977571FF59F40BA695F76980CB93CD8C2"
+                   "872B12899AE361BE75866151222A26CA981A63C768BC14B590892754C8871B33346BE7C851"
+                   "19AA4AF57AC497E4CC0337B6667A4503B6206B9591AB98CC3970608C8131DFF09DE999384E"
+                   "F5C90515B5339000C405B044D233752076329A28DA40981CC069F1B4C70A611F4A523A26E6"
+                   "9C9A35683809C61786A8FB4907ECC73746B09FF8242E2CF32664041543CA86F067AAE133C9"
+                   "0AC30C37B2B392BAA759568D3B43C9E811632DCC2864E6A1CE6BB5FF07C43051AAE0F61CFA"
+                   "B4428580C3CFD643DDA05226114F21C0B2ADC02C2E6C4183A681D3A606020178FE1A6E2217"
+                   "585F3A20A598557F38CB22BB65811C1331C028DD9A5CD7C22C5B3B9E0B2258B9504074240D"
+                   "E9040869ACB639E976B1F1961C65C93C76BE65D80C5635683647A179C882556049ACE4B414"
+                   "E2A8B5B1888B6835CEE62051451ABA0AA58D27C1467A0B86C00D0C146052EAC322173A1978"
+                   "67E919360FC5526E730383273602D58E9BACCFDBA8ADA7CAA153F43DF09762B777B74823A0"
+                   "B8601F2792B1940242FA09C91F1689E4309874FABBD31ABB0D36B73056A7076C552611CE40"
+                   "A00E042C5578F8B5613530DD3211794B08514BAB97E0A937F100A7A83C06FCC95C2786D8D0"
+                   "BF5C0C89F26A8DCCE743BECC7C4AC59AA19580E3480642F33CC5F9C19B053DF9A94D75379F"
+                   "A4BC1326F895ABBC07481B9FB84C2FB3B7BE88E41E63AA62589A4948A20C1D29CE02672AB9"
+                   "C148470A8009CB3049146B92410FDA245C258C7DFF48835649A259E79EED64BCA05BA15901"
+                   "7619C51788E23959668D4DC9B92A833E7E96626C1353904BB76A66283338022A8846DA7393"
+                   "9E482F9871096AC7CAA1C835990A96D4E63F6EB8158B1B483D0035E400597B2462B7F1AAE9"
+                   "1200080A3839B338DF0B3EB8B94DE6D5AE792C47A39CC76B76AFA182C6BD665A186111B94B"
+                   "C6892347DE896F4CD6B3C84B502975CCA7A583CE09AC4040289A258C41F106F467A81AE9CF"
+                   "D48844CD1C8684CC75FC8183E8578524543E025371718C2A74B75958212179A22817DAB4CC"
+                   "287497435DEC3A2765665B4B36561C358D02E1289A4397DAE7600BC7BC4CA17D7F02607A3A"
+                   "95DF53792D32977259092EB3909DD28989E6C658544D3C541954414E197B01BC5BBCE6F586"
+                   "72130B54753EE5CC9EDA088D810ABBA6E16974348533A470B5E174C9AA55CBE5B788021B8B"
+                   "93B64B7320DAFDE751044EBC19DA2465B7130ECB02B53B4693626EB86329045CE2582B426C")
+
+    s3_kyber_sk=("1B7BA7E499ABD5CC9BFCDB98448989D982B15371C3CE3AC225E3836956A7A19889A355945C22"
+                 "5713366E204B1286D16A695799342A245D240C5D9B3E5F1969319B998F83B8C8A8917895B351"
+                 "880558416B26271B21026581C0C65E3B5A1EC1A967125F5E4C6F06D6B93F5A8B0DC033F4322B"
+                 "3C007302F90DFC696B0CA41066DB7FFFDBB7561764BFABB31819176A31B957B037891B3681B9"
+                 "22D7999746C7A4029B40E5F33C9B2263A87B09345499D2001FFCFC1725E99119803C4B909649"
+                 "A58F2449312B332618433BE031A16AB784783B7D858C69C7063B445A1C04231FB1C359F1D97B"
+                 "DF7C96B72A16D4D81A7A579D6BEA0DC464199AAAB75D36C863225F1237B11C332C7AE357F590"
+                 "8567610F3D94229D61558285443D9905069740C18247F1B9C979A1BAE79487890AAA073550F1"
+                 "235A69F043632C4C7B4319043BC7A2B44FDC4713CFFB69F0DAB8AD43704CD3A8D899832583A3"
+                 "95F06E9C99C1143A4866B9867374B9E864054CC68760A94EEC492C92C1B1B766B7245A8DD547"
+                 "9700A4B2005A50A5E666B218026FC4C833786D9EFC2FCA030A9A1B545520302E03304CE0327F"
+                 "49A2DEB73448540BBD4A17A9C33D56E1387044A22AA166291AA8DCF84E8D4AA725538B2FE659"
+                 "9963723F717494644952C52DF962B6591A9807248ED69A99FE87ADC5D72C1EB468B5F69B1B99"
+                 "C1D04C712D235CE4155ECD43BBAE6890DC54335B4987BBBC1A7DA4BA5F7831BA086584A47AE5"
+                 "E779365BBDD083B0C9B4A4ECC639AD840E21D58D74416A091C6C99C41D2F1B3E0C2CAE0BF374"
+                 "7DEC190A17973A80A20D3752DB181911F0C76EA90DC338A4236A20DA52381FA92394623C3FF4"
+                 "358973A46245616349AFAC063D05B23BB93BA983F9753540363454289DBB09B340033855930A"
+                 "2A29F4E60E2CF14351926739897AC1E71B31D3AE30EB0F620C6DB2A5931D923370C91E4C1656"
+                 "FC6236B5778C0820432CD5A80EB65762A988690C860E518515482EA32680A05096C68AA46205"
+                 "21133A90A0E81ED58983FD6A1F58E266CFF23B34AC54D4D814D630764C913432D0340FD4AD21"
+                 "B2CDD64A95A17A2B95E4B3628C486E31B0E12499683799C3817D7083BBB326CA8763A1E1E021"
+                 "A3EC53A55842B7A60A60C8572A8553C4D3C1E2C90643525D5770AD42BA6FB6C34D9C19881E11"
+                 "4DE743994C29B035DA41293A007EF4CE2C40674CE1BA4CB2001A23094DA68338D325570BAF37"
+                 "92413C3A7A0C6171C7224EAD79770CFBAAEA0A0E0D2433EE5B52AE58C23E112055665D8649CC"
+                 "E23B9B53A16FA1347F63C24C06BC9DA62BC976943E85948B57AC0882299140B340EEB54C66E4"
+                 "7CA15541547997D094463DE324B1C19A7369AECB8240FD048C8C173666A07A6026732AD4652E"
+                 "359A01740A1D182D32EC689BD14233ABB4E0D4290E97B7CED7A372D8762AE0566C81AD220A9E"
+                 "5365CCF8FCB918CB20373ABAD1C74C7BD9328EF569D4FAAA65082B5D036E283459FFCB8F3573"
+                 "6B23522EEF5A86C7F8A13A7368AB4A0FFDE748B3B1830A98791371B2058C92F60A683071A538"
+                 "B2063AF59776455C2CA48B35C1C8694711F8F5949C42072D9B8B7D6642AD70B3710A21CD5654"
+                 "A1B09FE37546F3E04C7A9341F60B6D19C76AFCFA503FAA3E1F63C976D772C14085A7D1125850"
+                 "4A4053A3208766AAA34720B8CBE2130C6D7B6C6EF72A105119F8458232306E00E2CD6954397E"
+                 "D2C7E634B0155C70A28C6624E8AC0A79B4696AA1A5475AE1E016DA2ACBBFD3C8E6033A86F5C4"
+                 "880BB928A8CF65893221809439A6811D1468FC3239076593020B2A36431B3242B4F08214ECEB"
+                 "74227A4543307A1ED3842A0A3956B491D0E2B29E872DE1E1278A474F039C59FF06182C85337C"
+                 "FB57EBB38C82B1C232B219134444671451014007AB836DAE7902485B0DE66788FDE32833B977"
+                 "B8DB67E1A043C5A39F978394605400BDBAA90D395E18A32D38BBBFCB408DD08AA16151046AB4"
+                 "C2CA10A95A9167F289B36D75742A290D9DDA6751E0062A568A7977571FF59F40BA695F76980C"
+                 "B93CD8C2872B12899AE361BE75866151222A26CA981A63C768BC14B590892754C8871B33346B"
+                 "E7C85119AA4AF57AC497E4CC0337B6667A4503B6206B9591AB98CC3970608C8131DFF09DE999"
+                 "384EF5C90515B5339000C405B044D233752076329A28DA40981CC069F1B4C70A611F4A523A26"
+                 "E69C9A35683809C61786A8FB4907ECC73746B09FF8242E2CF32664041543CA86F067AAE133C9"
+                 "0AC30C37B2B392BAA759568D3B43C9E811632DCC2864E6A1CE6BB5FF07C43051AAE0F61CFAB4"
+                 "428580C3CFD643DDA05226114F21C0B2ADC02C2E6C4183A681D3A606020178FE1A6E2217585F"
+                 "3A20A598557F38CB22BB65811C1331C028DD9A5CD7C22C5B3B9E0B2258B9504074240DE90408"
+                 "69ACB639E976B1F1961C65C93C76BE65D80C5635683647A179C882556049ACE4B414E2A8B5B1"
+                 "888B6835CEE62051451ABA0AA58D27C1467A0B86C00D0C146052EAC322173A197867E919360F"
+                 "C5526E730383273602D58E9BACCFDBA8ADA7CAA153F43DF09762B777B74823A0B8601F2792B1"
+                 "940242FA09C91F1689E4309874FABBD31ABB0D36B73056A7076C552611CE40A00E042C5578F8"
+                 "B5613530DD3211794B08514BAB97E0A937F100A7A83C06FCC95C2786D8D0BF5C0C89F26A8DCC"
+                 "E743BECC7C4AC59AA19580E3480642F33CC5F9C19B053DF9A94D75379FA4BC1326F895ABBC07"
+                 "481B9FB84C2FB3B7BE88E41E63AA62589A4948A20C1D29CE02672AB9C148470A8009CB304914"
+                 "6B92410FDA245C258C7DFF48835649A259E79EED64BCA05BA159017619C51788E23959668D4D"
+                 "C9B92A833E7E96626C1353904BB76A66283338022A8846DA73939E482F9871096AC7CAA1C835"
+                 "990A96D4E63F6EB8158B1B483D0035E400597B2462B7F1AAE91200080A3839B338DF0B3EB8B9"
+                 "4DE6D5AE792C47A39CC76B76AFA182C6BD665A186111B94BC6892347DE896F4CD6B3C84B5029"
+                 "75CCA7A583CE09AC4040289A258C41F106F467A81AE9CFD48844CD1C8684CC75FC8183E85785"
+                 "24543E025371718C2A74B75958212179A22817DAB4CC287497435DEC3A2765665B4B36561C35"
+                 "8D02E1289A4397DAE7600BC7BC4CA17D7F02607A3A95DF53792D32977259092EB3909DD28989"
+                 "E6C658544D3C541954414E197B01BC5BBCE6F58672130B54753EE5CC9EDA088D810ABBA6E169"
+                 "74348533A470B5E174C9AA55CBE5B788021B8B93B64B7320DAFDE751044EBC19DA2465B7130E"
+                 "CB02B53B4693626EB86329045CE2582B426CE3F1673060F86C83534442CF6F5B6DB3C098BBA4"
+                 "CE5B4BB7181AAC05C6B8B55984CDF663B6925FB3B8B393A441238995815BDE14C9D8F354F01C"
+                 "9D463FB32163")
+
+    s4_kyber_pk=("F44C077AE20BFB51466D427A003519448170B3EB88F712A154787ACFC118596883BCD92A56F3"
+                 "3778C349061A009F13AE2591B384AA17C0F30733E3A63E09AE7FF0B7BC0035AAB861F43C4AB3"
+                 "4BC3650162B7591A5FC3852AF84103E5B3FFE307F34C600A9B1073D6772307A3431C446DB95E"
+                 "DC41C8AF2BA6D5874D67D9A2DA003994042FF3075A08D104F1EB5276298C803696A6524CF9F3"
+                 "48E8D136E27B7E824325380A4A3A425DDD43C0F37161AEAAC6AB2B1E4555775158270B529E7A"
+                 "F230A62A8290A7A03305109D989D3A83250CF058697C3BF1914602873C240B8AE1510032424B"
+                 "D767B8C863629DD83C218253D6D547EF821025F10F4958ACF829C54FE522BC04CF962A448FEB"
+                 "70DBC5ACB46369A159671E60086012932EA4B8EED67CC3C23A769A8204217DC460803188749B"
+                 "A69C7A396C6A941CF6344575F5CDAA74823C64062A3402179230930A87DAB1150AE051DE2809"
+                 "33B17336F73BD18661DEDBA33D3910C6863A819A1813647476250993B2123C2A3D59446E0F4B"
+                 "5AF8719C10844D872493B3579345710AAB6292825B784A8C58AF7C7A449B2C2F546B10262843"
+                 "222BE4E39A34306C45A138BA9B67C774719E5A370760CD0683202161C7A3B0B073D8550D4B03"
+                 "5D6B9086B9C734B95879204CA2548CC317A3530A157F278A1C686E7BCA9903BAA2E47492451C"
+                 "49AFB406A48709D139BB14A7BD7060667DA0A31A6CAD85DA08B217B65197BCE27B3471F025A9"
+                 "65781C747EE5265864B20D4C5B515E75A9EDFCC41A432019B6A63329602F463EEE8577666B18"
+                 "C3835E35C527098BA3D1C8B6D081409A159DA3BB93EA631076F1B65492CD8D624CF623343AB3"
+                 "17A4126BD722605A593337FC4BAE8B56F8647923D5465737BA8BFAA93BF2708F2CB8E3967747"
+                 "76590F381E50B48B3BC23A69231E7ACB06B4770A37350DCBB90E821578D8591D7BFB7716FA51"
+                 "FFB71E9B8845E9BBAD2A73AD0287B12676B64B560C9FA658EC919B5763B667060309EA441A4B"
+                 "2E79240B9AF7A4FFF77651032EF47499A132589DBCB185970F7502368D39734B7848FE35A356"
+                 "900DC81C4F5564A804F31359D696981084177A4696FCB8B398BA22767DD808CDC5622FF004AE"
+                 "860B6B9DB2483B693043F77DA8141A6C08CC24124E02F09547C00AD241698E8952C3A67FCB44"
+                 "62996531B2D1380E4099F82AB783F396456CA5978259B2B7015D833C2DE22C02365043B4CDC7"
+                 "C3C61BD734E7C5155A2748BFFB7718D048D849AE4603618845272115795524A7AEB6C230E23A"
+                 "4A9C1ACB91360189263B4448BA8B6451D1B485A7C3FA068E087110BD559521DC87BD6B17D743"
+                 "071DE863D1E84019C25A9BD7C35FA56B9E2C204704CBB020465DD62511B35B312AC2FD9B7E5C"
+                 "A4338F3BC2BBC27CA9CCB64A88A215282D3B4620413CB86FCAC224B455286CBA0C953C8A5079"
+                 "0183859EE149FEE70633516638C778357368C238361F120D84C9378CF0722A24BBAB0B1B9A9B"
+                 "6E75391D701828167B01C0896AA02074772875F2745D8564814A769870DA9208354CD8F14560"
+                 "D2B0B667067CD7BA22614329AC9A03E51C5FD07D5FF0BEB2E49725514043517650E719E6DCB6"
+                 "D74318ADC93F6CD91BC5615E47BC15C5C2DACF99A9123B9E317C748B71B788DC46A264D3A867"
+                 "5335E7E0BE68")
+
+    s4_kyber_sk=("BE6A3B5713A6FC9CCC501B200EE4566F670C86A9105D21B959F997B1D74A7E2535C5DB79C4D7"
+                 "32D08080BDEA9C3BD89872FC7F4B9077169588D759AEBEB344FEE8BA0A0589E751AACAF19743"
+                 "4603570BA6C42727012B62968319E68082E2253F9FFA403831462E22404A1A4CC006C40210A8"
+                 "4DEA9F5AD78F517463D3DA7CC5789597A7618217A47A560189901F045892D9C40460343AD4A4"
+                 "2C5C0A9579F6ACF791483D3679900214363656B3E291CBF4905B67794D16959DC812BAF6AE8E"
+                 "8AAF39EA347B8A3C09930B205848A0B154287B75BF183850E5369A511BF5B337F8158A7B8745"
+                 "47E84D1B819BCC323DA85A7AF338C954138DEB0947029048D2AB7814A6646772B8D9FC693DA1"
+                 "42E68604171C72C39745C89051930C16366A6C9D889278120FFCF961346454F4A4C62FC1BD2D"
+                 "955DCE735C9F06290280731D306955485B263C7648B643E9B7127C5BC7629A36F4A16D3663B8"
+                 "3ED6A703B702063A560CA0389EB7462B5AB287D90DCFB59697B72E6E968FA0A9C2797510D6F3"
+                 "0C714ABFD5333A8FB37739D43A72F9650DA5A8683BC2A472AB31312100B64D20C71E2F9925D6"
+                 "C478F400170DC6AD9CD3B423F1241345252C09508D6B2E0F2A167F9368FCB44B381B72E61243"
+                 "FC025F31543F4D592D6A898C35B81FFE9B65180022A69C124097264C041419A43111216EC622"
+                 "2963FA41451CC75F481188994C7A690A55A080A2A79AFFB38124B17194EC6D30414B3C043BCC"
+                 "474A5CD01E694136F8AAB3F9E7A7861045902847D0F77A9F910E4F7071B9C37512917781427F"
+                 "FC6B8C7A199366E10BC5C767AA3060D803C7D1703CBFD711D51995A062A7928A79B58967B71B"
+                 "4D448A01AB7B9945FA1F540C84C6077AAA4811A8021FE0978B8F8856BE0B14C17B2EF33178DD"
+                 "E42D5C28B1F4D55953F7718F250786F409B9E79CA6A29D1CA5B57278C5CDB88FCDA042989317"
+                 "CDE30380B7BC585C4BB5C77DF7E2438EAB9C8FE0C2D035AB91A82367259CE18079F7A442F430"
+                 "0F3B32B53D53CAB717358DF0005730C806A05AEF116DE46BA68D5C63E96CB4D42A7163015092"
+                 "946FDB081791F84AE697568ADB332217A7C7C9B25E11BBF677A0155BBE35193D73B050F99476"
+                 "52DB0381E115357B6890591024C54884F09CB2E6529DE6C56F87BA5A395B48E86D03E05DC06A"
+                 "6587000EB765A28A71234E371BDC495B2C1CC38C214A54B4534C5A1FD65469E4C1A8DFDAC520"
+                 "C0AB6649BB1111CFF17BC6A44C8E3E1125EB3145F75B49C8D696342ACFF5014DFDC94DE9FA92"
+                 "BE390CF54CB2D9EBAB97D82BD0D1989442550752544D7224A5F1B70ADAC9E5D3001A20BF325A"
+                 "C6DEA89801DC04BBA94BB0314CDE487422B052C6C9A01D71228194C51A003D9F115889C77516"
+                 "F73256DA4452D1A619B1698E36374B4B38D112C4BB0BCFC440A3E2A94FCF0636AC9AC8590004"
+                 "D3F28ED25864B5C31DE732A386074352819AF00539894A3C8FE43A79D7203AF81EBDD1168A3A"
+                 "14C818608008B6E45864A0E16BFB4A356CA649167536CC569578A01FB6AB443FC74A71769B8F"
+                 "C7A3C46495CC417DD24A0EFB6286CB3CBDDCE070708939DFB9CD20D10D76D90D8956614A567B"
+                 "AF076A71C06080F06218E99AF44C077AE20BFB51466D427A003519448170B3EB88F712A15478"
+                 "7ACFC118596883BCD92A56F33778C349061A009F13AE2591B384AA17C0F30733E3A63E09AE7F"
+                 "F0B7BC0035AAB861F43C4AB34BC3650162B7591A5FC3852AF84103E5B3FFE307F34C600A9B10"
+                 "73D6772307A3431C446DB95EDC41C8AF2BA6D5874D67D9A2DA003994042FF3075A08D104F1EB"
+                 "5276298C803696A6524CF9F348E8D136E27B7E824325380A4A3A425DDD43C0F37161AEAAC6AB"
+                 "2B1E4555775158270B529E7AF230A62A8290A7A03305109D989D3A83250CF058697C3BF19146"
+                 "02873C240B8AE1510032424BD767B8C863629DD83C218253D6D547EF821025F10F4958ACF829"
+                 "C54FE522BC04CF962A448FEB70DBC5ACB46369A159671E60086012932EA4B8EED67CC3C23A76"
+                 "9A8204217DC460803188749BA69C7A396C6A941CF6344575F5CDAA74823C64062A3402179230"
+                 "930A87DAB1150AE051DE280933B17336F73BD18661DEDBA33D3910C6863A819A181364747625"
+                 "0993B2123C2A3D59446E0F4B5AF8719C10844D872493B3579345710AAB6292825B784A8C58AF"
+                 "7C7A449B2C2F546B10262843222BE4E39A34306C45A138BA9B67C774719E5A370760CD068320"
+                 "2161C7A3B0B073D8550D4B035D6B9086B9C734B95879204CA2548CC317A3530A157F278A1C68"
+                 "6E7BCA9903BAA2E47492451C49AFB406A48709D139BB14A7BD7060667DA0A31A6CAD85DA08B2"
+                 "17B65197BCE27B3471F025A965781C747EE5265864B20D4C5B515E75A9EDFCC41A432019B6A6"
+                 "3329602F463EEE8577666B18C3835E35C527098BA3D1C8B6D081409A159DA3BB93EA631076F1"
+                 "B65492CD8D624CF623343AB317A4126BD722605A593337FC4BAE8B56F8647923D5465737BA8B"
+                 "FAA93BF2708F2CB8E396774776590F381E50B48B3BC23A69231E7ACB06B4770A37350DCBB90E"
+                 "821578D8591D7BFB7716FA51FFB71E9B8845E9BBAD2A73AD0287B12676B64B560C9FA658EC91"
+                 "9B5763B667060309EA441A4B2E79240B9AF7A4FFF77651032EF47499A132589DBCB185970F75"
+                 "02368D39734B7848FE35A356900DC81C4F5564A804F31359D696981084177A4696FCB8B398BA"
+                 "22767DD808CDC5622FF004AE860B6B9DB2483B693043F77DA8141A6C08CC24124E02F09547C0"
+                 "0AD241698E8952C3A67FCB4462996531B2D1380E4099F82AB783F396456CA5978259B2B7015D"
+                 "833C2DE22C02365043B4CDC7C3C61BD734E7C5155A2748BFFB7718D048D849AE460361884527"
+                 "2115795524A7AEB6C230E23A4A9C1ACB91360189263B4448BA8B6451D1B485A7C3FA068E0871"
+                 "10BD559521DC87BD6B17D743071DE863D1E84019C25A9BD7C35FA56B9E2C204704CBB020465D"
+                 "D62511B35B312AC2FD9B7E5CA4338F3BC2BBC27CA9CCB64A88A215282D3B4620413CB86FCAC2"
+                 "24B455286CBA0C953C8A50790183859EE149FEE70633516638C778357368C238361F120D84C9"
+                 "378CF0722A24BBAB0B1B9A9B6E75391D701828167B01C0896AA02074772875F2745D8564814A"
+                 "769870DA9208354CD8F14560D2B0B667067CD7BA22614329AC9A03E51C5FD07D5FF0BEB2E497"
+                 "25514043517650E719E6DCB6D74318ADC93F6CD91BC5615E47BC15C5C2DACF99A9123B9E317C"
+                 "748B71B788DC46A264D3A8675335E7E0BE6810C9ED03D40500C9B31B3FC292185515CFC65A72"
+                 "2D18708A4F5638BDD8867651E68A0AF4502B6392AE38139D41AF3E9267C51CA145407A7526C6"
+                 "71ABD44439F0")
+
+    return (s1_kyber_pk, s1_kyber_sk, s2_kyber_pk, s2_kyber_sk,
+            s3_kyber_pk, s3_kyber_sk, s4_kyber_pk, s4_kyber_sk)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pre-generate per-node RSA and Kyber key pairs for the given topologies.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-s', '--schemes', nargs='+', default=list(ENC_MODES), choices=list(ENC_MODES),
+                        help="Schemes to generate keys for.")
+    parser.add_argument('-t', '--topologies', nargs='+', default=[str(i) for i in TOPOLOGIES],
+                        help="Topologies whose nodes need keys (e.g. 12 grid-10-10 tree-3-4).")
+    parser.add_argument('-k', '--keys_dir', default=KEYS_DIR, help="Key store directory.")
+    parsed_args = parser.parse_args()
+
+    node_names = []
+    for topology_id in parsed_args.topologies:
+        for name, _ in get_topology(topology_id)["nodes"]:
+            if name not in node_names:
+                node_names.append(name)
+
+    for scheme in parsed_args.schemes:
+        store = KeyStore(scheme, parsed_args.keys_dir)
+        missing = len([name for name in node_names if name not in store])
+        start = time.time()
+        store.ensure(node_names, legacy_pairs(scheme))
+        print(f"{store.name}: {len(store)} nodes in store, {missing} generated in {time.time() - start:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
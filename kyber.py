@@ -0,0 +1,340 @@
+import hashlib
+import os
+
+import numpy as np
+
+# ML-KEM (FIPS 203, CRYSTALS-Kyber) with NumPy polynomial arithmetic.
+# Keys use the byte layout of the keys in keystore.get_kyber_keys:
+# public key = ByteEncode12(t_hat) || rho, secret key = ByteEncode12(s_hat) || pk || H(pk) || z.
+# Every operation has a batched form working on many keys at once: hashing and
+# sampling run per key, all polynomial arithmetic runs on (batch, ...) arrays.
+# This is a reference model for measuring cost offline, not constant-time code.
+
+Q = 3329
+N = 256
+
+PARAMETER_SETS = {
+    512: {"k": 2, "eta1": 3, "eta2": 2, "du": 10, "dv": 4},
+    768: {"k": 3, "eta1": 2, "eta2": 2, "du": 10, "dv": 4},
+    1024: {"k": 4, "eta1": 2, "eta2": 2, "du": 11, "dv": 5},
+}
+
+SHARED_SECRET_SIZE = 32
+
+
+def bit_reverse7(i):
+    return int(f"{i:07b}"[::-1], 2)
+
+
+ZETAS = np.array([pow(17, bit_reverse7(i), Q) for i in range(128)], dtype=np.int64)
+GAMMAS = np.array([pow(17, 2 * bit_reverse7(i) + 1, Q) for i in range(128)], dtype=np.int64)
+N_INV = 3303
+
+
+def public_key_size(level):
+    return 384 * PARAMETER_SETS[level]["k"] + 32
+
+
+def secret_key_size(level):
+    return 768 * PARAMETER_SETS[level]["k"] + 96
+
+
+def ciphertext_size(level):
+    params = PARAMETER_SETS[level]
+    return 32 * (params["du"] * params["k"] + params["dv"])
+
+
+def as_bytes(key):
+    """
+    Accepts a key or ciphertext as bytes or as a hex string (the format of
+    keystore.get_kyber_keys and of the rpld arguments).
+    """
+    if isinstance(key, str):
+        return bytes.fromhex(key)
+    return bytes(key)
+
+
+def level_of(key):
+    """
+    Returns the level (512, 768 or 1024) of a public or secret key from its length.
+    """
+    length = len(as_bytes(key))
+    for level in PARAMETER_SETS:
+        if length in (public_key_size(level), secret_key_size(level)):
+            return level
+    raise ValueError(f"No ML-KEM level has {length}-byte keys")
+
+
+def ntt(f):
+    """
+    Number-theoretic transform of polynomials stored in the last axis of f.
+    Every butterfly layer is applied to all blocks (and all leading axes) at once.
+    """
+    f = np.array(f, dtype=np.int64)
+    shape = f.shape
+    k = 1
+    length = 128
+    while length >= 2:
+        blocks = N // (2 * length)
+        f = f.reshape(shape[:-1] + (blocks, 2, length))
+        zetas = ZETAS[k:k + blocks].reshape(blocks, 1)
+        t = zetas * f[..., 1, :] % Q
+        f = np.stack(((f[..., 0, :] + t) % Q, (f[..., 0, :] - t) % Q), axis=-2)
+        k += blocks
+        length //= 2
+    return f.reshape(shape)
+
+
+def ntt_inverse(f):
+    f = np.array(f, dtype=np.int64)
+    shape = f.shape
+    k = 127
+    length = 2
+    while length <= 128:
+        blocks = N // (2 * length)
+        f = f.reshape(shape[:-1] + (blocks, 2, length))
+        zetas = ZETAS[k - np.arange(blocks)].reshape(blocks, 1)
+        a = f[..., 0, :]
+        b = f[..., 1, :]
+        f = np.stack(((a + b) % Q, zetas * (b - a) % Q), axis=-2)
+        k -= blocks
+        length *= 2
+    return f.reshape(shape) * N_INV % Q
+
+
+def multiply_ntts(f, g):
+    """
+    Multiplies polynomials in the NTT domain (pairs of degree-1 products).
+    """
+    f0, f1 = f[..., 0::2], f[..., 1::2]
+    g0, g1 = g[..., 0::2], g[..., 1::2]
+    h = np.empty(np.broadcast_shapes(f.shape, g.shape), dtype=np.int64)
+    h[..., 0::2] = (f0 * g0 + f1 * g1 % Q * GAMMAS) % Q
+    h[..., 1::2] = (f0 * g1 + f1 * g0) % Q
+    return h
+
+
+def compress(x, d):
+    # round(2^d * x / Q) mod 2^d, in integers: Q is odd, so no ties
+    return ((x << (d + 1)) + Q) // (2 * Q) % (1 << d)
+
+
+def decompress(y, d):
+    return (Q * y + (1 << (d - 1))) >> d
+
+
+def byte_encode(f, d):
+    """
+    Packs the d-bit coefficients in the last axis of f into bytes (little-endian bits).
+    """
+    f = np.asarray(f, dtype=np.int64)
+    bits = (f[..., None] >> np.arange(d)) & 1
+    bits = bits.reshape(f.shape[:-1] + (-1,)).astype(np.uint8)
+    return np.packbits(bits, axis=-1, bitorder="little")
+
+
+def byte_decode(data, d):
+    """
+    Unpacks bytes into polynomials of d-bit coefficients (reduced mod Q for d = 12).
+    """
+    data = np.asarray(data, dtype=np.uint8)
+    bits = np.unpackbits(data, axis=-1, bitorder="little").astype(np.int64)
+    bits = bits.reshape(data.shape[:-1] + (-1, d))
+    f = (bits << np.arange(d)).sum(axis=-1)
+    return f % Q if d == 12 else f
+
+
+def sample_ntt(seed):
+    """
+    Rejection-samples a polynomial in the NTT domain from SHAKE128(seed).
+    """
+    length = 840
+    while True:
+        stream = np.frombuffer(hashlib.shake_128(seed).digest(length), dtype=np.uint8).astype(np.int64)
+        b = stream.reshape(-1, 3)
+        d1 = b[:, 0] + 256 * (b[:, 1] % 16)
+        d2 = b[:, 1] // 16 + 16 * b[:, 2]
+        candidates = np.stack((d1, d2), axis=-1).reshape(-1)
+        accepted = candidates[candidates < Q]
+        if len(accepted) >= N:
+            return accepted[:N]
+        length *= 2
+
+
+def sample_poly_cbd(data, eta):
+    """
+    Centered binomial sampling of polynomials from 64 * eta bytes each.
+    data is bytes or a uint8 array whose last axis holds the 64 * eta bytes.
+    """
+    data = np.frombuffer(data, dtype=np.uint8) if isinstance(data, bytes) else np.asarray(data, dtype=np.uint8)
+    bits = np.unpackbits(data, axis=-1, bitorder="little").astype(np.int64)
+    bits = bits.reshape(data.shape[:-1] + (N, 2 * eta))
+    return (bits[..., :eta].sum(axis=-1) - bits[..., eta:].sum(axis=-1)) % Q
+
+
+def prf(eta, seed, nonce):
+    return hashlib.shake_256(seed + bytes([nonce])).digest(64 * eta)
+
+
+def prf_batch(eta, seeds, nonces):
+    """
+    Returns PRF(eta, seed, nonce) for every seed and nonce as a
+    (len(seeds), len(nonces), 64 * eta) uint8 array.
+    """
+    data = b"".join(prf(eta, seed, nonce) for seed in seeds for nonce in nonces)
+    return np.frombuffer(data, dtype=np.uint8).reshape(len(seeds), len(nonces), 64 * eta)
+
+
+def expand_matrix(rho, k):
+    """
+    Returns A_hat as a (k, k, 256) array, A_hat[i][j] = SampleNTT(rho || j || i).
+    """
+    return np.array([[sample_ntt(rho + bytes([j, i])) for j in range(k)] for i in range(k)])
+
+
+def expand_matrices(rhos, k):
+    """
+    Returns the A_hat of every seed as a (len(rhos), k, k, 256) array. Keys that
+    share a seed (e.g. many encapsulations to one node) expand it only once.
+    """
+    matrices = {}
+    for rho in rhos:
+        if rho not in matrices:
+            matrices[rho] = expand_matrix(rho, k)
+    return np.array([matrices[rho] for rho in rhos])
+
+
+def split_bytes(values, size):
+    """
+    Returns equal-length byte strings as a (len(values), size) uint8 array.
+    """
+    return np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), size)
+
+
+def pke_keygen_batch(ds, level):
+    params = PARAMETER_SETS[level]
+    k, eta1 = params["k"], params["eta1"]
+    seeds = [hashlib.sha3_512(d + bytes([k])).digest() for d in ds]
+    rhos = [g[:32] for g in seeds]
+    sigmas = [g[32:] for g in seeds]
+
+    a_hat = expand_matrices(rhos, k)
+    noise = sample_poly_cbd(prf_batch(eta1, sigmas, range(2 * k)), eta1)
+    s_hat = ntt(noise[:, :k])
+    e_hat = ntt(noise[:, k:])
+    t_hat = (multiply_ntts(a_hat, s_hat[:, None, :, :]).sum(axis=2) + e_hat) % Q
+
+    eks = byte_encode(t_hat, 12).reshape(len(ds), -1)
+    dks = byte_encode(s_hat, 12).reshape(len(ds), -1)
+    return [ek.tobytes() + rho for ek, rho in zip(eks, rhos)], [dk.tobytes() for dk in dks]
+
+
+def pke_encrypt_batch(eks, messages, randomness, level):
+    params = PARAMETER_SETS[level]
+    k, eta1, eta2, du, dv = (params[p] for p in ("k", "eta1", "eta2", "du", "dv"))
+    count = len(eks)
+
+    t_hat = byte_decode(split_bytes([ek[:384 * k] for ek in eks], 384 * k).reshape(count, k, 384), 12)
+    a_hat = expand_matrices([ek[384 * k:] for ek in eks], k)
+    y = sample_poly_cbd(prf_batch(eta1, randomness, range(k)), eta1)
+    e1 = sample_poly_cbd(prf_batch(eta2, randomness, range(k, 2 * k)), eta2)
+    e2 = sample_poly_cbd(prf_batch(eta2, randomness, [2 * k]), eta2)[:, 0]
+    y_hat = ntt(y)
+
+    # u = NTT^-1(A_hat^T o y_hat) + e1, v = NTT^-1(t_hat^T o y_hat) + e2 + mu
+    u = (ntt_inverse(multiply_ntts(a_hat, y_hat[:, :, None, :]).sum(axis=1)) + e1) % Q
+    mu = decompress(byte_decode(split_bytes(messages, 32), 1), 1)
+    v = (ntt_inverse(multiply_ntts(t_hat, y_hat).sum(axis=1)) + e2 + mu) % Q
+
+    c1 = byte_encode(compress(u, du), du).reshape(count, -1)
+    c2 = byte_encode(compress(v, dv), dv)
+    return [a.tobytes() + b.tobytes() for a, b in zip(c1, c2)]
+
+
+def pke_decrypt_batch(dks, ciphertexts, level):
+    params = PARAMETER_SETS[level]
+    k, du, dv = params["k"], params["du"], params["dv"]
+    count = len(dks)
+    c = split_bytes(ciphertexts, ciphertext_size(level))
+
+    u = decompress(byte_decode(c[:, :32 * du * k].reshape(count, k, 32 * du), du), du)
+    v = decompress(byte_decode(c[:, 32 * du * k:], dv), dv)
+    s_hat = byte_decode(split_bytes(dks, 384 * k).reshape(count, k, 384), 12)
+    w = (v - ntt_inverse(multiply_ntts(s_hat, ntt(u)).sum(axis=1))) % Q
+    return [m.tobytes() for m in byte_encode(compress(w, 1), 1)]
+
+
+def keygen_batch(count, level=768, ds=None, zs=None):
+    """
+    Generates count ML-KEM key pairs of the given level.
+    ds and zs are lists of 32-byte seeds; random when not given.
+    Returns a list of (public_key, secret_key) bytes.
+    """
+    ds = ds or [os.urandom(32) for _ in range(count)]
+    zs = zs or [os.urandom(32) for _ in range(count)]
+    eks, dks_pke = pke_keygen_batch(ds, level)
+    return [(ek, dk_pke + ek + hashlib.sha3_256(ek).digest() + z)
+            for ek, dk_pke, z in zip(eks, dks_pke, zs)]
+
+
+def keygen(level=768, d=None, z=None):
+    """
+    ML-KEM key generation for level 512, 768 or 1024.
+    d and z are the 32-byte seeds; random when not given.
+    Returns (public_key, secret_key) as bytes.
+    """
+    d = os.urandom(32) if d is None else d
+    z = os.urandom(32) if z is None else z
+    return keygen_batch(1, level, [d], [z])[0]
+
+
+def encaps_batch(public_keys, messages=None):
+    """
+    Encapsulates a shared secret to every public key (bytes or hex strings, all
+    of the same level). messages are the 32-byte random inputs; random when not
+    given. Returns (shared_secrets, ciphertexts), lists of bytes.
+    """
+    eks = [as_bytes(pk) for pk in public_keys]
+    level = level_of(eks[0])
+    if any(len(ek) != public_key_size(level) for ek in eks):
+        raise ValueError("All public keys of a batch must have the same level")
+    messages = messages or [os.urandom(32) for _ in eks]
+    seeds = [hashlib.sha3_512(m + hashlib.sha3_256(ek).digest()).digest() for m, ek in zip(messages, eks)]
+    ciphertexts = pke_encrypt_batch(eks, messages, [g[32:] for g in seeds], level)
+    return [g[:32] for g in seeds], ciphertexts
+
+
+def encaps(public_key, message=None):
+    """
+    Returns (shared_secret, ciphertext) for one public key.
+    """
+    shared_secrets, ciphertexts = encaps_batch([public_key], None if message is None else [message])
+    return shared_secrets[0], ciphertexts[0]
+
+
+def decaps_batch(secret_keys, ciphertexts):
+    """
+    Decapsulates every ciphertext with the matching secret key (bytes or hex
+    strings, all of the same level). A ciphertext that does not re-encrypt to
+    itself yields the implicit-rejection secret J(z || c), as in FIPS 203.
+    Returns the shared secrets as a list of bytes.
+    """
+    dks = [as_bytes(sk) for sk in secret_keys]
+    cs = [as_bytes(c) for c in ciphertexts]
+    level = level_of(dks[0])
+    k = PARAMETER_SETS[level]["k"]
+    if any(len(dk) != secret_key_size(level) for dk in dks):
+        raise ValueError("All secret keys of a batch must have the same level")
+    if any(len(c) != ciphertext_size(level) for c in cs):
+        raise ValueError(f"ML-KEM-{level} ciphertexts are {ciphertext_size(level)} bytes")
+
+    eks = [dk[384 * k:768 * k + 32] for dk in dks]
+    messages = pke_decrypt_batch([dk[:384 * k] for dk in dks], cs, level)
+    seeds = [hashlib.sha3_512(m + dk[768 * k + 32:768 * k + 64]).digest() for m, dk in zip(messages, dks)]
+    reencrypted = pke_encrypt_batch(eks, messages, [g[32:] for g in seeds], level)
+    return [g[:32] if c == c_prime else hashlib.shake_256(dk[768 * k + 64:] + c).digest(SHARED_SECRET_SIZE)
+            for g, c, c_prime, dk in zip(seeds, cs, reencrypted, dks)]
+
+
+def decaps(secret_key, ciphertext):
+    return decaps_batch([secret_key], [ciphertext])[0]
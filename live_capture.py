@@ -0,0 +1,114 @@
+import gzip
+import os
+import subprocess
+import threading
+
+from metrics_cache import CACHE_DIR_NAME, MetricsCache
+from pcap_reader import GZIP_SUFFIX, capture_base, capture_suffix, iter_rpl_records
+from rpl_metrics import EXTRACTOR_VERSION, IncrementalMetrics
+
+
+NODE_CAPTURES_SUFFIX = ".nodes"
+
+
+def node_capture_path(pcap_file, node_name):
+    """
+    Returns where the capture of one node is stored when every node is captured:
+    results/kyber_1_12.pcap -> results/kyber_1_12.nodes/s22.pcap
+    The root's capture stays at pcap_file, and node captures are compressed when
+    it is (.pcap.gz).
+    """
+    return os.path.join(capture_base(pcap_file) + NODE_CAPTURES_SUFFIX, node_name + capture_suffix(pcap_file))
+
+
+class TeeReader:
+    """
+    Binary stream wrapper that copies everything read from source into sink.
+    """
+
+    def __init__(self, source, sink):
+        self.source = source
+        self.sink = sink
+
+    def read(self, size):
+        data = self.source.read(size)
+        self.sink.write(data)
+        return data
+
+
+class LiveCapture:
+    """
+    Runs tcpdump inside a container with its output streamed through docker exec.
+    The stream is written to pcap_file_on_host and analyzed on the host as packets
+    arrive, so the run's metrics are available as soon as the capture stops.
+    An optional ConvergenceMonitor is fed the same records.
+    With cache_metrics, the final metrics are stored in the results cache.
+    capture_filter and snaplen are passed to tcpdump (no filter and full frames
+    by default), and the capture is gzip-compressed on the host when
+    pcap_file_on_host ends with .gz.
+    """
+
+    def __init__(self, container_name, interface, pcap_file_on_host, monitor=None, cache_metrics=True,
+                 capture_filter=None, snaplen=0):
+        self.container_name = container_name
+        self.cache_metrics = cache_metrics
+        self.capture_filter = capture_filter
+        self.snaplen = snaplen
+        self.interface = interface
+        self.pcap_file_on_host = pcap_file_on_host
+        self.metrics = IncrementalMetrics()
+        self.monitor = monitor
+        self.lock = threading.Lock()
+        self.process = None
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.pcap_file_on_host) or ".", exist_ok=True)
+        command = ["docker", "exec", self.container_name,
+                   "tcpdump", "-i", self.interface, "-U", "-s", str(self.snaplen), "-w", "-"]
+        if self.capture_filter:
+            command.append(self.capture_filter)
+        self.process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.thread = threading.Thread(target=self.consume, daemon=True)
+        self.thread.start()
+
+    def consume(self):
+        try:
+            opener = gzip.open if self.pcap_file_on_host.endswith(GZIP_SUFFIX) else open
+            with opener(self.pcap_file_on_host, "wb") as pcap_file:
+                for record in iter_rpl_records(TeeReader(self.process.stdout, pcap_file), self.pcap_file_on_host):
+                    with self.lock:
+                        self.metrics.update(record)
+                        if self.monitor is not None:
+                            self.monitor.update(record)
+        except Exception as e:
+            self.error = e
+
+    def snapshot(self):
+        with self.lock:
+            return self.metrics.result()
+
+    def converged(self):
+        with self.lock:
+            return self.monitor is not None and self.monitor.converged()
+
+    def stop(self):
+        """
+        Stops tcpdump, waits for the rest of the stream to be analyzed and stores
+        the final metrics in the results cache, so the analysis scripts do not
+        parse this capture again. Returns the final metrics; if the analysis
+        failed, they are not cached and the error is left in self.error for the
+        caller to report.
+        """
+        subprocess.run(["docker", "exec", self.container_name, "killall", "-s", "SIGINT", "tcpdump"])
+        self.process.wait()
+        self.thread.join()
+
+        metrics = self.snapshot()
+        if self.error is None and self.cache_metrics:
+            cache_dir = os.path.join(os.path.dirname(self.pcap_file_on_host), CACHE_DIR_NAME)
+            cache = MetricsCache(cache_dir, EXTRACTOR_VERSION)
+            cache.put(self.pcap_file_on_host, metrics)
+            cache.save()
+        return metrics
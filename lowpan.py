@@ -0,0 +1,85 @@
+# IEEE 802.15.4 (2.4 GHz O-QPSK) and 6LoWPAN (RFC 4944, RFC 6282) link model:
+# turns IPv6 datagram lengths into 802.15.4 frames and their airtime.
+
+PHY_RATE_BPS = 250000
+SYMBOL_TIME = 16e-6
+
+MAX_FRAME_SIZE = 127    # aMaxPHYPacketSize, MAC header + payload + FCS
+PHY_HEADER_SIZE = 6     # preamble 4, SFD 1, PHR 1
+MAC_HEADER_SIZE = 21    # frame control 2, sequence 1, PAN ID 2, extended destination and source addresses 8 + 8
+MAC_FOOTER_SIZE = 2     # FCS
+MAX_MAC_PAYLOAD = MAX_FRAME_SIZE - MAC_HEADER_SIZE - MAC_FOOTER_SIZE
+ACK_FRAME_SIZE = 5
+
+IPV6_HEADER_SIZE = 40
+# IPHC with link-local addresses derived from the MAC addresses: 2 bytes of
+# encoding plus the inline next header; a multicast destination such as
+# ff02::1a adds one byte
+IPHC_HEADER_SIZE = 3
+IPHC_MULTICAST_SIZE = 1
+FRAG1_HEADER_SIZE = 4
+FRAGN_HEADER_SIZE = 5
+
+# CSMA-CA and acknowledgement timing, in seconds
+UNIT_BACKOFF_PERIOD = 20 * SYMBOL_TIME
+CCA_TIME = 8 * SYMBOL_TIME
+TURNAROUND_TIME = 12 * SYMBOL_TIME
+ACK_WAIT_DURATION = 54 * SYMBOL_TIME
+MAC_MIN_BE = 3
+MAC_MAX_BE = 5
+MAC_MAX_FRAME_RETRIES = 3
+
+
+def compressed_header_size(multicast=False):
+    return IPHC_HEADER_SIZE + (IPHC_MULTICAST_SIZE if multicast else 0)
+
+
+def fragment_payloads(ipv6_length, multicast=False):
+    """
+    Splits an IPv6 datagram of ipv6_length bytes into 6LoWPAN fragments.
+    Returns the MAC payload size of each frame: a single IPHC frame when the
+    compressed datagram fits, otherwise a FRAG1 frame followed by FRAGN frames.
+    Fragment offsets are multiples of 8 bytes of the uncompressed datagram.
+    """
+    header = compressed_header_size(multicast)
+    payload = max(ipv6_length - IPV6_HEADER_SIZE, 0)
+    if header + payload <= MAX_MAC_PAYLOAD:
+        return [header + payload]
+
+    first = (IPV6_HEADER_SIZE + MAX_MAC_PAYLOAD - FRAG1_HEADER_SIZE - header) // 8 * 8 - IPV6_HEADER_SIZE
+    following = (MAX_MAC_PAYLOAD - FRAGN_HEADER_SIZE) // 8 * 8
+    frames = [FRAG1_HEADER_SIZE + header + first]
+    remaining = payload - first
+    while remaining > 0:
+        size = min(following, remaining)
+        frames.append(FRAGN_HEADER_SIZE + size)
+        remaining -= size
+    return frames
+
+
+def frame_sizes(ipv6_length, multicast=False):
+    """
+    Returns the size of every 802.15.4 frame (PSDU: MAC header, payload and FCS)
+    needed to send an IPv6 datagram of ipv6_length bytes.
+    """
+    return [MAC_HEADER_SIZE + size + MAC_FOOTER_SIZE for size in fragment_payloads(ipv6_length, multicast)]
+
+
+def airtime(frame_size):
+    """
+    Seconds on air for one frame of frame_size bytes, PHY header included.
+    """
+    return (PHY_HEADER_SIZE + frame_size) * 8 / PHY_RATE_BPS
+
+
+ACK_AIRTIME = airtime(ACK_FRAME_SIZE)
+
+
+def datagram_cost(ipv6_length, multicast=False):
+    """
+    Returns (frames, on-air bytes, airtime in seconds) of one transmission of an
+    IPv6 datagram, counting PHY, MAC and 6LoWPAN headers but no retries or ACKs.
+    """
+    frames = frame_sizes(ipv6_length, multicast)
+    air_bytes = sum(PHY_HEADER_SIZE + size for size in frames)
+    return len(frames), air_bytes, air_bytes * 8 / PHY_RATE_BPS
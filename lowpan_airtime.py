@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+
+import lowpan
+from packet_table import build_packet_table
+from pcap_reader import link_header_size
+from rpl_metrics import CODE_TO_TYPE, PK_REPLY_CODE, RPL_MESSAGE_TYPES, find_pcaps, run_sort_key
+from utils import topology_id_arg
+
+PCAP_FOLDER = "results"
+OUTPUT_FILE = "output/lowpan_airtime.json"
+
+# The reply to a PK is counted apart from the PK itself
+MESSAGE_TYPES = RPL_MESSAGE_TYPES + ["PK-REPLY"]
+CODE_TYPES = {**CODE_TO_TYPE, PK_REPLY_CODE: "PK-REPLY"}
+
+COST_FIELDS = ["messages", "ipv6_bytes", "fragments", "fragmented_messages", "air_bytes", "airtime"]
+
+
+def empty_costs():
+    return {field: 0 for field in COST_FIELDS}
+
+
+def capture_costs(file_path):
+    """
+    Computes, for every RPL message of a capture, the 802.15.4 frames it needs
+    after 6LoWPAN fragmentation, its on-air bytes (PHY, MAC and 6LoWPAN headers
+    included) and its airtime at 250 kbit/s, and sums them per message type.
+    Each distinct (length, multicast) pair goes through the link model once.
+    Returns {message type: {field: total}} with the fields in COST_FIELDS.
+    """
+    table, address_ids = build_packet_table(file_path)
+    header_size = link_header_size(file_path)
+    costs = {msg_type: empty_costs() for msg_type in MESSAGE_TYPES}
+    if len(table) == 0:
+        return costs
+
+    multicast_ids = np.array([i for address, i in address_ids.items() if address.startswith("ff")], dtype=np.int32)
+    ipv6_lengths = table["length"].astype(np.int64) - header_size
+    multicast = np.isin(table["dst"], multicast_ids)
+    pairs, inverse = np.unique(np.stack((ipv6_lengths, multicast)), axis=1, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    unique_costs = np.array([lowpan.datagram_cost(int(length), bool(is_multicast))
+                             for length, is_multicast in pairs.T])
+    fragments = unique_costs[inverse, 0]
+    air_bytes = unique_costs[inverse, 1]
+    airtime = unique_costs[inverse, 2]
+
+    for code in np.unique(table["code"]):
+        msg_type = CODE_TYPES.get(int(code))
+        if msg_type is None:
+            continue
+        mask = table["code"] == code
+        totals = costs[msg_type]
+        totals["messages"] += int(mask.sum())
+        totals["ipv6_bytes"] += int(ipv6_lengths[mask].sum())
+        totals["fragments"] += int(fragments[mask].sum())
+        totals["fragmented_messages"] += int((fragments[mask] > 1).sum())
+        totals["air_bytes"] += int(air_bytes[mask].sum())
+        totals["airtime"] += float(airtime[mask].sum())
+    return costs
+
+
+def aggregate(run_costs):
+    """
+    Sums the costs of every run per (scenario, topology) and message type, and
+    adds per-run and per-message averages.
+    run_costs maps (scenario, iteration, topology) to the result of capture_costs.
+    """
+    groups = {}
+    for (scenario, iteration, topology), costs in run_costs.items():
+        group = groups.setdefault((scenario, topology), {"runs": 0, "types": {}})
+        group["runs"] += 1
+        for msg_type, totals in costs.items():
+            summed = group["types"].setdefault(msg_type, empty_costs())
+            for field in COST_FIELDS:
+                summed[field] += totals[field]
+
+    summary = []
+    for scenario, topology in sorted(groups, key=lambda key: run_sort_key((key[0], 0, key[1]))):
+        group = groups[(scenario, topology)]
+        for msg_type in MESSAGE_TYPES:
+            totals = group["types"][msg_type]
+            if totals["messages"] == 0:
+                continue
+            row = {"scenario": scenario, "topology": topology, "type": msg_type, "runs": group["runs"]}
+            row.update(totals)
+            row["fragments_per_message"] = totals["fragments"] / totals["messages"]
+            row["air_bytes_per_message"] = totals["air_bytes"] / totals["messages"]
+            row["airtime_per_message"] = totals["airtime"] / totals["messages"]
+            row["airtime_per_run"] = totals["airtime"] / group["runs"]
+            summary.append(row)
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'scenario':<16} {'topology':<10} {'type':<9} {'msgs/run':>9} {'frags/msg':>10} "
+          f"{'air B/msg':>10} {'airtime/msg (ms)':>17} {'airtime/run (ms)':>17}")
+    for row in summary:
+        print(f"{row['scenario']:<16} {str(row['topology']):<10} {row['type']:<9} "
+              f"{row['messages'] / row['runs']:>9.1f} {row['fragments_per_message']:>10.2f} "
+              f"{row['air_bytes_per_message']:>10.1f} {row['airtime_per_message'] * 1e3:>17.3f} "
+              f"{row['airtime_per_run'] * 1e3:>17.3f}")
+
+
+def set_airtime_parser():
+    parser = argparse.ArgumentParser(
+        description="6LoWPAN fragmentation and 802.15.4 airtime of the RPL messages in the captures.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include (all by default).")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include (all by default).")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help="JSON file for the aggregated results.")
+    return parser
+
+
+def main():
+    parsed_args = set_airtime_parser().parse_args(sys.argv[1:])
+    pcaps = find_pcaps(parsed_args.pcap_folder, parsed_args.scenarios, None, parsed_args.topologies)
+    run_costs = {}
+    for key, file_path in pcaps.items():
+        # Captures of aborted runs may be empty or truncated
+        try:
+            run_costs[key] = capture_costs(file_path)
+        except (ValueError, OSError, EOFError) as e:
+            print(f"Skipping {file_path}: {e}")
+    summary = aggregate(run_costs)
+    print_summary(summary)
+
+    os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+    with open(parsed_args.output, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Results written to {parsed_args.output}")
+
+
+if __name__ == '__main__':
+    main()
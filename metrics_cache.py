@@ -0,0 +1,120 @@
+import hashlib
+import json
+import os
+import tempfile
+
+CACHE_DIR_NAME = ".metrics_cache"
+INDEX_FILE_NAME = "index.json"
+DEFAULT_MAX_ENTRIES = 4096
+HASH_CHUNK_SIZE = 1 << 20
+
+
+def file_digest(file_path):
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def write_json_atomic(file_path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(file_path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, file_path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+class MetricsCache:
+    """
+    Sidecar cache of per-capture results stored in cache_dir.
+    Entries are keyed by the SHA-256 of the capture contents. An index maps each
+    capture path to its last seen (size, mtime, hash), so unchanged files are
+    looked up without being read again. Entries written by a different extractor
+    version are ignored and evicted, and only the max_entries most recently used
+    entries are kept.
+    """
+
+    def __init__(self, cache_dir, version, max_entries=DEFAULT_MAX_ENTRIES):
+        self.cache_dir = cache_dir
+        self.version = version
+        self.max_entries = max_entries
+        self.index_path = os.path.join(cache_dir, INDEX_FILE_NAME)
+        self.index = {}
+        self.dirty = False
+
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_path) as f:
+                self.index = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def entry_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}-v{self.version}.json")
+
+    def digest(self, file_path):
+        """
+        Returns the content hash of file_path, reusing the indexed hash when
+        the file size and mtime have not changed.
+        """
+        stat = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        known = self.index.get(key)
+        if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+            return known["sha256"]
+
+        digest = file_digest(file_path)
+        self.index[key] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": digest}
+        self.dirty = True
+        return digest
+
+    def get(self, file_path):
+        """
+        Returns the cached result for file_path, or None on a miss.
+        """
+        try:
+            entry_path = self.entry_path(self.digest(file_path))
+            with open(entry_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # The entry mtime records its last use for eviction
+        os.utime(entry_path)
+        return data
+
+    def put(self, file_path, data):
+        entry_path = self.entry_path(self.digest(file_path))
+        write_json_atomic(entry_path, data)
+
+    def evict(self):
+        """
+        Drops entries from other extractor versions and the least recently used
+        entries beyond max_entries, then forgets indexed files that no longer exist.
+        """
+        entries = []
+        suffix = f"-v{self.version}.json"
+        for file_name in os.listdir(self.cache_dir):
+            if file_name == INDEX_FILE_NAME:
+                continue
+            entry_path = os.path.join(self.cache_dir, file_name)
+            if file_name.endswith(suffix):
+                entries.append((os.stat(entry_path).st_mtime, entry_path))
+            else:
+                os.unlink(entry_path)
+
+        entries.sort(reverse=True)
+        for _, entry_path in entries[self.max_entries:]:
+            os.unlink(entry_path)
+
+        for key in [key for key in self.index if not os.path.exists(key)]:
+            del self.index[key]
+            self.dirty = True
+
+    def save(self):
+        if self.dirty:
+            write_json_atomic(self.index_path, self.index)
+            self.dirty = False
@@ -1,67 +1,259 @@
 #!/usr/bin/env python
 
+import os
+import socket
 import sys
 import subprocess
 import argparse 
-from time import sleep
+from time import sleep, time
 
 from containernet.net import Containernet
 from containernet.node import DockerSensor
 from containernet.cli import CLI
 from containernet.energy import Energy as DockerEnergy
 
-from mininet.log import info, setLogLevel
+from mininet.log import info, error, setLogLevel
 from mininet.term import makeTerm
 from mn_wifi.energy import Energy as WifiEnergy
 from mn_wifi.sixLoWPAN.link import LoWPAN
 
-from topologies import *
-from utils import docker_cp, get_crypto_args, get_kyber_keys, get_rsa_keys, set_parser
-
-def set_topo(topo_id, net_obj, common_params, crypto_args_root, crypto_args_node):
-    if topo_id == 1:
-        return topology_1(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 2:
-        return topology_2(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 3:
-        return topology_3(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 4:
-        return topology_4(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 5:
-        return topology_5(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 6:
-        return topology_6(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 7:
-        return topology_7(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 8:
-        return topology_8(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 9:
-        return topology_9(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 10:
-        return topology_10(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 11:
-        return topology_11(net_obj, common_params, crypto_args_root, crypto_args_node)
-    elif topo_id == 12:
-        return topology_12(net_obj, common_params, crypto_args_root, crypto_args_node)
-    else:
-        info(f"*** Invalid topology ID: {topo_id}. Using default topology.\n")
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        sensor2 = net_obj.addSensor('sensor2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        sensor3 = net_obj.addSensor('sensor3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        sensor4 = net_obj.addSensor('sensor4', ip6='fe80::4/64', **common_params, **crypto_args_node)
+from convergence import ConvergenceMonitor, expected_nodes
+from energy_monitor import EnergySampler, energy_file_path
+from live_capture import LiveCapture, node_capture_path
+from pcap_reader import GZIP_SUFFIX, PCAP_SUFFIX, RPL_CAPTURE_FILTER
+from results_db import default_db_path, record_capture
+from telemetry import AGENT_FILE, AGENT_MOUNT, MIN_DATAGRAM_SIZE, TelemetryGenerator
+from topologies import get_topology
+from utils import PrefixedNet, get_crypto_args, set_parser
+
+# Where the host output directory is mounted in every sensor
+CAPTURE_MOUNT = "/captures"
+# tcpdump writes to <capture>.part and renames it once the capture is complete
+PARTIAL_SUFFIX = ".part"
+CAPTURE_FLUSH_TIMEOUT = 10.0
+# Longest wait for tcpdump to start, and the time it is then given to open the interface
+TCPDUMP_START_TIMEOUT = 10.0
+TCPDUMP_SETTLE_TIME = 0.2
+
+def set_topo(topology_id, net_obj, common_params, crypto_args):
+    """
+    Builds the topology described by topologies.get_topology(topology_id), whose
+    first node is the DODAG root. crypto_args maps each node name to its crypto
+    arguments. Returns a dictionary {name: sensor}, or None if the network could
+    not be built.
+    """
+    topo = get_topology(topology_id)
+    try:
+        info(f"*** Creating topology: {topo['description']}\n{topo['diagram']}")
+        nodes = {}
+        for i, (name, ip6) in enumerate(topo["nodes"]):
+            if i == 0:
+                nodes[name] = net_obj.addSensor(name, ip6=f'{ip6}/64', dodag_root=True,
+                                                **common_params, **crypto_args[name])
+            else:
+                nodes[name] = net_obj.addSensor(name, ip6=f'{ip6}/64', **common_params, **crypto_args[name])
 
         net_obj.configureNodes()
 
         info("*** Adding links\n")
-        net_obj.addLink(sensor1, sensor2, cls=LoWPAN)
-        net_obj.addLink(sensor2, sensor3, cls=LoWPAN)
-        net_obj.addLink(sensor3, sensor4, cls=LoWPAN)
+        for a, b in topo["links"]:
+            net_obj.addLink(nodes[a], nodes[b], cls=LoWPAN)
 
         info("*** Starting network\n")
         net_obj.build()
-        return {"sensor1": sensor1, "sensor2": sensor2, "sensor3": sensor3, "sensor4": sensor4}
+        return nodes
+    except Exception as e:
+        error(f"Failed to build topology {topology_id} ({topo['description']}): {e}\n")
+        return None
+
+def flush_sensors(nodes, crypto_args):
+    """
+    Brings running sensors back to a fresh state, so the same containers can be
+    used for another iteration: stops rpld, flushes the neighbours and the routes
+    learned through RPL on each pan interface and applies the crypto arguments.
+    rpld is started again by start_rpld once the next capture is running.
+    """
+    for name, sensor in nodes.items():
+        sensor.cmd("pkill -9 rpld")
+
+        pan_intf = f"{sensor.name}-pan0"
+        sensor.cmd(f"ip -6 neigh flush dev {pan_intf}")
+        sensor.cmd(f"ip -6 route show dev {pan_intf} | grep -v '^fe80::/64' | cut -d' ' -f1 "
+                   f"| xargs -r -n1 ip -6 route del dev {pan_intf}")
+
+        for key in ('secret_key', 'public_key', 'enc_mode'):
+            sensor.params.pop(key, None)
+        sensor.params.update(crypto_args[name])
+
+def start_rpld(net_obj, nodes):
+    """
+    Starts rpld on every sensor. The key exchange begins right away, so in batch
+    mode this runs only once the capture is listening.
+    """
+    net_obj.configRPLD(list(nodes.values()))
+
+
+def wait_for_file(file_path, timeout=CAPTURE_FLUSH_TIMEOUT):
+    """
+    Waits until file_path exists. Returns False if it did not appear within timeout seconds.
+    """
+    deadline = time() + timeout
+    while not os.path.exists(file_path):
+        if time() > deadline:
+            return False
+        sleep(0.05)
+    return True
+
+def wait_for_tcpdump(sensors, timeout=TCPDUMP_START_TIMEOUT):
+    """
+    Waits until tcpdump runs in every sensor, then gives it TCPDUMP_SETTLE_TIME
+    to open its interface. Returns False if some sensor had no tcpdump within
+    timeout seconds.
+    """
+    deadline = time() + timeout
+    pending = list(sensors)
+    while pending:
+        pending = [sensor for sensor in pending if not sensor.cmd("pgrep -x tcpdump").strip()]
+        if pending and time() > deadline:
+            return False
+        if pending:
+            sleep(0.05)
+    sleep(TCPDUMP_SETTLE_TIME)
+    return True
+
+def capture(nodes, parsed_args, output_file_base, image=None, start_network=None):
+    """
+    Captures the RPL traffic seen by the root for one run and saves it to
+    <output_dir>/<output_file_base>.pcap (.pcap.gz with --compress), with the
+    nodes' energy samples in <output_dir>/<output_file_base>.energy.csv. With
+    --all_nodes, every other node is captured at the same time into
+    <output_dir>/<output_file_base>.nodes/. With --traffic_rate, the non-root
+    sensors send UDP telemetry to the root, summarized in
+    <output_dir>/<output_file_base>.telemetry.json. Captures are written
+    straight to the output directory, either streamed to the host or through its
+    bind mount, so nothing is copied out of the containers. The run, its configuration and its
+    metrics are then recorded in <output_dir>/results.db. start_network, if
+    given, is called once tcpdump is listening on every captured node, so the
+    capture holds the run from its first RPL message.
+    """
+    adaptive_mode_active = parsed_args.adaptive
+    live_mode_active = parsed_args.live or adaptive_mode_active
+    output_dir = parsed_args.output_dir
+
+    root_name = f"{parsed_args.prefix}sensor1"
+    container_name = f"mn.{root_name}"
+    root_interface = f"{root_name}-pan0"
+    pcap_file_name = output_file_base + PCAP_SUFFIX + (GZIP_SUFFIX if parsed_args.compress else "")
+    pcap_file_on_host = os.path.join(output_dir, pcap_file_name)
+    capture_filter = RPL_CAPTURE_FILTER if parsed_args.rpl_only else None
+
+    node_captures = []
+    if parsed_args.all_nodes:
+        for name in nodes:
+            if name == "sensor1":
+                continue
+            node_capture = LiveCapture(f"mn.{parsed_args.prefix}{name}", f"{parsed_args.prefix}{name}-pan0",
+                                       node_capture_path(pcap_file_on_host, name), cache_metrics=False,
+                                       capture_filter=capture_filter, snaplen=parsed_args.snaplen)
+            node_capture.start()
+            node_captures.append(node_capture)
+
+    if live_mode_active:
+        monitor = (ConvergenceMonitor(parsed_args.grace_period, expected_nodes(parsed_args.topology_id))
+                   if adaptive_mode_active else None)
+        live_capture = LiveCapture(container_name, root_interface, pcap_file_on_host, monitor,
+                                   capture_filter=capture_filter, snaplen=parsed_args.snaplen)
+        live_capture.start()
+    else:
+        pcap_file_in_container = f"{CAPTURE_MOUNT}/{pcap_file_name}"
+        partial_file = pcap_file_in_container + PARTIAL_SUFFIX
+        tcpdump_args = f"-i {root_interface} -s {parsed_args.snaplen} -v"
+        filter_arg = f' "{capture_filter}"' if capture_filter else ""
+        if parsed_args.compress:
+            writer = f"tcpdump {tcpdump_args} -w -{filter_arg} | gzip -c > {partial_file}"
+        else:
+            writer = f"tcpdump {tcpdump_args} -w {partial_file}{filter_arg}"
+        tcpdump_cmd = f"bash -c '{writer}; mv {partial_file} {pcap_file_in_container}'"
+        if os.path.exists(pcap_file_on_host):
+            os.remove(pcap_file_on_host)
+        makeTerm(nodes["sensor1"], title=f'{root_name}_tcpdump_{output_file_base}', cmd=tcpdump_cmd)
+
+    if start_network is not None:
+        captured = list(nodes.values()) if parsed_args.all_nodes else [nodes["sensor1"]]
+        if not wait_for_tcpdump(captured):
+            error(f"tcpdump not running within {TCPDUMP_START_TIMEOUT}s, starting the network anyway\n")
+        start_network()
+
+    energy_sampler = None
+    if parsed_args.energy_interval > 0:
+        energy_sampler = EnergySampler(nodes, energy_file_path(pcap_file_on_host), parsed_args.energy_interval)
+        energy_sampler.start()
+
+    telemetry = None
+    if parsed_args.traffic_rate > 0:
+        telemetry = TelemetryGenerator(nodes, parsed_args.topology_id, parsed_args.prefix, pcap_file_on_host,
+                                       CAPTURE_MOUNT, parsed_args.traffic_rate, parsed_args.traffic_size,
+                                       parsed_args.traffic_delay,
+                                       max(0, parsed_args.capture_duration - parsed_args.traffic_delay))
+        telemetry.start()
+
+    capture_duration = parsed_args.capture_duration
+    capture_start = time()
+    for t in range(0, capture_duration):
+            status = ""
+            if live_mode_active:
+                metrics = live_capture.snapshot()
+                status = (f" | RPL packets: {metrics['total_packets']}"
+                          f", key exchange: {metrics['key_exchange_time'] * 1000:.4f} ms")
+            print(f"\rCapturing... {t+1}/{capture_duration}s{status}", end="", flush=True)
+            sleep(1)
+            if adaptive_mode_active and live_capture.converged():
+                print(f"\nDODAG converged, ending capture after {t+1}s", end="")
+                break
+
+    captured_time = time() - capture_start
+    if telemetry is not None:
+        print("\nStopping telemetry...", end="")
+        summary = telemetry.stop()
+        if summary is not None and "total" in summary:
+            total = summary["total"]
+            latency = "-" if total["latency_p50"] is None else f"{total['latency_p50'] * 1000:.2f} ms"
+            print(f"\nTelemetry: {total['received']}/{total['sent']} datagrams received, "
+                  f"goodput {total['goodput']:.1f} bit/s, median latency {latency}", end="")
+        else:
+            error("\nTelemetry logs not written\n")
+    print("\nStopping tcpdump...")
+    if energy_sampler is not None:
+        num_samples = energy_sampler.stop()
+        print(f"Energy samples saved: {num_samples}")
+    for node_capture in node_captures:
+        node_capture.stop()
+        if node_capture.error is not None:
+            error(f"Error while analyzing the capture {node_capture.pcap_file_on_host}: {node_capture.error}\n")
+    if live_mode_active:
+        metrics = live_capture.stop()
+        if live_capture.error is not None:
+            error(f"Error while analyzing the live capture: {live_capture.error}\n")
+        print(f"Key exchange time: {metrics['key_exchange_time'] * 1000:.4f} ms")
+        print(f"Message counts: {metrics['counts']}")
+        print(f"Bytes per message type: {metrics['bytes']}")
+    else:
+        subprocess.run(["docker", "exec", container_name, "killall", "-s", "SIGINT", "tcpdump"])
+        metrics = None
+        if wait_for_file(pcap_file_on_host):
+            print(f"Capture saved: {pcap_file_on_host}")
+        else:
+            error(f"Capture not written to {pcap_file_on_host} within {CAPTURE_FLUSH_TIMEOUT}s\n")
+            return
+
+    try:
+        record_capture(default_db_path(output_dir), pcap_file_on_host, metrics,
+                       capture_duration=capture_duration, captured_time=captured_time, image=image,
+                       host=socket.gethostname(), options=vars(parsed_args))
+    except Exception as e:
+        error(f"Failed to record the run in the results database: {e}\n")
 
-def topology():
+def topology(argv=None):
     "Create a network."
     net = Containernet()
     dimage = 'ramonfontes/lowpan-post-quantum'
@@ -70,58 +262,59 @@ def topology():
     
     # --- Argument Parsing with argparse --- #
     parser = set_parser()
-    parsed_args = parser.parse_args(sys.argv[1:])
+    parsed_args = parser.parse_args(sys.argv[1:] if argv is None else argv)
 
     scenario_name = parsed_args.scenario_name
     iteration_num_str = parsed_args.iteration_num
     batch_mode_active = parsed_args.batch
+    num_iterations = parsed_args.num_iterations
     topology_id_arg = parsed_args.topology_id
-    output_file_base = f"{scenario_name}_{iteration_num_str}_{topology_id_arg}"
+    node_prefix = parsed_args.prefix
+    if parsed_args.traffic_rate > 0 and parsed_args.traffic_size < MIN_DATAGRAM_SIZE:
+        parser.error(f"--traffic_size must be at least {MIN_DATAGRAM_SIZE}, the telemetry header")
 
     info(f"*** Configuring scenario: {scenario_name}, iteration: {iteration_num_str}, topology: {topology_id_arg}\n")
-    info(f"*** Output files base: {output_file_base}\n")
+    if num_iterations > 1:
+        info(f"*** Reusing the sensors for iterations {iteration_num_str} to {iteration_num_str + num_iterations - 1}\n")
 
-    args1, args2 = get_crypto_args(scenario_name)
-    pcap_file_name_in_container = f"{output_file_base}.pcap"
+    output_dir = os.path.abspath(parsed_args.output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    node_names = [name for name, _ in get_topology(topology_id_arg)["nodes"]]
+    crypto_args = get_crypto_args(scenario_name, node_names)
     
     info("*** Configuring nodes\n")
     
     common_sensor_params = {
         'cls': DockerSensor, 'dimage': dimage, 'cpu_shares': 10,
-        'volumes': ["/tmp/.X11-unix:/tmp/.X11-unix:rw"], # Para X11 forwarding
-        'environment': {"DISPLAY": ":0"}, 'privileged': True, 'panid': '0xbeef',
+        'volumes': ["/tmp/.X11-unix:/tmp/.X11-unix:rw", # Para X11 forwarding
+                    f"{output_dir}:{CAPTURE_MOUNT}:rw"]
+                   + ([f"{AGENT_FILE}:{AGENT_MOUNT}:ro"] if parsed_args.traffic_rate > 0 else []),
+        'environment': {"DISPLAY": ":0"}, 'privileged': True, 'panid': parsed_args.panid,
         'voltage': 3.7, 'storing_mode': 2 # storing_mode=2 para todos como no seu exemplo
     }
     
-    nodes: dict = set_topo(topology_id_arg, net, common_sensor_params, args1, args2)
+    nodes: dict = set_topo(topology_id_arg, PrefixedNet(net, node_prefix), common_sensor_params, crypto_args)
     print( f"*** Nodes created: {nodes.keys()}\n")
 
     info("*** Configuring energy model\n")
     DockerEnergy(net.sensors)
     
-    info("*** Configuring RPLD\n")
-    net.configRPLD(net.sensors)
-    
     if batch_mode_active: 
-        container_name = "mn.sensor1"
-        
-        tcpdump_cmd = f"bash -c 'tcpdump -i sensor1-pan0 -w /{pcap_file_name_in_container} -v;'"
-        makeTerm(nodes["sensor1"], title=f'sensor1_tcpdump_{scenario_name}_{iteration_num_str}', cmd=tcpdump_cmd)
-
-        capture_duration = 60
-        for t in range(0, capture_duration):
-                print(f"\rCapturing... {t+1}/{capture_duration}s", end="", flush=True)
-                sleep(1)
-
-        print("\nStopping tcpdump...")
-        subprocess.run(["docker", "exec", container_name, "killall", "-s", "SIGINT", "tcpdump"])
-        
-        sleep(1)
+        # rpld is started by capture() once tcpdump listens, so every iteration
+        # records its key exchange from the start
+        for iteration_num in range(iteration_num_str, iteration_num_str + num_iterations):
+            if iteration_num != iteration_num_str:
+                info(f"*** Resetting sensors for iteration {iteration_num}\n")
+                flush_sensors(nodes, crypto_args)
 
-        print("\nSaving file to host...")
-        pcap_file_on_host = f"./results/{output_file_base}.pcap"
-        docker_cp(f"{container_name}:/{pcap_file_name_in_container}", pcap_file_on_host)
+            output_file_base = f"{scenario_name}_{iteration_num}_{topology_id_arg}"
+            info(f"*** Output files base: {output_file_base}\n")
+            capture(nodes, parsed_args, output_file_base, dimage,
+                    start_network=lambda: start_rpld(net, nodes))
     else:
+        info("*** Configuring RPLD\n")
+        net.configRPLD(net.sensors)
         info("*** Starting CLI\n")
         CLI(net)
     
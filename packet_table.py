@@ -0,0 +1,34 @@
+import numpy as np
+
+from pcap_reader import ICMPV6_RPL_TYPE, read_rpl_records
+
+PACKET_DTYPE = np.dtype([
+    ("timestamp", "f8"),
+    ("src", "i4"),
+    ("dst", "i4"),
+    ("icmp_type", "u1"),
+    ("code", "u1"),
+    ("length", "u4")
+])
+
+
+def build_packet_table(file_path, address_ids=None):
+    """
+    Reads the RPL packets of a .pcap file into a columnar NumPy structured array
+    with PACKET_DTYPE fields. Source and destination addresses are stored as ids
+    from address_ids ({address: id}), which is extended with every new address seen;
+    pass the same dictionary for several captures to get comparable ids.
+    Returns (table, address_ids).
+    """
+    if address_ids is None:
+        address_ids = {}
+
+    def address_id(address):
+        node_id = address_ids.get(address)
+        if node_id is None:
+            node_id = address_ids[address] = len(address_ids)
+        return node_id
+
+    rows = ((timestamp, address_id(src), address_id(dst), ICMPV6_RPL_TYPE, code, length)
+            for timestamp, src, dst, code, length in read_rpl_records(file_path))
+    return np.fromiter(rows, dtype=PACKET_DTYPE), address_ids
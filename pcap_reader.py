@@ -0,0 +1,168 @@
+import gzip
+import socket
+import struct
+
+ICMPV6_RPL_TYPE = 155
+
+ETHERTYPE_IPV6 = 0x86DD
+IPPROTO_ICMPV6 = 58
+
+# IPv6 extension headers that may sit between the fixed header and ICMPv6
+IPV6_EXT_HEADERS = {0, 43, 60}
+IPV6_FRAGMENT_HEADER = 44
+
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV6 = 229
+LINKTYPE_LINUX_SLL2 = 276
+
+# (offset of the ethertype field or None, offset of the IPv6 header) per link type
+LINK_LAYOUTS = {
+    LINKTYPE_ETHERNET: (12, 14),
+    LINKTYPE_RAW: (None, 0),
+    LINKTYPE_LINUX_SLL: (14, 16),
+    LINKTYPE_IPV6: (None, 0),
+    LINKTYPE_LINUX_SLL2: (0, 20),
+}
+
+# magic -> (byte order, timestamp fraction divisor)
+PCAP_MAGICS = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1000000),
+    b"\xa1\xb2\xc3\xd4": (">", 1000000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1000000000),
+    b"\xa1\xb2\x3c\x4d": (">", 1000000000),
+}
+
+READ_BUFFER_SIZE = 1 << 20
+
+PCAP_SUFFIX = ".pcap"
+GZIP_SUFFIX = ".gz"
+GZIP_MAGIC = b"\x1f\x8b"
+
+# tcpdump filter keeping only ICMPv6 RPL messages. It reads the ICMPv6 type
+# right after the fixed IPv6 header, so packets with extension headers are
+# dropped; rpld sends its control messages without any.
+RPL_CAPTURE_FILTER = "icmp6 and ip6[40] == 155"
+
+
+def capture_base(file_path):
+    """
+    Returns a capture path without its .pcap or .pcap.gz suffix:
+    results/kyber_1_4.pcap.gz -> results/kyber_1_4
+    """
+    if file_path.endswith(GZIP_SUFFIX):
+        file_path = file_path[:-len(GZIP_SUFFIX)]
+    if file_path.endswith(PCAP_SUFFIX):
+        file_path = file_path[:-len(PCAP_SUFFIX)]
+    return file_path
+
+
+def capture_suffix(file_path):
+    """
+    Returns the suffix of a capture path, ".pcap" or ".pcap.gz".
+    """
+    return file_path[len(capture_base(file_path)):]
+
+
+def open_pcap(file_path):
+    """
+    Opens a capture for binary reading, decompressing it on the fly when it is
+    gzip-compressed (e.g. written by tcpdump -w - | gzip).
+    """
+    with open(file_path, "rb") as f:
+        magic = f.read(len(GZIP_MAGIC))
+    if magic == GZIP_MAGIC:
+        return gzip.open(file_path, "rb")
+    return open(file_path, "rb", buffering=READ_BUFFER_SIZE)
+
+
+def parse_global_header(global_header, name):
+    """
+    Returns (byte order, timestamp fraction divisor, link type) from the 24-byte
+    global header of a pcap file.
+    """
+    if len(global_header) < 24 or global_header[:4] not in PCAP_MAGICS:
+        raise ValueError(f"Not a pcap file: {name}")
+    byte_order, ts_divisor = PCAP_MAGICS[global_header[:4]]
+    linktype = struct.unpack(byte_order + "I", global_header[20:24])[0] & 0x0FFFFFFF
+    if linktype not in LINK_LAYOUTS:
+        raise ValueError(f"Unsupported link type {linktype} in {name}")
+    return byte_order, ts_divisor, linktype
+
+
+def link_header_size(file_path):
+    """
+    Returns the number of bytes in front of the IPv6 header in each frame of a
+    capture, from the link type in its global header.
+    """
+    with open_pcap(file_path) as f:
+        linktype = parse_global_header(f.read(24), file_path)[2]
+    return LINK_LAYOUTS[linktype][1]
+
+
+def read_rpl_records(file_path):
+    """
+    Streams a capture (.pcap or .pcap.gz) and yields one (timestamp, src, dst,
+    code, length) tuple per ICMPv6 RPL (type 155) packet, without dissecting any
+    other frame. Addresses are returned in compressed text form ("fe80::1") and
+    length is the original frame length: the value len(packet) gives in Scapy,
+    also for captures truncated by a snap length.
+    """
+    with open_pcap(file_path) as f:
+        yield from iter_rpl_records(f, file_path)
+
+
+def iter_rpl_records(stream, name="<stream>"):
+    """
+    Same as read_rpl_records, reading pcap data from a binary stream such as the
+    stdout of "tcpdump -w -". Blocks on the stream until each record is complete.
+    """
+    byte_order, ts_divisor, linktype = parse_global_header(stream.read(24), name)
+    ethertype_offset, ip_offset = LINK_LAYOUTS[linktype]
+    record_header = struct.Struct(byte_order + "IIII")
+    unpack_header = record_header.unpack
+    header_size = record_header.size
+    read = stream.read
+    inet_ntop = socket.inet_ntop
+    AF_INET6 = socket.AF_INET6
+
+    while True:
+        header = read(header_size)
+        if len(header) < header_size:
+            return
+        ts_sec, ts_frac, incl_len, orig_len = unpack_header(header)
+        frame = read(incl_len)
+        if len(frame) < incl_len:
+            return
+
+        if ethertype_offset is not None:
+            if frame[ethertype_offset:ethertype_offset + 2] != b"\x86\xdd":
+                continue
+        elif frame[ip_offset:ip_offset + 1] and frame[ip_offset] >> 4 != 6:
+            continue
+
+        offset = ip_offset + 40
+        if len(frame) < offset:
+            continue
+        next_header = frame[ip_offset + 6]
+        while next_header in IPV6_EXT_HEADERS and len(frame) >= offset + 2:
+            next_header = frame[offset]
+            offset += (frame[offset + 1] + 1) * 8
+        if next_header == IPV6_FRAGMENT_HEADER and len(frame) >= offset + 8:
+            # Only the first fragment carries the ICMPv6 header
+            if struct.unpack(">H", frame[offset + 2:offset + 4])[0] & 0xFFF8:
+                continue
+            next_header = frame[offset]
+            offset += 8
+
+        if next_header != IPPROTO_ICMPV6 or len(frame) < offset + 2:
+            continue
+        if frame[offset] != ICMPV6_RPL_TYPE:
+            continue
+
+        yield (ts_sec + ts_frac / ts_divisor,
+               inet_ntop(AF_INET6, frame[ip_offset + 8:ip_offset + 24]),
+               inet_ntop(AF_INET6, frame[ip_offset + 24:ip_offset + 40]),
+               frame[offset + 1],
+               orig_len)
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from iteration_stats import reject_outliers, welch_t_test
+from pcap_reader import read_rpl_records
+from results_db import PCAP_FOLDER, ResultsDB, default_db_path
+from rpl_metrics import REPRESENTATIVE_TYPES, RPL_MESSAGE_TYPES, run_sort_key
+from utils import topology_id_arg
+
+BASELINE_FILE = "baselines/baseline.json"
+
+TIME_METRICS = ["key_exchange_time"]
+SIZE_METRICS = [f"representative_sizes.{msg_type}" for msg_type in REPRESENTATIVE_TYPES] + ["max_sizes.PK"]
+# Messages per second of capture, as counts grow with the capture length (e.g. with --adaptive)
+COUNT_METRICS = [f"count_rates.{msg_type}" for msg_type in RPL_MESSAGE_TYPES]
+# One value per run, 1 if its key exchange completed, so the mean is the completion rate
+COMPLETION_METRICS = ["key_exchange_completion"]
+
+DEFAULT_ALPHA = 0.05
+# Relative increase of the mean above which a metric regresses
+DEFAULT_TIME_THRESHOLD = 0.10
+DEFAULT_SIZE_THRESHOLD = 0.0
+DEFAULT_COUNT_THRESHOLD = 0.25
+# Absolute drop of the completion rate above which a cell regresses
+DEFAULT_COMPLETION_THRESHOLD = 0.1
+
+
+def metric_value(run, metric):
+    name, _, msg_type = metric.partition(".")
+    return run[name][msg_type] if msg_type else run[name]
+
+
+def run_duration(run):
+    """
+    Seconds a run was captured: its captured_time in the results database, or
+    for captures ingested from a folder the span of their RPL messages. None if
+    neither is known.
+    """
+    if run["captured_time"]:
+        return run["captured_time"]
+    if not run["capture_file"] or not os.path.exists(run["capture_file"]):
+        return None
+    timestamps = [record[0] for record in read_rpl_records(run["capture_file"])]
+    return timestamps[-1] - timestamps[0] if len(timestamps) > 1 else None
+
+
+def collect_cells(db, **filters):
+    """
+    Returns {(scenario, topology): {metric: [value per run]}} for the runs of db
+    selected by filters. Key exchange times only come from runs whose key
+    exchange completed; whether it did is kept as key_exchange_completion.
+    Message counts are divided by the run's duration (see run_duration).
+    """
+    cells = {}
+    for run in db.runs(with_metrics=True, **filters):
+        cell = cells.setdefault((run["scenario"], run["topology"]), {})
+        for metric in TIME_METRICS + SIZE_METRICS:
+            value = metric_value(run, metric)
+            if metric in TIME_METRICS and value <= 0:
+                continue
+            cell.setdefault(metric, []).append(value)
+        duration = run_duration(run)
+        if duration:
+            for metric in COUNT_METRICS:
+                cell.setdefault(metric, []).append(run["counts"][metric.partition(".")[2]] / duration)
+        cell.setdefault("key_exchange_completion", []).append(1 if run["key_exchange_time"] > 0 else 0)
+    return cells
+
+
+def save_baseline(cells, file_path, source):
+    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+    with open(file_path, "w") as f:
+        json.dump({"created": time.time(), "source": source,
+                   "cells": [{"scenario": scenario, "topology": topology, "metrics": metrics}
+                             for (scenario, topology), metrics in sorted(
+                                 cells.items(), key=lambda item: run_sort_key((item[0][0], 0, item[0][1])))]},
+                  f, indent=1)
+
+
+def load_baseline(file_path):
+    with open(file_path) as f:
+        baseline = json.load(f)
+    return {(cell["scenario"], cell["topology"]): cell["metrics"] for cell in baseline["cells"]}
+
+
+def compare_metric(baseline, current, threshold, alpha):
+    """
+    Compares the values of one metric in one cell. The metric regresses when its
+    mean grows by more than threshold (relative to the baseline) and Welch's
+    t-test finds the difference significant at alpha; with fewer than two runs
+    on either side only the threshold is applied. Returns a dictionary with the
+    means, the relative change, the p-value and the status: "regressed",
+    "improved", "ok", "missing" (no current values) or "new" (no baseline).
+    """
+    result = {"baseline": None, "current": None, "change": None, "p_value": None,
+              "baseline_runs": len(baseline), "current_runs": len(current)}
+    if not baseline or not current:
+        result["status"] = "missing" if baseline else "new"
+        if baseline:
+            result["baseline"] = sum(baseline) / len(baseline)
+        return result
+
+    base_mean = sum(baseline) / len(baseline)
+    current_mean = sum(current) / len(current)
+    result.update(baseline=base_mean, current=current_mean)
+    if base_mean:
+        result["change"] = (current_mean - base_mean) / abs(base_mean)
+    elif current_mean:
+        result["change"] = float("inf")
+    else:
+        result["change"] = 0.0
+    result["p_value"] = welch_t_test(baseline, current)
+
+    significant = result["p_value"] is None or result["p_value"] < alpha
+    if result["change"] > threshold and significant:
+        result["status"] = "regressed"
+    elif result["change"] < -threshold and significant:
+        result["status"] = "improved"
+    else:
+        result["status"] = "ok"
+    return result
+
+
+def compare_completion(baseline, current, threshold):
+    """
+    Compares the key exchange completion rate of one cell (completed runs over
+    all runs). It regresses when it drops by more than threshold, in absolute
+    terms; runs either complete or not, so no t-test is applied. Returns a
+    dictionary like compare_metric, whose change is the difference of the rates.
+    """
+    result = {"baseline": None, "current": None, "change": None, "p_value": None,
+              "baseline_runs": len(baseline), "current_runs": len(current)}
+    if not baseline or not current:
+        result["status"] = "missing" if baseline else "new"
+        if baseline:
+            result["baseline"] = sum(baseline) / len(baseline)
+        return result
+
+    result["baseline"] = sum(baseline) / len(baseline)
+    result["current"] = sum(current) / len(current)
+    result["change"] = result["current"] - result["baseline"]
+    if result["change"] < -threshold:
+        result["status"] = "regressed"
+    elif result["change"] > threshold:
+        result["status"] = "improved"
+    else:
+        result["status"] = "ok"
+    return result
+
+
+def compare_cells(baseline, current, thresholds, alpha=DEFAULT_ALPHA):
+    """
+    Compares every metric of every cell of the baseline, and of the cells only
+    found in the current results. thresholds maps each metric to its threshold.
+    Key exchange times are compared without their outliers.
+    Returns a list of rows, one per cell and metric.
+    """
+    rows = []
+    keys = sorted(set(baseline) | set(current), key=lambda key: run_sort_key((key[0], 0, key[1])))
+    for scenario, topology in keys:
+        base_metrics = baseline.get((scenario, topology), {})
+        current_metrics = current.get((scenario, topology), {})
+        for metric, threshold in thresholds.items():
+            base_values = base_metrics.get(metric, [])
+            current_values = current_metrics.get(metric, [])
+            if metric in TIME_METRICS:
+                base_values = list(reject_outliers(base_values)[0])
+                current_values = list(reject_outliers(current_values)[0])
+            elif not any(base_values) and not any(current_values):
+                # Messages this scenario does not send (e.g. PK without cryptography)
+                continue
+            if not base_values and not current_values:
+                continue
+            if metric in COMPLETION_METRICS:
+                result = compare_completion(base_values, current_values, threshold)
+            else:
+                result = compare_metric(base_values, current_values, threshold, alpha)
+            rows.append({"scenario": scenario, "topology": topology, "metric": metric, "threshold": threshold,
+                         **result})
+    return rows
+
+
+def format_value(metric, value):
+    if value is None:
+        return "-"
+    if metric in TIME_METRICS:
+        return f"{value * 1e3:.4f} ms"
+    if metric in COMPLETION_METRICS:
+        return f"{value:.0%}"
+    if metric in COUNT_METRICS:
+        return f"{value:.3f}/s"
+    return f"{value:.1f}"
+
+
+def print_diff(rows, verbose=False):
+    shown = [row for row in rows if verbose or row["status"] != "ok"]
+    if not shown:
+        print(f"No differences beyond the thresholds ({len(rows)} metrics compared)")
+        return
+    print(f"{'scenario':<16} {'topology':<10} {'metric':<28} {'baseline':>13} {'current':>13} "
+          f"{'change':>8} {'p':>7} {'runs':>7}  status")
+    for row in shown:
+        change = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        p_value = "-" if row["p_value"] is None else f"{row['p_value']:.3f}"
+        runs = f"{row['baseline_runs']}/{row['current_runs']}"
+        status = row["status"].upper() if row["status"] in ("regressed", "missing") else row["status"]
+        print(f"{row['scenario']:<16} {str(row['topology']):<10} {row['metric']:<28} "
+              f"{format_value(row['metric'], row['baseline']):>13} {format_value(row['metric'], row['current']):>13} "
+              f"{change:>8} {p_value:>7} {runs:>7}  {status}")
+
+
+def set_regression_parser():
+    parser = argparse.ArgumentParser(
+        description="Compare the runs of a results folder with a stored baseline and fail on regressions.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('--db', default=None, help="Results database (<pcap_folder>/results.db by default).")
+    parser.add_argument('-b', '--baseline', default=BASELINE_FILE, help="Baseline file.")
+    parser.add_argument('--save', action='store_true',
+                        help="Store the selected runs as the new baseline instead of comparing.")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include (all by default).")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include (all by default).")
+    parser.add_argument('-a', '--alpha', type=float, default=DEFAULT_ALPHA,
+                        help="Significance level of Welch's t-test.")
+    parser.add_argument('--time_threshold', type=float, default=DEFAULT_TIME_THRESHOLD,
+                        help="Relative increase of the mean key exchange time that counts as a regression.")
+    parser.add_argument('--size_threshold', type=float, default=DEFAULT_SIZE_THRESHOLD,
+                        help="Relative increase of a message size that counts as a regression.")
+    parser.add_argument('--count_threshold', type=float, default=DEFAULT_COUNT_THRESHOLD,
+                        help="Relative increase of a message rate (messages per second of capture) that counts as a regression.")
+    parser.add_argument('--completion_threshold', type=float, default=DEFAULT_COMPLETION_THRESHOLD,
+                        help="Drop of the key exchange completion rate (completed/total runs) that counts as a "
+                             "regression.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show every compared metric.")
+    parser.add_argument('-o', '--output', default=None, help="JSON file for the comparison.")
+    return parser
+
+
+def main():
+    parsed_args = set_regression_parser().parse_args(sys.argv[1:])
+    with ResultsDB(parsed_args.db or default_db_path(parsed_args.pcap_folder)) as db:
+        db.ingest_folder(parsed_args.pcap_folder)
+        current = collect_cells(db, scenarios=parsed_args.scenarios, topologies=parsed_args.topologies)
+    if not current:
+        print(f"No runs found in {parsed_args.pcap_folder}")
+        return 2
+
+    if parsed_args.save:
+        save_baseline(current, parsed_args.baseline, parsed_args.pcap_folder)
+        print(f"Baseline of {len(current)} cells written to {parsed_args.baseline}")
+        return 0
+
+    if not os.path.exists(parsed_args.baseline):
+        print(f"Baseline {parsed_args.baseline} not found, create it with --save")
+        return 2
+    baseline = load_baseline(parsed_args.baseline)
+    if parsed_args.scenarios is not None or parsed_args.topologies is not None:
+        baseline = {key: metrics for key, metrics in baseline.items()
+                    if (parsed_args.scenarios is None or key[0] in parsed_args.scenarios)
+                    and (parsed_args.topologies is None or key[1] in parsed_args.topologies)}
+
+    thresholds = {**{metric: parsed_args.time_threshold for metric in TIME_METRICS},
+                  **{metric: parsed_args.size_threshold for metric in SIZE_METRICS},
+                  **{metric: parsed_args.count_threshold for metric in COUNT_METRICS},
+                  **{metric: parsed_args.completion_threshold for metric in COMPLETION_METRICS}}
+    rows = compare_cells(baseline, current, thresholds, parsed_args.alpha)
+    print_diff(rows, parsed_args.verbose)
+
+    if parsed_args.output:
+        os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+        with open(parsed_args.output, "w") as f:
+            json.dump(rows, f, indent=1, default=str)
+
+    failures = [row for row in rows if row["status"] in ("regressed", "missing")]
+    if failures:
+        print(f"{len(failures)} regression(s) against {parsed_args.baseline}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+
+from metrics_cache import CACHE_DIR_NAME
+from rpl_metrics import EXTRACTOR_VERSION, analyze_files, extract_metrics, find_pcaps, parse_pcap_name, run_sort_key
+from topologies import get_topology, hop_depths, neighbors
+from utils import topology_id_arg
+
+PCAP_FOLDER = "results"
+DB_FILE_NAME = "results.db"
+
+# Seconds a writer waits for the lock held by a concurrent run
+LOCK_TIMEOUT = 30.0
+
+# Scalar metrics of extract_metrics, stored as columns of runs
+SCALAR_METRICS = ["key_exchange_time", "total_packets", "total_bytes"]
+# Per message type metrics of extract_metrics, stored in run_metrics
+TYPE_METRICS = ["representative_sizes", "last_sizes", "max_sizes", "counts", "bytes"]
+
+# Columns results can be filtered and grouped by
+DIMENSIONS = ["scenario", "topology", "iteration", "nodes", "depth", "fan_out", "image", "host"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    scenario TEXT NOT NULL,
+    iteration INTEGER NOT NULL,
+    topology TEXT NOT NULL,
+    nodes INTEGER,
+    depth INTEGER,
+    fan_out INTEGER,
+    capture_file TEXT,
+    capture_duration REAL,
+    captured_time REAL,
+    image TEXT,
+    host TEXT,
+    options TEXT,
+    extractor_version INTEGER,
+    recorded_at REAL,
+    key_exchange_time REAL,
+    total_packets INTEGER,
+    total_bytes INTEGER,
+    UNIQUE (scenario, iteration, topology)
+);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    metric TEXT NOT NULL,
+    msg_type TEXT NOT NULL,
+    value INTEGER,
+    PRIMARY KEY (run_id, metric, msg_type)
+);
+CREATE INDEX IF NOT EXISTS runs_cell ON runs (scenario, topology);
+CREATE INDEX IF NOT EXISTS run_metrics_metric ON run_metrics (metric, msg_type);
+"""
+
+CONFIG_FIELDS = ["capture_file", "capture_duration", "captured_time", "image", "host", "options"]
+
+
+def default_db_path(pcap_folder=PCAP_FOLDER):
+    return os.path.join(pcap_folder, DB_FILE_NAME)
+
+
+def topology_value(topology):
+    """
+    Returns a topology id stored as text in its usual type: an int for the
+    predefined topologies, a string for generated ones.
+    """
+    return int(topology) if topology.isdigit() else topology
+
+
+def row_sort_key(row, columns):
+    """
+    Sorts rows by columns, with topologies in run_sort_key order (1, 4, 12, then
+    generated ones) rather than as text.
+    """
+    return tuple(run_sort_key(("", 0, row[column]))[2] if column == "topology" else
+                 (row[column] is None, row[column] if row[column] is not None else 0)
+                 for column in columns)
+
+
+def topology_shape(topology_id):
+    """
+    Returns (nodes, depth, fan_out) of a topology: its number of nodes, the hop
+    count of its deepest node and the number of neighbours of the root.
+    """
+    topology = get_topology(topology_id)
+    root = topology["nodes"][0][0]
+    return len(topology["nodes"]), max(hop_depths(topology).values()), len(neighbors(topology)[root])
+
+
+class ResultsDB:
+    """
+    SQLite store of every run: its configuration, the shape of its topology and
+    the metrics of extract_metrics, so results can be filtered and aggregated
+    without reading the captures again. Scalar metrics are columns of runs and
+    per message type metrics rows of run_metrics, named "<metric>.<type>" in
+    queries (e.g. "max_sizes.DAO").
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def record_run(self, scenario, iteration, topology, metrics, **config):
+        """
+        Stores the metrics of one run, replacing those of an earlier run with the
+        same scenario, iteration and topology. config holds the fields of
+        CONFIG_FIELDS; fields not given keep their stored value. Returns the run id.
+        """
+        unknown = set(config) - set(CONFIG_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown run configuration: {sorted(unknown)}")
+        if isinstance(config.get("options"), dict):
+            config["options"] = json.dumps(config["options"], sort_keys=True)
+        nodes, depth, fan_out = topology_shape(topology)
+        values = {"scenario": scenario, "iteration": iteration, "topology": str(topology),
+                  "nodes": nodes, "depth": depth, "fan_out": fan_out,
+                  "extractor_version": EXTRACTOR_VERSION, "recorded_at": time.time(),
+                  **{field: config.get(field) for field in CONFIG_FIELDS},
+                  **{metric: metrics[metric] for metric in SCALAR_METRICS}}
+        columns = ", ".join(values)
+        placeholders = ", ".join(f":{column}" for column in values)
+        updates = ", ".join(f"{column} = COALESCE(excluded.{column}, {column})" if column in CONFIG_FIELDS
+                            else f"{column} = excluded.{column}"
+                            for column in values if column not in ("scenario", "iteration", "topology"))
+        with self.connection:
+            self.connection.execute(
+                f"INSERT INTO runs ({columns}) VALUES ({placeholders}) "
+                f"ON CONFLICT (scenario, iteration, topology) DO UPDATE SET {updates}", values)
+            run_id = self.connection.execute(
+                "SELECT id FROM runs WHERE scenario = ? AND iteration = ? AND topology = ?",
+                (scenario, iteration, str(topology))).fetchone()["id"]
+            self.connection.execute("DELETE FROM run_metrics WHERE run_id = ?", (run_id,))
+            self.connection.executemany(
+                "INSERT INTO run_metrics (run_id, metric, msg_type, value) VALUES (?, ?, ?, ?)",
+                [(run_id, metric, msg_type, value)
+                 for metric in TYPE_METRICS for msg_type, value in metrics[metric].items()])
+        return run_id
+
+    def ingest_folder(self, pcap_folder, processes=None):
+        """
+        Records every capture of pcap_folder that is not stored yet, was written
+        again since it was stored or was stored by an older extractor, reusing
+        the metrics cache of the folder, and forgets the runs of the folder whose
+        capture was deleted. Returns the number of runs recorded.
+        """
+        folder = os.path.abspath(pcap_folder)
+        deleted = [(row["id"],) for row in self.connection.execute("SELECT id, capture_file FROM runs")
+                   if row["capture_file"] and os.path.dirname(os.path.abspath(row["capture_file"])) == folder
+                   and not os.path.exists(row["capture_file"])]
+        with self.connection:
+            self.connection.executemany("DELETE FROM runs WHERE id = ?", deleted)
+
+        stored = {(row["scenario"], row["iteration"], row["topology"]): row["recorded_at"]
+                  for row in self.connection.execute(
+                      "SELECT scenario, iteration, topology, recorded_at FROM runs WHERE extractor_version = ?",
+                      (EXTRACTOR_VERSION,))}
+        pcaps = {key: path for key, path in find_pcaps(pcap_folder).items()
+                 if stored.get((key[0], key[1], str(key[2])), 0) < os.path.getmtime(path)}
+        if not pcaps:
+            return 0
+        metrics = analyze_files(pcaps.values(), processes, os.path.join(pcap_folder, CACHE_DIR_NAME))
+        for (scenario, iteration, topology), path, run_metrics in zip(pcaps, pcaps.values(), metrics):
+            self.record_run(scenario, iteration, topology, run_metrics, capture_file=path)
+        return len(pcaps)
+
+    def where(self, scenarios=None, topologies=None, iterations=None, min_depth=None, max_depth=None,
+              min_nodes=None, max_nodes=None, completed=False):
+        """
+        Returns (SQL condition, parameters) selecting runs: by scenario, topology
+        and iteration, by the depth and size of the topology, and with completed
+        only runs whose key exchange finished.
+        """
+        conditions, parameters = ["1"], []
+        for column, values in (("scenario", scenarios), ("iteration", iterations),
+                               ("topology", None if topologies is None else [str(t) for t in topologies])):
+            if values is not None:
+                values = list(values)
+                conditions.append(f"runs.{column} IN ({', '.join('?' * len(values))})")
+                parameters += values
+        for column, operator, value in (("depth", ">=", min_depth), ("depth", "<=", max_depth),
+                                        ("nodes", ">=", min_nodes), ("nodes", "<=", max_nodes)):
+            if value is not None:
+                conditions.append(f"runs.{column} {operator} ?")
+                parameters.append(value)
+        if completed:
+            conditions.append("runs.key_exchange_time > 0")
+        return " AND ".join(conditions), parameters
+
+    def runs(self, with_metrics=False, **filters):
+        """
+        Returns the selected runs (see where for the filters) as dictionaries,
+        sorted by scenario, topology and iteration. With with_metrics, each run
+        also holds its per message type metrics, as extract_metrics returns them.
+        """
+        condition, parameters = self.where(**filters)
+        rows = [dict(row) for row in self.connection.execute(
+            f"SELECT * FROM runs WHERE {condition}", parameters)]
+        for row in rows:
+            row["topology"] = topology_value(row["topology"])
+        rows.sort(key=lambda row: row_sort_key(row, ["scenario", "topology", "iteration"]))
+        if with_metrics and rows:
+            by_id = {row["id"]: row for row in rows}
+            for row in rows:
+                row.update({metric: {} for metric in TYPE_METRICS})
+            for run_id, metric, msg_type, value in self.connection.execute(
+                    f"SELECT run_metrics.run_id, metric, msg_type, value FROM run_metrics "
+                    f"JOIN runs ON runs.id = run_metrics.run_id WHERE {condition}", parameters):
+                by_id[run_id][metric][msg_type] = value
+        return rows
+
+    def aggregate(self, metric="key_exchange_time", by=("scenario", "topology"), **filters):
+        """
+        Aggregates one metric over the selected runs, grouped by the dimensions in
+        by (see DIMENSIONS). Returns one dictionary per group with the group's
+        dimensions, runs, mean, std (sample), min and max.
+        """
+        by = list(by)
+        unknown = [dimension for dimension in by if dimension not in DIMENSIONS]
+        if unknown:
+            raise ValueError(f"Unknown dimensions: {unknown}, expected some of {DIMENSIONS}")
+        condition, parameters = self.where(**filters)
+        if metric in SCALAR_METRICS:
+            value, source = f"runs.{metric}", "runs"
+        elif metric.partition(".")[0] in TYPE_METRICS:
+            name, _, msg_type = metric.partition(".")
+            value = "run_metrics.value"
+            source = ("runs JOIN run_metrics ON run_metrics.run_id = runs.id "
+                      "AND run_metrics.metric = ? AND run_metrics.msg_type = ?")
+            parameters = [name, msg_type] + parameters
+        else:
+            raise ValueError(f"Unknown metric: {metric}, expected one of {SCALAR_METRICS} "
+                             f"or <metric>.<type> with a metric in {TYPE_METRICS}")
+
+        groups = ", ".join(f"runs.{dimension}" for dimension in by)
+        select = groups + ", " if by else ""
+        group_by = f"GROUP BY {groups}" if by else ""
+        rows = self.connection.execute(
+            f"SELECT {select}COUNT({value}) AS runs, AVG({value}) AS mean, "
+            f"AVG({value} * {value}) AS mean_square, MIN({value}) AS min, MAX({value}) AS max "
+            f"FROM {source} WHERE {condition} {group_by}", parameters)
+
+        results = []
+        for row in rows:
+            row = dict(row)
+            runs, mean_square = row["runs"], row.pop("mean_square")
+            row["std"] = None
+            if runs > 1:
+                row["std"] = max(mean_square - row["mean"] ** 2, 0.0) ** 0.5 * (runs / (runs - 1)) ** 0.5
+            if "topology" in row:
+                row["topology"] = topology_value(row["topology"])
+            results.append(row)
+        return sorted(results, key=lambda row: row_sort_key(row, by))
+
+
+def record_capture(db_path, pcap_file, metrics=None, **config):
+    """
+    Records a capture written by network.py in the results database, extracting
+    its metrics unless they are given. Returns the run id, or None if the
+    capture name does not follow the run naming.
+    """
+    key = parse_pcap_name(pcap_file)
+    if key is None:
+        return None
+    if metrics is None:
+        metrics = extract_metrics(pcap_file)
+    with ResultsDB(db_path) as db:
+        return db.record_run(*key, metrics, capture_file=pcap_file, **config)
+
+
+def format_number(value):
+    if value is None:
+        return "-"
+    return f"{value:.6g}"
+
+
+def print_aggregate(rows, by):
+    print("  ".join(f"{dimension:<16}" for dimension in by)
+          + f"{'runs':>6} {'mean':>12} {'std':>12} {'min':>12} {'max':>12}")
+    for row in rows:
+        print("  ".join(f"{str(row[dimension]):<16}" for dimension in by)
+              + f"{row['runs']:>6} {format_number(row['mean']):>12} {format_number(row['std']):>12} "
+                f"{format_number(row['min']):>12} {format_number(row['max']):>12}")
+
+
+def set_db_parser():
+    parser = argparse.ArgumentParser(
+        description="Store the runs and their metrics in a SQLite database and query them.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('--db', default=None, help="Database file (<pcap_folder>/results.db by default).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser('ingest', help="Record the captures of the folder that are not stored yet.")
+
+    query = subparsers.add_parser('query', help="Aggregate a metric over the selected runs.",
+                                  formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    query.add_argument('-m', '--metric', default="key_exchange_time",
+                       help=f"Metric: one of {', '.join(SCALAR_METRICS)} or <metric>.<type>, e.g. max_sizes.DAO.")
+    query.add_argument('-b', '--by', nargs='*', default=["scenario", "topology"], choices=DIMENSIONS,
+                       help="Dimensions to group by.")
+    query.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include.")
+    query.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                       help="Topology IDs to include.")
+    query.add_argument('-i', '--iterations', nargs='+', type=int, default=None, help="Iterations to include.")
+    query.add_argument('--min_depth', type=int, default=None, help="Smallest topology depth (hops) to include.")
+    query.add_argument('--max_depth', type=int, default=None, help="Largest topology depth (hops) to include.")
+    query.add_argument('--min_nodes', type=int, default=None, help="Smallest topology to include.")
+    query.add_argument('--max_nodes', type=int, default=None, help="Largest topology to include.")
+    query.add_argument('-c', '--completed', action='store_true',
+                       help="Only include runs whose key exchange completed.")
+    query.add_argument('--ingest', action='store_true', help="Record new captures of the folder first.")
+    query.add_argument('-j', '--json', action='store_true', help="Print the result as JSON.")
+    return parser
+
+
+def main():
+    parsed_args = set_db_parser().parse_args(sys.argv[1:])
+    db_path = parsed_args.db or default_db_path(parsed_args.pcap_folder)
+    with ResultsDB(db_path) as db:
+        if parsed_args.command == "ingest" or parsed_args.ingest:
+            count = db.ingest_folder(parsed_args.pcap_folder)
+            if parsed_args.command == "ingest":
+                print(f"{count} runs recorded in {db_path}")
+                return 0
+        rows = db.aggregate(parsed_args.metric, parsed_args.by, scenarios=parsed_args.scenarios,
+                            topologies=parsed_args.topologies, iterations=parsed_args.iterations,
+                            min_depth=parsed_args.min_depth, max_depth=parsed_args.max_depth,
+                            min_nodes=parsed_args.min_nodes, max_nodes=parsed_args.max_nodes,
+                            completed=parsed_args.completed)
+    if parsed_args.json:
+        print(json.dumps(rows, indent=2))
+    else:
+        print_aggregate(rows, parsed_args.by)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
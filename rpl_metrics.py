@@ -0,0 +1,292 @@
+import copy
+import multiprocessing
+import os
+import re
+
+import numpy as np
+
+from metrics_cache import CACHE_DIR_NAME, MetricsCache
+from packet_table import build_packet_table
+
+# Bump whenever extract_metrics changes what it returns, to invalidate cached results
+EXTRACTOR_VERSION = 4
+
+ROOT_ADDR = "fe80::1"
+FIRST_NODE_ADDR = "fe80::2"
+
+RPL_MESSAGE_TYPES = ["DIS", "DIO", "DAO", "DAO-ACK", "PK"]
+REPRESENTATIVE_TYPES = ["DIO", "DAO", "DAO-ACK"]
+
+RPL_CODES = {
+    "DIS": [0, 128],
+    "DIO": [1, 129],
+    "DAO": [2, 130],
+    "DAO-ACK": [3, 131],
+    "PK": [144]
+}
+CODE_TO_TYPE = {code: msg_type for msg_type, codes in RPL_CODES.items() for code in codes}
+
+# Reply to a node's public key (PK), completing that node's key exchange
+PK_REPLY_CODE = 145
+
+KEY_EXCHANGE_CODES = {
+    "PK": 144,
+    "DIS": 128
+}
+
+PCAP_NAME_PATTERN = re.compile(r"^(?P<scenario>.+)_(?P<iteration>\d+)_(?P<topology>[^_]+)\.pcap(\.gz)?$")
+
+
+def empty_metrics():
+    return {
+        "key_exchange_time": 0.0,
+        "representative_sizes": {msg_type: 0 for msg_type in REPRESENTATIVE_TYPES},
+        "last_sizes": {msg_type: 0 for msg_type in RPL_MESSAGE_TYPES},
+        "max_sizes": {msg_type: 0 for msg_type in RPL_MESSAGE_TYPES},
+        "counts": {msg_type: 0 for msg_type in RPL_MESSAGE_TYPES},
+        "bytes": {msg_type: 0 for msg_type in RPL_MESSAGE_TYPES},
+        "total_packets": 0,
+        "total_bytes": 0
+    }
+
+
+def code_type_lut():
+    """
+    Returns a 256-entry array mapping each RPL code to its index in
+    RPL_MESSAGE_TYPES, or -1 for codes outside the table.
+    """
+    lut = np.full(256, -1, dtype=np.int8)
+    for code, msg_type in CODE_TO_TYPE.items():
+        lut[code] = RPL_MESSAGE_TYPES.index(msg_type)
+    return lut
+
+
+CODE_TYPE_LUT = code_type_lut()
+
+
+def last_value(values, mask):
+    selected = values[mask]
+    return selected[-1].item() if len(selected) else 0
+
+
+def max_value(values, mask):
+    selected = values[mask]
+    return selected.max().item() if len(selected) else 0
+
+
+def table_metrics(table, address_ids):
+    """
+    Computes the metrics described in extract_metrics from a packet table built
+    by build_packet_table, using vectorized masks and reductions over its columns.
+    """
+    metrics = empty_metrics()
+    if len(table) == 0:
+        return metrics
+
+    timestamps = table["timestamp"]
+    src = table["src"]
+    dst = table["dst"]
+    codes = table["code"]
+    lengths = table["length"]
+    type_index = CODE_TYPE_LUT[codes]
+
+    known = type_index >= 0
+    counts = np.bincount(type_index[known], minlength=len(RPL_MESSAGE_TYPES))
+    type_bytes = np.bincount(type_index[known], weights=lengths[known], minlength=len(RPL_MESSAGE_TYPES))
+    for i, msg_type in enumerate(RPL_MESSAGE_TYPES):
+        is_type = type_index == i
+        metrics["counts"][msg_type] = int(counts[i])
+        metrics["bytes"][msg_type] = int(type_bytes[i])
+        metrics["last_sizes"][msg_type] = last_value(lengths, is_type)
+        metrics["max_sizes"][msg_type] = max_value(lengths, is_type)
+
+    is_from_root = src == address_ids.get(ROOT_ADDR, -1)
+    is_to_root = dst == address_ids.get(ROOT_ADDR, -1)
+    is_from_first_node = src == address_ids.get(FIRST_NODE_ADDR, -1)
+
+    t0 = last_value(timestamps, (codes == KEY_EXCHANGE_CODES["PK"]) & is_from_first_node)
+    t_final = last_value(timestamps, (codes == KEY_EXCHANGE_CODES["DIS"]) & is_from_root)
+    # Without a PK from the first node (not a neighbour of the root) there is no start
+    metrics["key_exchange_time"] = float(t_final - t0) if t0 and t_final > t0 else 0.0
+
+    representative_sizes = metrics["representative_sizes"]
+    representative_sizes["DIO"] = last_value(lengths, (type_index == RPL_MESSAGE_TYPES.index("DIO")) & is_from_root)
+    representative_sizes["DAO"] = max_value(lengths, (type_index == RPL_MESSAGE_TYPES.index("DAO")) & is_to_root)
+    representative_sizes["DAO-ACK"] = last_value(lengths, (type_index == RPL_MESSAGE_TYPES.index("DAO-ACK")) & is_from_root)
+
+    metrics["total_packets"] = len(table)
+    metrics["total_bytes"] = int(lengths.sum())
+    return metrics
+
+
+def extract_metrics(file_path):
+    """
+    Reads a .pcap file once and computes every metric used by the analysis scripts:
+    - key_exchange_time: seconds between the root receiving the first public key (PK)
+      and the root sending the last DIS message, 0 if the root saw no PK from fe80::2
+    - representative_sizes: last DIO (from root), largest DAO (to root) and last
+      DAO-ACK (from root)
+    - last_sizes, max_sizes, counts, bytes: per message type, over all RPL packets
+    Returns the empty result if the file cannot be read.
+    """
+    try:
+        table, address_ids = build_packet_table(file_path)
+    except Exception as e:
+        return empty_metrics()
+    return table_metrics(table, address_ids)
+
+
+class IncrementalMetrics:
+    """
+    Keeps the metrics described in extract_metrics up to date one RPL record
+    at a time, for captures that are analyzed while they are being written.
+    result() returns the same values extract_metrics gives for the full capture.
+    """
+
+    def __init__(self):
+        self.metrics = empty_metrics()
+        self.t0 = 0.0
+        self.t_final = 0.0
+
+    def update(self, record):
+        timestamp, src, dst, code, length = record
+        metrics = self.metrics
+        metrics["total_packets"] += 1
+        metrics["total_bytes"] += length
+
+        msg_type = CODE_TO_TYPE.get(code)
+        if msg_type is None:
+            return
+
+        metrics["last_sizes"][msg_type] = length
+        if length > metrics["max_sizes"][msg_type]:
+            metrics["max_sizes"][msg_type] = length
+        metrics["counts"][msg_type] += 1
+        metrics["bytes"][msg_type] += length
+
+        is_from_root = src == ROOT_ADDR
+        is_to_root = dst == ROOT_ADDR
+
+        if code == KEY_EXCHANGE_CODES["PK"] and src == FIRST_NODE_ADDR:
+            self.t0 = timestamp
+        elif code == KEY_EXCHANGE_CODES["DIS"] and is_from_root:
+            self.t_final = timestamp
+
+        representative_sizes = metrics["representative_sizes"]
+        if msg_type == "DIO" and is_from_root:
+            representative_sizes["DIO"] = length
+        elif msg_type == "DAO" and is_to_root:
+            if length > representative_sizes["DAO"]:
+                representative_sizes["DAO"] = length
+        elif msg_type == "DAO-ACK" and is_from_root:
+            representative_sizes["DAO-ACK"] = length
+
+    def result(self):
+        metrics = copy.deepcopy(self.metrics)
+        metrics["key_exchange_time"] = self.t_final - self.t0 if self.t0 and self.t_final > self.t0 else 0.0
+        return metrics
+
+
+def parse_pcap_name(file_name):
+    """
+    Splits a "{scenario}_{iteration}_{topology}.pcap" file name, optionally
+    gzip-compressed (".pcap.gz"), into
+    (scenario, iteration, topology). The topology is an int for the predefined
+    topologies and a string for generated ones (e.g. "grid-10-10").
+    Returns None if the name does not match.
+    """
+    match = PCAP_NAME_PATTERN.match(os.path.basename(file_name))
+    if match is None:
+        return None
+    topology = match.group("topology")
+    if topology.isdigit():
+        topology = int(topology)
+    return match.group("scenario"), int(match.group("iteration")), topology
+
+
+def run_sort_key(key):
+    scenario, iteration, topology = key
+    return scenario, iteration, (isinstance(topology, str), str(topology).zfill(8))
+
+
+def find_pcaps(pcap_folder, scenarios=None, iterations=None, topologies=None):
+    """
+    Lists the captures in pcap_folder whose name follows the run naming, optionally
+    restricted to the given scenarios, iterations and topologies. When a run has
+    both a .pcap and a .pcap.gz capture, the most recently modified one is used
+    (the name decides on equal times).
+    Returns a dictionary {(scenario, iteration, topology): file_path} sorted by key.
+    """
+    found = {}
+    for file_name in os.listdir(pcap_folder):
+        key = parse_pcap_name(file_name)
+        if key is None:
+            continue
+        scenario, iteration, topology = key
+        if scenarios is not None and scenario not in scenarios:
+            continue
+        if iterations is not None and iteration not in iterations:
+            continue
+        if topologies is not None and topology not in topologies:
+            continue
+        file_path = os.path.join(pcap_folder, file_name)
+        if key in found:
+            file_path = max(found[key], file_path, key=lambda path: (os.path.getmtime(path), path))
+        found[key] = file_path
+    return {key: found[key] for key in sorted(found, key=run_sort_key)}
+
+
+def extract_metrics_parallel(file_paths, processes=None):
+    """
+    Runs extract_metrics over file_paths on a process pool (one worker per core by
+    default). Returns the metrics in the same order as file_paths.
+    """
+    file_paths = list(file_paths)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(file_paths))
+    if processes <= 1:
+        return [extract_metrics(file_path) for file_path in file_paths]
+
+    # The analysis scripts run at import time, so workers must not re-import __main__
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(processes) as pool:
+        return pool.map(extract_metrics, file_paths, chunksize=1)
+
+
+def analyze_files(file_paths, processes=None, cache_dir=None):
+    """
+    Returns the metrics of every file in file_paths, in the same order.
+    When cache_dir is given, results of unchanged captures are loaded from the
+    cache and only new or modified captures are parsed, concurrently.
+    """
+    file_paths = list(file_paths)
+    if cache_dir is None:
+        return extract_metrics_parallel(file_paths, processes)
+
+    cache = MetricsCache(cache_dir, EXTRACTOR_VERSION)
+    results = [cache.get(file_path) for file_path in file_paths]
+    missing = [i for i, metrics in enumerate(results) if metrics is None]
+    if missing:
+        parsed = extract_metrics_parallel([file_paths[i] for i in missing], processes)
+        for i, metrics in zip(missing, parsed):
+            cache.put(file_paths[i], metrics)
+            results[i] = metrics
+        cache.evict()
+    cache.save()
+    return results
+
+
+def analyze_folder(pcap_folder, scenarios=None, iterations=None, topologies=None, processes=None,
+                   use_cache=True):
+    """
+    Analyzes every matching capture in pcap_folder concurrently, reusing the
+    results cached in pcap_folder/.metrics_cache unless use_cache is False.
+    Returns a dictionary {(scenario, iteration, topology): metrics} sorted by key,
+    independent of the order in which the workers finish.
+    """
+    pcaps = find_pcaps(pcap_folder, scenarios, iterations, topologies)
+    cache_dir = os.path.join(pcap_folder, CACHE_DIR_NAME) if use_cache else None
+    metrics = analyze_files(pcaps.values(), processes, cache_dir)
+    return dict(zip(pcaps.keys(), metrics))
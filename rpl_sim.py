@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+
+import argparse
+import heapq
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+import lowpan
+from rpl_metrics import PK_REPLY_CODE, IncrementalMetrics, RPL_CODES
+from topologies import get_topology, hop_depths, neighbors
+from utils import topology_id_arg
+
+SCENARIOS = ["no_cryptography", "rsa", "kyber"]
+
+PK_CODE = RPL_CODES["PK"][0]
+MULTICAST_ADDR = "ff02::1a"
+
+# Linux cooked header (LINUX_SLL) in front of every packet in the captures, so
+# simulated lengths match len(packet) in the analysis scripts
+CAPTURE_HEADER_SIZE = 16
+# IPv6 header plus the 4-byte ICMPv6 header in front of the PK payload
+PK_OVERHEAD = 44
+
+# IPv6 lengths of the control messages, measured in the captures, for plain
+# (no_cryptography) and secured messages. A DAO grows by one target per node
+# below the sender.
+MESSAGE_SIZES = {
+    False: {"DIS": 46, "DIO": 84, "DAO": 84, "DAO-ACK": 64},
+    True: {"DIS": 75, "DIO": 105, "DAO": 111, "DAO-ACK": 92},
+}
+DAO_TARGET_SIZE = {False: 20, True: 19}
+
+# PK payload (public key) and PK reply payload (ciphertext) in bytes. "rsa" is
+# what rpld sends with the configured 32-bit keys (measured in the captures);
+# the larger RSA sizes and Kyber levels use the sizes crypto_bench.py reports.
+KEM_PARAMETERS = {
+    "rsa": {"public_key": 16, "ciphertext": 128, "bench_name": "RSA-32"},
+    "rsa1024": {"public_key": 131, "ciphertext": 128, "bench_name": "RSA-1024-CRT"},
+    "rsa2048": {"public_key": 259, "ciphertext": 256, "bench_name": "RSA-2048-CRT"},
+    "rsa3072": {"public_key": 387, "ciphertext": 384, "bench_name": "RSA-3072-CRT"},
+    "kyber512": {"public_key": 800, "ciphertext": 768, "bench_name": "Kyber-512"},
+    "kyber768": {"public_key": 1184, "ciphertext": 1088, "bench_name": "Kyber-768"},
+    "kyber1024": {"public_key": 1568, "ciphertext": 1568, "bench_name": "Kyber-1024"},
+}
+SCENARIO_KEMS = {"no_cryptography": None, "rsa": "rsa", "kyber": "kyber768"}
+
+DEFAULT_PARAMS = {
+    "duration": 60.0,            # simulated seconds, as the capture duration
+    "boot_interval": 0.05,       # delay between the start of consecutive nodes
+    "dio_interval": 5.0,         # steady-state DIO period
+    "processing_delay": 0.0001,  # handling time of a received message
+    "pk_timeout": 1.0,           # PK retransmission while no reply arrived
+    "dis_timeout": 1.0,          # DIS retransmission while no DIO arrived
+    "dao_ack_timeout": 1.0,      # DAO retransmission while no DAO-ACK arrived
+    "encaps_time": 0.0,          # responder's encapsulation / encryption time
+    "decaps_time": 0.0,          # requester's decapsulation / decryption time
+    "stop_at_convergence": False,
+}
+
+
+def load_crypto_times(report_path, kem):
+    """
+    Returns {"encaps_time", "decaps_time"} for kem from a crypto_bench.py report
+    (p50 of encrypt/encapsulate and decrypt/decapsulate).
+    """
+    with open(report_path) as f:
+        report = json.load(f)
+    bench_name = KEM_PARAMETERS[kem]["bench_name"]
+    for result in report["results"]:
+        if result["name"] == bench_name:
+            operations = result["operations"]
+            return {"encaps_time": operations["encrypt"]["p50_s"], "decaps_time": operations["decrypt"]["p50_s"]}
+    raise KeyError(f"{bench_name} is not in {report_path}")
+
+
+class RPLSimulation:
+    """
+    Discrete-event model of rpld's control plane on an 802.15.4 network, for
+    sweeping topologies, loss and KEM sizes without containers.
+
+    Secured scenarios: a node starts by multicasting its public key (PK, code 144);
+    every neighbour that already holds a key answers with a PK reply (code 145)
+    and the node then sends a DIS. The root multicasts its own PK at boot and
+    sends one DIS after its first reply. Nodes with a rank answer a DIS with a DIO
+    and send a DIO every dio_interval. A node picks the neighbour with the lowest
+    rank as parent and sends it a DAO, which the parent acknowledges (DAO-ACK) and,
+    in storing mode, forwards upwards with the new targets. Each DIO from the
+    parent refreshes the DAO.
+
+    Frames follow lowpan: 6LoWPAN fragmentation into 127-byte frames, 250 kbit/s,
+    unslotted CSMA-CA backoff, and link-layer ACKs and retries for unicast frames.
+    Every frame is lost independently with probability loss and a datagram is lost
+    with any of its fragments. Nodes send one frame at a time; collisions between
+    nodes are not modelled.
+    """
+
+    def __init__(self, topology_id, scenario, kem=None, loss=0.0, seed=None, **params):
+        if scenario not in SCENARIO_KEMS:
+            raise ValueError(f"Unknown scenario: {scenario}")
+        self.secured = scenario != "no_cryptography"
+        if kem is not None and not self.secured:
+            raise ValueError("no_cryptography does not exchange keys")
+        self.topology_id = topology_id
+        self.scenario = scenario
+        self.kem = kem or SCENARIO_KEMS[scenario]
+        self.loss = loss
+        self.seed = seed
+        self.params = dict(DEFAULT_PARAMS, **params)
+        self.rng = random.Random(seed)
+
+        topology = get_topology(topology_id)
+        if len(hop_depths(topology)) != len(topology["nodes"]):
+            raise ValueError(f"Topology {topology_id} is not connected")
+        self.names = [name for name, _ in topology["nodes"]]
+        self.addrs = [ip6 for _, ip6 in topology["nodes"]]
+        index = {name: i for i, name in enumerate(self.names)}
+        self.adjacency = [[index[other] for other in adjacent]
+                          for adjacent in neighbors(topology).values()]
+
+        sizes = MESSAGE_SIZES[self.secured]
+        self.sizes = {RPL_CODES[msg_type][self.secured]: size for msg_type, size in sizes.items()}
+        self.dao_target_size = DAO_TARGET_SIZE[self.secured]
+        if self.secured:
+            self.sizes[PK_CODE] = PK_OVERHEAD + KEM_PARAMETERS[self.kem]["public_key"]
+            self.sizes[PK_REPLY_CODE] = PK_OVERHEAD + KEM_PARAMETERS[self.kem]["ciphertext"]
+        self.codes = {msg_type: codes[self.secured] for msg_type, codes in RPL_CODES.items() if msg_type != "PK"}
+        self.handlers = {self.codes["DIS"]: self.on_dis, self.codes["DIO"]: self.on_dio,
+                         self.codes["DAO"]: self.on_dao, self.codes["DAO-ACK"]: self.on_dao_ack,
+                         PK_CODE: self.on_pk, PK_REPLY_CODE: self.on_pk_reply}
+        self.frame_cache = {}
+
+    def frames(self, length, multicast):
+        key = (length, multicast)
+        if key not in self.frame_cache:
+            self.frame_cache[key] = [(size, lowpan.airtime(size)) for size in lowpan.frame_sizes(length, multicast)]
+        return self.frame_cache[key]
+
+    def schedule(self, delay, handler, *args):
+        heapq.heappush(self.events, (self.now + delay, next(self.sequence), handler, args))
+
+    def capture(self, timestamp, src, dst, code, length):
+        self.records.append((timestamp, self.addrs[src], MULTICAST_ADDR if dst is None else self.addrs[dst],
+                             code, length + CAPTURE_HEADER_SIZE))
+
+    def backoff(self, attempt):
+        exponent = min(lowpan.MAC_MIN_BE + attempt, lowpan.MAC_MAX_BE)
+        return self.rng.randrange(1 << exponent) * lowpan.UNIT_BACKOFF_PERIOD + lowpan.CCA_TIME
+
+    def send(self, src, dst, code, payload=None):
+        """
+        Sends one datagram from node src to node dst (None for the link-local
+        multicast to every neighbour) and schedules its reception.
+        """
+        length = self.sizes[code]
+        if code == self.codes["DAO"]:
+            length += self.dao_target_size * (len(payload) - 1)
+        multicast = dst is None
+        receivers = list(self.adjacency[src]) if multicast else [dst]
+        stats = self.link
+        stats["datagrams"] += 1
+        self.sent[code] = self.sent.get(code, 0) + 1
+
+        start = max(self.now, self.radio_free[src])
+        if src == 0:
+            self.capture(start, src, dst, code, length)
+        t = start
+        for size, frame_airtime in self.frames(length, multicast):
+            if multicast:
+                t += self.backoff(0) + frame_airtime
+                stats["frames"] += 1
+                stats["air_bytes"] += lowpan.PHY_HEADER_SIZE + size
+                stats["airtime"] += frame_airtime
+                receivers = [r for r in receivers if self.rng.random() >= self.loss]
+                continue
+            for attempt in range(lowpan.MAC_MAX_FRAME_RETRIES + 1):
+                t += self.backoff(attempt) + frame_airtime
+                stats["frames"] += 1
+                stats["air_bytes"] += lowpan.PHY_HEADER_SIZE + size
+                stats["airtime"] += frame_airtime
+                if self.rng.random() >= self.loss:
+                    t += lowpan.TURNAROUND_TIME + lowpan.ACK_AIRTIME
+                    stats["airtime"] += lowpan.ACK_AIRTIME
+                    break
+                stats["retries"] += 1
+                t += lowpan.ACK_WAIT_DURATION
+            else:
+                receivers = []
+                break
+        self.radio_free[src] = t
+
+        if not receivers:
+            stats["lost_datagrams"] += 1
+        for receiver in receivers:
+            heapq.heappush(self.events, (t, next(self.sequence), self.receive,
+                                         (receiver, src, dst, code, length, payload)))
+
+    def receive(self, node, src, dst, code, length, payload):
+        if node == 0:
+            self.capture(self.now, src, dst, code, length)
+        if not self.booted[node]:
+            return
+        self.schedule(self.params["processing_delay"], self.handlers[code], node, src, payload)
+
+    # --- node behaviour ---
+
+    def boot(self, node):
+        self.booted[node] = True
+        if node == 0:
+            self.rank[0] = 0
+            self.schedule(self.params["dio_interval"], self.periodic_dio, 0)
+        if self.secured:
+            self.send_pk(node)
+        else:
+            self.send_dis(node)
+
+    def send_pk(self, node):
+        if node != 0 and self.key_time[node] is not None:
+            return
+        if self.pk_time[node] is None:
+            self.pk_time[node] = self.now
+        self.send(node, None, PK_CODE)
+        if node != 0:
+            self.schedule(self.params["pk_timeout"], self.send_pk, node)
+
+    def send_dis(self, node):
+        if node != 0 and self.rank[node] is not None:
+            return
+        self.send(node, None, self.codes["DIS"])
+        if node != 0:
+            self.schedule(self.params["dis_timeout"], self.send_dis, node)
+
+    def periodic_dio(self, node):
+        self.send(node, None, self.codes["DIO"], self.rank[node])
+        self.schedule(self.params["dio_interval"], self.periodic_dio, node)
+
+    def send_dao(self, node):
+        self.dao_pending[node] = True
+        self.send(node, self.parent[node], self.codes["DAO"], frozenset(self.targets[node]))
+        self.schedule(self.params["dao_ack_timeout"], self.retry_dao, node, self.dao_sequence[node])
+
+    def retry_dao(self, node, sequence):
+        if self.dao_pending[node] and self.dao_sequence[node] == sequence:
+            self.dao_sequence[node] += 1
+            self.send_dao(node)
+
+    def on_pk(self, node, src, payload):
+        if self.key_time[node] is None:
+            return
+        self.schedule(self.params["encaps_time"], self.send_pk_reply, node, src)
+
+    def send_pk_reply(self, node, dst):
+        self.send(node, dst, PK_REPLY_CODE)
+        if node == 0 and not self.root_dis_sent:
+            self.root_dis_sent = True
+            self.send(0, None, self.codes["DIS"])
+
+    def on_pk_reply(self, node, src, payload):
+        if self.key_time[node] is None:
+            self.schedule(self.params["decaps_time"], self.key_established, node)
+
+    def key_established(self, node):
+        if self.key_time[node] is None:
+            self.key_time[node] = self.now
+            self.send_dis(node)
+
+    def on_dis(self, node, src, payload):
+        if self.rank[node] is not None:
+            self.send(node, None, self.codes["DIO"], self.rank[node])
+
+    def on_dio(self, node, src, rank):
+        if node == 0 or (self.secured and self.key_time[node] is None):
+            return
+        if self.rank[node] is None or rank + 1 < self.rank[node]:
+            first_join = self.rank[node] is None
+            self.parent[node] = src
+            self.rank[node] = rank + 1
+            if first_join:
+                self.schedule(self.params["dio_interval"], self.periodic_dio, node)
+            self.send_dao(node)
+        elif src == self.parent[node]:
+            self.send_dao(node)
+
+    def on_dao(self, node, src, targets):
+        self.send(node, src, self.codes["DAO-ACK"])
+        if self.routes[node].get(src) == targets:
+            return
+        self.routes[node][src] = targets
+        new_targets = {node}.union(*self.routes[node].values())
+        if node == 0:
+            self.check_convergence(new_targets)
+        elif new_targets != self.targets[node]:
+            self.targets[node] = new_targets
+            if self.parent[node] is not None:
+                self.send_dao(node)
+
+    def on_dao_ack(self, node, src, payload):
+        if src != self.parent[node]:
+            return
+        self.dao_pending[node] = False
+        self.dao_sequence[node] += 1
+        if self.join_time[node] is None:
+            self.join_time[node] = self.now
+            self.check_convergence(None)
+
+    def check_convergence(self, root_targets):
+        if root_targets is not None:
+            self.root_targets = root_targets
+        if (self.convergence_time is None and len(self.root_targets) == len(self.names)
+                and all(t is not None for t in self.join_time[1:])):
+            self.convergence_time = self.now
+            if self.params["stop_at_convergence"]:
+                self.events.clear()
+
+    # --- running ---
+
+    def reset(self):
+        n = len(self.names)
+        self.now = 0.0
+        self.events = []
+        self.sequence = itertools.count()
+        self.records = []
+        self.sent = {}
+        self.link = {"datagrams": 0, "lost_datagrams": 0, "frames": 0, "retries": 0,
+                     "air_bytes": 0, "airtime": 0.0}
+        self.booted = [False] * n
+        self.radio_free = [0.0] * n
+        self.pk_time = [None] * n
+        self.key_time = [0.0] + [None] * (n - 1) if self.secured else [0.0] * n
+        self.rank = [None] * n
+        self.parent = [None] * n
+        self.targets = [{i} for i in range(n)]
+        self.routes = [{} for _ in range(n)]
+        self.dao_pending = [False] * n
+        self.dao_sequence = [0] * n
+        self.join_time = [None] * n
+        self.root_dis_sent = False
+        self.root_targets = {0}
+        self.convergence_time = None
+
+    def key_establishment_time(self):
+        """
+        Seconds from the first boot until every node holds a key, or None if
+        some node never got one (or the scenario exchanges no keys).
+        """
+        if not self.secured or any(t is None for t in self.key_time):
+            return None
+        return max(self.key_time)
+
+    def run(self):
+        """
+        Runs the simulation for params["duration"] seconds and returns its results.
+        "metrics" holds what extract_metrics computes on a capture taken at the
+        root, so simulated and emulated runs can be compared directly.
+        """
+        self.reset()
+        for node in range(len(self.names)):
+            heapq.heappush(self.events, (node * self.params["boot_interval"], next(self.sequence),
+                                         self.boot, (node,)))
+        duration = self.params["duration"]
+        events = self.events
+        while events:
+            timestamp, _, handler, args = events[0]
+            if timestamp > duration:
+                break
+            heapq.heappop(events)
+            self.now = timestamp
+            handler(*args)
+
+        metrics = IncrementalMetrics()
+        for record in sorted(self.records):
+            metrics.update(record)
+        key_times = {self.names[i]: self.key_time[i] - self.pk_time[i]
+                     for i in range(1, len(self.names))
+                     if self.secured and self.key_time[i] is not None and self.pk_time[i] is not None}
+        return {
+            "scenario": self.scenario,
+            "topology": self.topology_id,
+            "kem": self.kem,
+            "loss": self.loss,
+            "seed": self.seed,
+            "nodes": len(self.names),
+            "converged": self.convergence_time is not None,
+            "convergence_time": self.convergence_time,
+            "node_key_exchange_times": key_times,
+            "key_establishment_time": self.key_establishment_time(),
+            "node_join_times": {self.names[i]: t for i, t in enumerate(self.join_time) if t is not None},
+            "sent": {code: count for code, count in sorted(self.sent.items())},
+            "link": dict(self.link),
+            "metrics": metrics.result(),
+        }
+
+
+def simulate(topology_id, scenario, kem=None, loss=0.0, seed=None, **params):
+    return RPLSimulation(topology_id, scenario, kem, loss, seed, **params).run()
+
+
+def simulate_job(job):
+    return simulate(**job)
+
+
+def run_sweep(jobs, processes=None):
+    """
+    Runs simulate for every job (a dict of simulate arguments) on a process
+    pool and returns the results in the same order.
+    """
+    jobs = list(jobs)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    processes = min(processes, len(jobs))
+    if processes <= 1:
+        return [simulate_job(job) for job in jobs]
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(processes) as pool:
+        return pool.map(simulate_job, jobs, chunksize=max(1, len(jobs) // (4 * processes)))
+
+
+def mean(values):
+    values = [v for v in values if v is not None]
+    return sum(values) / len(values) if values else None
+
+
+def summarize(results):
+    """
+    Groups results by (scenario, kem, topology, loss) and averages them.
+    """
+    groups = {}
+    for result in results:
+        key = (result["scenario"], result["kem"], str(result["topology"]), result["loss"])
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for (scenario, kem, topology, loss), group in groups.items():
+        node_key_times = [t for r in group for t in r["node_key_exchange_times"].values()]
+        summary.append({
+            "scenario": scenario, "kem": kem, "topology": topology, "loss": loss, "runs": len(group),
+            "converged": sum(r["converged"] for r in group) / len(group),
+            "convergence_time": mean(r["convergence_time"] for r in group),
+            "key_exchange_time": mean(r["metrics"]["key_exchange_time"] for r in group),
+            "node_key_exchange_time": mean(node_key_times),
+            "air_bytes": mean(r["link"]["air_bytes"] for r in group),
+            "airtime": mean(r["link"]["airtime"] for r in group),
+            "lost_datagrams": mean(r["link"]["lost_datagrams"] for r in group),
+        })
+    return summary
+
+
+def format_value(value, scale=1.0, digits=3):
+    return "-" if value is None else f"{value * scale:.{digits}f}"
+
+
+def print_summary(summary):
+    print(f"{'scenario':<16} {'kem':<10} {'topology':<12} {'loss':>5} {'runs':>5} {'conv%':>6} "
+          f"{'conv (s)':>9} {'kex (ms)':>9} {'node kex (ms)':>14} {'air kB':>8}")
+    for row in summary:
+        print(f"{row['scenario']:<16} {str(row['kem']):<10} {row['topology']:<12} {row['loss']:>5.2f} "
+              f"{row['runs']:>5} {row['converged'] * 100:>6.1f} {format_value(row['convergence_time']):>9} "
+              f"{format_value(row['key_exchange_time'], 1e3):>9} "
+              f"{format_value(row['node_key_exchange_time'], 1e3):>14} "
+              f"{format_value(row['air_bytes'], 1e-3, 1):>8}")
+
+
+def set_sim_parser():
+    parser = argparse.ArgumentParser(
+        description="Simulate RPL key exchange and DODAG formation over 802.15.4 without containers.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-s', '--scenarios', nargs='+', default=SCENARIOS, choices=SCENARIOS,
+                        help="Scenarios to simulate.")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=[1, 4, 12],
+                        help="Topology IDs (1-12 or generated families such as grid-10-10).")
+    parser.add_argument('-k', '--kems', nargs='+', default=None, choices=list(KEM_PARAMETERS),
+                        help="KEM parameter sets for the secured scenarios instead of the scenario's own.")
+    parser.add_argument('-l', '--loss', nargs='+', type=float, default=[0.0],
+                        help="Frame loss probabilities.")
+    parser.add_argument('-r', '--runs', type=int, default=10, help="Runs (seeds) per configuration.")
+    parser.add_argument('-d', '--duration', type=float, default=DEFAULT_PARAMS["duration"],
+                        help="Simulated seconds per run.")
+    parser.add_argument('-c', '--stop_at_convergence', action='store_true',
+                        help="End each run as soon as every node has joined the DODAG.")
+    parser.add_argument('--crypto_bench', default=None,
+                        help="crypto_bench.py report whose p50 latencies are used as encaps/decaps times.")
+    parser.add_argument('-j', '--processes', type=int, default=None, help="Worker processes (one per core by default).")
+    parser.add_argument('-o', '--output', default=None, help="Write every run's results to this JSON file.")
+    return parser
+
+
+def main():
+    parsed_args = set_sim_parser().parse_args(sys.argv[1:])
+    jobs = []
+    for scenario in parsed_args.scenarios:
+        kems = [None] if scenario == "no_cryptography" or not parsed_args.kems else parsed_args.kems
+        for kem, topology_id, loss, seed in itertools.product(kems, parsed_args.topologies, parsed_args.loss,
+                                                              range(parsed_args.runs)):
+            job = {"topology_id": topology_id, "scenario": scenario, "kem": kem, "loss": loss, "seed": seed,
+                   "duration": parsed_args.duration, "stop_at_convergence": parsed_args.stop_at_convergence}
+            if parsed_args.crypto_bench and scenario != "no_cryptography":
+                job.update(load_crypto_times(parsed_args.crypto_bench, kem or SCENARIO_KEMS[scenario]))
+            jobs.append(job)
+
+    start = time.time()
+    results = run_sweep(jobs, parsed_args.processes)
+    elapsed = time.time() - start
+    print_summary(summarize(results))
+    print(f"{len(results)} runs in {elapsed:.2f}s ({len(results) / elapsed:.0f} runs/s)")
+
+    if parsed_args.output:
+        os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+        with open(parsed_args.output, "w") as f:
+            json.dump(results, f, indent=1)
+
+
+if __name__ == '__main__':
+    main()
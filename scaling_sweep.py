@@ -0,0 +1,421 @@
+#!/usr/bin/env python
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import numpy as np
+
+from campaign import (DEFAULT_CORES_PER_RUN, DEFAULT_MEMORY_PER_RUN_MB, OUTPUT_DIR, SubprocessBackend,
+                      campaign_runs, default_concurrency, prepare_keys, run_campaign)
+from hop_latency import merge_captures, run_captures
+from iteration_stats import DEFAULT_CONFIDENCE, t_quantile
+from results_db import ResultsDB, default_db_path, topology_shape
+from topologies import get_topology
+from utils import topology_id_arg
+
+REPORT_FILE = "output/scaling_sweep.json"
+PLOT_FOLDER = "output/scaling_sweep"
+
+SCENARIOS = ["rsa", "kyber"]
+FAMILIES = ["tree", "grid", "rgg"]
+SIZES = [5, 10, 20, 40]
+PREDICTORS = ["nodes", "depth", "fan_out"]
+PREDICT_NODES = [50, 100, 200]
+
+DEFAULT_ARITY = 3
+# Mean number of neighbours of the random geometric graphs, which sets their radius
+RGG_MEAN_DEGREE = 8
+DEFAULT_SIM_DURATION = 600.0
+
+# Responses measured by each source: the simulator sees the whole network, the
+# captures of every node (network.py -m) the key establishment, and the root's
+# capture the rest
+SIM_RESPONSES = {"key_establishment_time": "s", "convergence_time": "s", "control_bytes": "B"}
+CAPTURE_RESPONSES = {"key_establishment_time": "s", "key_exchange_time": "s", "total_bytes": "B"}
+
+MODELS = ["linear", "quadratic", "power"]
+
+
+def sweep_topology_id(family, size, arity=DEFAULT_ARITY, seed=1):
+    """
+    Returns the identifier of a generated topology of family with about size
+    nodes: the shallowest arity-ary tree with at least size nodes, the squarest
+    grid with at least size nodes, or a random geometric graph whose radius
+    gives RGG_MEAN_DEGREE neighbours on average.
+    """
+    if family == "tree":
+        depth = 0
+        while sum(arity ** level for level in range(depth + 1)) < size:
+            depth += 1
+        return f"tree-{arity}-{depth}"
+    if family == "grid":
+        rows = max(1, int(math.sqrt(size)))
+        return f"grid-{rows}-{math.ceil(size / rows)}"
+    if family == "rgg":
+        radius = min(1.0, math.sqrt(RGG_MEAN_DEGREE / (math.pi * size)))
+        return f"rgg-{size}-{radius:.3f}-{seed}"
+    if family in ("chain", "star", "wheel"):
+        return f"{family}-{size}"
+    raise ValueError(f"Unknown topology family: {family}")
+
+
+def sweep_topologies(families, sizes, arity=DEFAULT_ARITY, seed=1):
+    topologies = []
+    for family, size in itertools.product(families, sizes):
+        topology_id = topology_id_arg(sweep_topology_id(family, size, arity, seed))
+        if topology_id not in topologies:
+            topologies.append(topology_id)
+    return topologies
+
+
+def simulated_samples(scenarios, topologies, iterations, loss=0.0, duration=DEFAULT_SIM_DURATION, processes=None):
+    """
+    Simulates every scenario on every topology, iterations seeds each, until
+    the DODAG converges. Returns one sample per run with the topology's shape and
+    the SIM_RESPONSES (None where the run did not get there).
+    """
+    from rpl_sim import run_sweep
+    jobs = [{"topology_id": topology_id, "scenario": scenario, "loss": loss, "seed": seed,
+             "duration": duration, "stop_at_convergence": True}
+            for scenario, topology_id, seed in itertools.product(scenarios, topologies, range(iterations))]
+    samples = []
+    for result in run_sweep(jobs, processes):
+        nodes, depth, fan_out = topology_shape(result["topology"])
+        samples.append({"scenario": result["scenario"], "topology": result["topology"], "iteration": result["seed"],
+                        "nodes": nodes, "depth": depth, "fan_out": fan_out,
+                        "key_establishment_time": result["key_establishment_time"],
+                        "convergence_time": result["convergence_time"],
+                        "control_bytes": result["link"]["air_bytes"]})
+    return samples
+
+
+def capture_key_establishment_time(pcap_file, topology_id):
+    """
+    Seconds from the first RPL message of a run until every node received the
+    reply to its public key, from the captures of every node (network.py -m).
+    None if some node was not captured or got no reply.
+    """
+    if not pcap_file or not os.path.exists(pcap_file):
+        return None
+    topology = get_topology(topology_id)
+    captures = run_captures(pcap_file, topology)
+    if len(captures) < len(topology["nodes"]):
+        return None
+    events = merge_captures(captures, topology)
+    if not events:
+        return None
+    replies = {}
+    for timestamp, _, _, dst, msg_type, _ in events:
+        if msg_type == "PK-REPLY" and dst is not None:
+            replies.setdefault(dst, timestamp)
+    if any(name not in replies for name, _ in topology["nodes"][1:]):
+        return None
+    return max(replies.values()) - events[0][0]
+
+
+def db_samples(db_path, pcap_folder, scenarios, topologies=None):
+    """
+    Returns one sample per run recorded in the results database (after adding
+    the captures of pcap_folder), with the CAPTURE_RESPONSES. Runs whose key
+    exchange did not complete have no key_exchange_time, and runs without the
+    captures of every node no key_establishment_time.
+    """
+    with ResultsDB(db_path) as db:
+        db.ingest_folder(pcap_folder)
+        runs = db.runs(scenarios=scenarios, topologies=topologies)
+    return [{"scenario": run["scenario"], "topology": run["topology"], "iteration": run["iteration"],
+             "nodes": run["nodes"], "depth": run["depth"], "fan_out": run["fan_out"],
+             "key_establishment_time": capture_key_establishment_time(run["capture_file"], run["topology"]),
+             "key_exchange_time": run["key_exchange_time"] if run["key_exchange_time"] > 0 else None,
+             "total_bytes": run["total_bytes"]}
+            for run in runs if run["nodes"] is not None]
+
+
+def design_matrix(x, model):
+    x = np.asarray(x, dtype=float)
+    if model == "linear":
+        return np.column_stack((np.ones_like(x), x))
+    if model == "quadratic":
+        return np.column_stack((np.ones_like(x), x, x ** 2))
+    if model == "power":
+        return np.column_stack((np.ones_like(x), np.log(x)))
+    raise ValueError(f"Unknown model: {model}")
+
+
+def least_squares(X, y, confidence=DEFAULT_CONFIDENCE):
+    """
+    Ordinary least squares of y on the columns of X. Returns None if there are
+    no more samples than coefficients or the columns are collinear. Otherwise
+    returns a dictionary with the coefficients, their confidence half-widths,
+    the covariance matrix of the coefficients, the residual standard deviation,
+    the degrees of freedom, R^2 and the t quantile used for the intervals.
+    """
+    n, p = X.shape
+    if n <= p or np.linalg.matrix_rank(X) < p:
+        return None
+    coefficients, _, _, _ = np.linalg.lstsq(X, y, rcond=None)
+    residuals = y - X @ coefficients
+    dof = n - p
+    variance = float(residuals @ residuals) / dof
+    covariance = variance * np.linalg.inv(X.T @ X)
+    t = t_quantile((1 + confidence) / 2, dof)
+    total = float(((y - y.mean()) ** 2).sum())
+    return {"coefficients": coefficients.tolist(),
+            "half_widths": (t * np.sqrt(np.diag(covariance))).tolist(),
+            "covariance": covariance.tolist(), "residual_std": math.sqrt(variance), "dof": dof,
+            "r2": 1 - float(residuals @ residuals) / total if total > 0 else 1.0, "t": t}
+
+
+def fit_curve(x, y, model, confidence=DEFAULT_CONFIDENCE):
+    """
+    Fits y against x with model: "linear" (a + b x), "quadratic" (a + b x + c x^2)
+    or "power" (a x^b, fitted as log y = log a + b log x, so x and y must be
+    positive). Returns the result of least_squares with the model and the number
+    of samples, or None if it cannot be fitted.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if model == "power":
+        if (x <= 0).any() or (y <= 0).any():
+            return None
+        y = np.log(y)
+    fit = least_squares(design_matrix(x, model), y, confidence)
+    if fit is not None:
+        fit.update(model=model, samples=len(x), x_range=[float(x.min()), float(x.max())])
+    return fit
+
+
+def predict(fit, x):
+    """
+    Evaluates a fit at x. Returns (value, confidence band, prediction band), the
+    bands being (low, high) pairs: the first for the mean response, the second
+    for a single new run.
+    """
+    row = design_matrix([x], fit["model"])[0]
+    value = float(row @ np.asarray(fit["coefficients"]))
+    mean_variance = float(row @ np.asarray(fit["covariance"]) @ row)
+    mean_half = fit["t"] * math.sqrt(mean_variance)
+    single_half = fit["t"] * math.sqrt(mean_variance + fit["residual_std"] ** 2)
+    bands = [(value - mean_half, value + mean_half), (value - single_half, value + single_half)]
+    if fit["model"] == "power":
+        return math.exp(value), *[(math.exp(low), math.exp(high)) for low, high in bands]
+    return value, *bands
+
+
+def fit_samples(samples, responses, model, confidence=DEFAULT_CONFIDENCE, predict_nodes=PREDICT_NODES):
+    """
+    Fits every response of every scenario against each of PREDICTORS, and
+    against all three at once (linear). Samples without a value for a response
+    are left out of its fits. Fits against the node count are evaluated at
+    predict_nodes. Returns one dictionary per scenario, response and predictor.
+    """
+    fits = []
+    for scenario in sorted({sample["scenario"] for sample in samples}):
+        for response in responses:
+            selected = [sample for sample in samples
+                        if sample["scenario"] == scenario and sample.get(response) is not None]
+            y = np.array([sample[response] for sample in selected], dtype=float)
+            for predictor in PREDICTORS:
+                x = [sample[predictor] for sample in selected]
+                fit = fit_curve(x, y, model, confidence) if selected else None
+                row = {"scenario": scenario, "response": response, "predictor": predictor, "fit": fit,
+                       "predictions": []}
+                if fit is not None and predictor == "nodes":
+                    for nodes in predict_nodes:
+                        value, mean_band, single_band = predict(fit, nodes)
+                        row["predictions"].append({"nodes": nodes, "value": value, "confidence_band": mean_band,
+                                                   "prediction_band": single_band})
+                fits.append(row)
+            X = np.column_stack([np.ones(len(selected))]
+                                + [[sample[predictor] for sample in selected] for predictor in PREDICTORS])
+            fit = least_squares(X, y, confidence) if selected else None
+            if fit is not None:
+                fit.update(model="linear", samples=len(selected))
+            fits.append({"scenario": scenario, "response": response, "predictor": "+".join(PREDICTORS),
+                         "fit": fit, "predictions": []})
+    return fits
+
+
+def format_quantity(value, unit):
+    if unit == "s":
+        return f"{value * 1e3:.3f} ms" if abs(value) < 1 else f"{value:.3f} s"
+    return f"{value / 1e3:.1f} kB"
+
+
+def format_fit(fit):
+    if fit["model"] == "power":
+        a, b = fit["coefficients"]
+        return f"{math.exp(a):.4g} x^{b:.3f} (+/-{fit['half_widths'][1]:.3f})"
+    terms = [f"{fit['coefficients'][0]:.4g}"]
+    for power, (coefficient, half_width) in enumerate(zip(fit["coefficients"][1:], fit["half_widths"][1:]), 1):
+        terms.append(f"{coefficient:+.4g}(+/-{half_width:.2g}) x{'^2' if power == 2 else ''}")
+    return " ".join(terms)
+
+
+def print_fits(fits, units):
+    for row in fits:
+        fit = row["fit"]
+        label = f"{row['scenario']:<16} {row['response']:<23} {row['predictor']:<20}"
+        if fit is None:
+            print(f"{label} not enough distinct values to fit")
+            continue
+        if "+" in row["predictor"]:
+            terms = " ".join(f"{name}={coefficient:+.4g}(+/-{half_width:.2g})" for name, coefficient, half_width
+                             in zip(["const"] + PREDICTORS, fit["coefficients"], fit["half_widths"]))
+            print(f"{label} R2={fit['r2']:.3f} n={fit['samples']:<4} {terms}")
+            continue
+        print(f"{label} R2={fit['r2']:.3f} n={fit['samples']:<4} y = {format_fit(fit)}")
+        for prediction in row["predictions"]:
+            unit = units[row["response"]]
+            low, high = prediction["confidence_band"]
+            single_low, single_high = prediction["prediction_band"]
+            print(f"{'':<61} {prediction['nodes']:>4} nodes: {format_quantity(prediction['value'], unit)} "
+                  f"[{format_quantity(low, unit)}, {format_quantity(high, unit)}], single run "
+                  f"[{format_quantity(single_low, unit)}, {format_quantity(single_high, unit)}]")
+
+
+def plot_fits(samples, fits, units, output_folder, predict_nodes=PREDICT_NODES):
+    import matplotlib.pyplot as plt
+
+    os.makedirs(output_folder, exist_ok=True)
+    scenarios = sorted({sample["scenario"] for sample in samples})
+    for response, unit in units.items():
+        fig, axes = plt.subplots(1, len(PREDICTORS), figsize=(6 * len(PREDICTORS), 5), sharey=True)
+        for ax, predictor in zip(axes, PREDICTORS):
+            for i, scenario in enumerate(scenarios):
+                selected = [sample for sample in samples
+                            if sample["scenario"] == scenario and sample.get(response) is not None]
+                if not selected:
+                    continue
+                ax.scatter([sample[predictor] for sample in selected], [sample[response] for sample in selected],
+                           s=12, color=f"C{i}", alpha=0.6, label=scenario)
+                row = next((row for row in fits if row["scenario"] == scenario and row["response"] == response
+                            and row["predictor"] == predictor), None)
+                if row is None or row["fit"] is None:
+                    continue
+                low, high = row["fit"]["x_range"]
+                if predictor == "nodes":
+                    high = max([high] + list(predict_nodes))
+                xs = np.linspace(max(low, 1e-9) if row["fit"]["model"] == "power" else low, high, 100)
+                predicted = [predict(row["fit"], x) for x in xs]
+                ax.plot(xs, [value for value, _, _ in predicted], color=f"C{i}")
+                ax.fill_between(xs, [band[0] for _, band, _ in predicted], [band[1] for _, band, _ in predicted],
+                                color=f"C{i}", alpha=0.2)
+            ax.set_xlabel(predictor.replace("_", " "))
+            ax.yaxis.grid(True, linestyle='--', color='grey', alpha=0.6)
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+        axes[0].set_ylabel(f"{response.replace('_', ' ')} ({unit})")
+        axes[0].legend()
+        fig.suptitle(f"Scaling of the {response.replace('_', ' ')}", fontsize=14)
+        plt.tight_layout()
+        plt.savefig(os.path.join(output_folder, f"{response}.png"), dpi=150)
+        plt.close(fig)
+
+
+def set_sweep_parser():
+    parser = argparse.ArgumentParser(
+        description="Run the scenarios on generated topologies of increasing size and depth, and fit how the key "
+                    "establishment time and the control bytes scale with the node count, depth and root fan-out.",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-s', '--scenarios', nargs='+', default=SCENARIOS,
+                        choices=['no_cryptography', 'rsa', 'kyber'], help="Scenarios to run.")
+    parser.add_argument('-f', '--families', nargs='+', default=FAMILIES,
+                        choices=["tree", "grid", "rgg", "chain", "star", "wheel"],
+                        help="Topology families to generate.")
+    parser.add_argument('-N', '--sizes', nargs='+', type=int, default=SIZES,
+                        help="Approximate node counts of the generated topologies.")
+    parser.add_argument('--arity', type=int, default=DEFAULT_ARITY, help="Arity of the generated trees.")
+    parser.add_argument('--seed', type=int, default=1, help="Seed of the random geometric graphs.")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=[],
+                        help="Additional topology IDs to run.")
+    parser.add_argument('-n', '--num_iterations', type=int, default=3, help="Iterations per scenario and topology.")
+    parser.add_argument('-m', '--model', choices=MODELS, default="linear", help="Curve fitted to each response.")
+    parser.add_argument('-c', '--confidence', type=float, default=DEFAULT_CONFIDENCE,
+                        help="Confidence level of the coefficient intervals and the bands.")
+    parser.add_argument('--predict', nargs='+', type=int, default=PREDICT_NODES,
+                        help="Node counts at which the fits against the node count are evaluated.")
+    parser.add_argument('--simulate', action='store_true',
+                        help="Measure the runs with the simulator (rpl_sim.py) instead of Containernet.")
+    parser.add_argument('--loss', type=float, default=0.0, help="Frame loss probability with --simulate.")
+    parser.add_argument('-d', '--duration', type=float, default=DEFAULT_SIM_DURATION,
+                        help="Simulated seconds allowed per run with --simulate.")
+    parser.add_argument('--from_db', action='store_true',
+                        help="Run nothing and fit every run of the scenarios already in the results database.")
+    parser.add_argument('--db', default=None, help="Results database (<output_dir>/results.db by default).")
+    parser.add_argument('-j', '--concurrency', type=int, default=None,
+                        help="Experiments run at the same time. Derived from cores and memory by default.")
+    parser.add_argument('-o', '--output_dir', default=OUTPUT_DIR, help="Directory where captures are written.")
+    parser.add_argument('-r', '--report', default=REPORT_FILE, help="JSON file for the samples and the fits.")
+    parser.add_argument('-p', '--plot', nargs='?', const=PLOT_FOLDER, default=None,
+                        help="Folder for a plot of the fits of each response.")
+    parser.add_argument('network_args', nargs=argparse.REMAINDER,
+                        help="Extra arguments passed to network.py after '--' (e.g. -- -a).")
+    return parser
+
+
+def main():
+    parsed_args = set_sweep_parser().parse_args(sys.argv[1:])
+    topologies = sweep_topologies(parsed_args.families, parsed_args.sizes, parsed_args.arity, parsed_args.seed)
+    topologies += [topology_id for topology_id in parsed_args.topologies if topology_id not in topologies]
+    db_path = parsed_args.db or default_db_path(parsed_args.output_dir)
+
+    start = time.time()
+    if parsed_args.from_db:
+        units = CAPTURE_RESPONSES
+        samples = db_samples(db_path, parsed_args.output_dir, parsed_args.scenarios)
+    else:
+        print("========================================================")
+        print(f"Scaling sweep of {len(topologies)} topologies, {parsed_args.num_iterations} iterations each")
+        for topology_id in topologies:
+            nodes, depth, fan_out = topology_shape(topology_id)
+            print(f"   {str(topology_id):<20} {nodes:>4} nodes, depth {depth}, root fan-out {fan_out}")
+        print("========================================================")
+        if parsed_args.simulate:
+            units = SIM_RESPONSES
+            samples = simulated_samples(parsed_args.scenarios, topologies, parsed_args.num_iterations,
+                                        parsed_args.loss, parsed_args.duration, parsed_args.concurrency)
+        else:
+            units = CAPTURE_RESPONSES
+            network_args = [arg for arg in parsed_args.network_args if arg != "--"]
+            # The key establishment time needs the captures of every node
+            if "-m" not in network_args and "--all_nodes" not in network_args:
+                network_args.append("-m")
+            backend = SubprocessBackend(parsed_args.output_dir, extra_args=network_args)
+            concurrency = parsed_args.concurrency or default_concurrency(DEFAULT_CORES_PER_RUN,
+                                                                         DEFAULT_MEMORY_PER_RUN_MB)
+            prepare_keys(parsed_args.scenarios, topologies)
+            runs = campaign_runs(parsed_args.scenarios, topologies, parsed_args.num_iterations)
+            returncodes = run_campaign(runs, backend, concurrency)
+            failed = sum(returncode != 0 for returncode in returncodes)
+            if failed:
+                print(f"{failed}/{len(runs)} runs failed and are left out")
+            samples = db_samples(db_path, parsed_args.output_dir, parsed_args.scenarios, topologies)
+
+    if not samples:
+        print("No runs to fit")
+        return 2
+    print(f"{len(samples)} runs measured in {time.time() - start:.1f}s")
+    fits = fit_samples(samples, units, parsed_args.model, parsed_args.confidence, parsed_args.predict)
+    print_fits(fits, units)
+
+    os.makedirs(os.path.dirname(parsed_args.report) or ".", exist_ok=True)
+    with open(parsed_args.report, "w") as f:
+        json.dump({"model": parsed_args.model, "confidence": parsed_args.confidence, "topologies": topologies,
+                   "samples": samples, "fits": fits}, f, indent=2, default=str)
+    print(f"Report written to {parsed_args.report}")
+
+    if parsed_args.plot:
+        plot_fits(samples, fits, units, parsed_args.plot, parsed_args.predict)
+        print(f"Plots written to {parsed_args.plot}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
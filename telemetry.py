@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from pcap_reader import capture_base
+from rpl_metrics import find_pcaps, run_sort_key
+from telemetry_agent import HEADER
+from topologies import get_topology
+from utils import topology_id_arg
+
+PCAP_FOLDER = "results"
+OUTPUT_FILE = "output/telemetry.json"
+
+# Where telemetry_agent.py is mounted in every sensor
+AGENT_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "telemetry_agent.py")
+AGENT_MOUNT = "/opt/telemetry_agent.py"
+TELEMETRY_PORT = 9999
+# Every datagram carries the sender's node index, sequence number and send time
+MIN_DATAGRAM_SIZE = HEADER.size
+
+RECEIVED_SUFFIX = ".telemetry.received.csv"
+SENT_SUFFIX = ".telemetry.sent.csv"
+SUMMARY_SUFFIX = ".telemetry.json"
+
+# Seconds left for datagrams in flight between stopping the senders and the receiver
+DRAIN_TIME = 1.0
+AGENT_EXIT_TIMEOUT = 5
+PERCENTILES = [50, 90, 99]
+
+GLOBAL_ADDRESS_PATTERN = re.compile(r"inet6 ([0-9a-f:]+)/\d+ scope global")
+
+
+def telemetry_file_path(pcap_file, suffix):
+    """
+    Returns a telemetry file stored next to a capture:
+    results/kyber_1_4.pcap -> results/kyber_1_4.telemetry.received.csv
+    """
+    return capture_base(pcap_file) + suffix
+
+
+def root_address(root, interface, fallback):
+    """
+    Returns the root's global address on interface, which RPL routes over several
+    hops, or fallback (its link-local address, one hop only) if it has none.
+    """
+    match = GLOBAL_ADDRESS_PATTERN.search(root.cmd(f"ip -6 -o addr show dev {interface} scope global"))
+    return match.group(1) if match else fallback
+
+
+def stop_agent_cmd(mode):
+    """
+    Shell command that terminates the agent running in mode and waits up to
+    AGENT_EXIT_TIMEOUT seconds for it to write its log and exit. The bracket
+    keeps pgrep from matching the shell running the command.
+    """
+    pattern = f"[t]elemetry_agent.py {mode}"
+    return (f"pkill -TERM -f '{pattern}'; timeout {AGENT_EXIT_TIMEOUT} "
+            f"sh -c \"while pgrep -f '{pattern}' > /dev/null; do sleep 0.05; done\"")
+
+
+class TelemetryGenerator:
+    """
+    Runs periodic UDP telemetry from every non-root sensor to the root during a
+    capture: a receiver on the root and a sender per sensor, each started from
+    telemetry_agent.py (mounted at AGENT_MOUNT). The senders start delay seconds
+    after start() so keys and routes are in place, and stop with the capture.
+    The agents write their logs to the output directory through its bind mount;
+    stop() summarizes them into <run>.telemetry.json next to the capture.
+    """
+
+    def __init__(self, nodes, topology_id, prefix, pcap_file, mount_dir, rate, size, delay, duration):
+        self.nodes = nodes
+        self.topology = get_topology(topology_id)
+        self.prefix = prefix
+        self.pcap_file = pcap_file
+        self.mount_base = os.path.join(mount_dir, os.path.basename(capture_base(pcap_file)))
+        self.rate = rate
+        self.size = size
+        self.delay = delay
+        self.duration = duration
+
+    def start(self):
+        root_name, root_ip6 = self.topology["nodes"][0]
+        root = self.nodes[root_name]
+        for suffix in (RECEIVED_SUFFIX, SENT_SUFFIX):
+            if os.path.exists(telemetry_file_path(self.pcap_file, suffix)):
+                os.remove(telemetry_file_path(self.pcap_file, suffix))
+        root.cmd(f"python3 {AGENT_MOUNT} receive --port {TELEMETRY_PORT} "
+                 f"--output {self.mount_base}{RECEIVED_SUFFIX} > /dev/null 2>&1 &")
+
+        dest = root_address(root, f"{self.prefix}{root_name}-pan0", root_ip6)
+        if dest.startswith("fe80"):
+            print(f"The root has no global address, telemetry uses {dest} and only reaches its neighbours")
+        start_at = time.time() + self.delay
+        for index, (name, _) in enumerate(self.topology["nodes"]):
+            if index == 0:
+                continue
+            self.nodes[name].cmd(
+                f"python3 {AGENT_MOUNT} send --dest {dest} --interface {self.prefix}{name}-pan0 "
+                f"--port {TELEMETRY_PORT} --node {index} --rate {self.rate} --size {self.size} "
+                f"--start_at {start_at:.6f} --duration {self.duration} "
+                f"--output {self.mount_base}{SENT_SUFFIX} > /dev/null 2>&1 &")
+
+    def stop(self):
+        """
+        Stops the senders, then the receiver, and writes the summary of the run.
+        Returns the summary, or None if the logs were not written.
+        """
+        root_name = self.topology["nodes"][0][0]
+        for name, sensor in self.nodes.items():
+            if name != root_name:
+                sensor.cmd(stop_agent_cmd("send"))
+        time.sleep(DRAIN_TIME)
+        self.nodes[root_name].cmd(stop_agent_cmd("receive"))
+        summary = run_telemetry(self.pcap_file, self.topology)
+        if summary is not None:
+            summary["rate"] = self.rate
+            summary["size"] = self.size
+            with open(telemetry_file_path(self.pcap_file, SUMMARY_SUFFIX), "w") as f:
+                json.dump(summary, f, indent=2)
+        return summary
+
+
+def read_logs(pcap_file):
+    """
+    Reads the logs of a run: returns (received, sent) where received is an array
+    with one row (received, node, seq, sent, size) per datagram received, with
+    duplicates removed, and sent maps each node index to (sent, first, last).
+    Returns None if either log is missing.
+    """
+    received_file = telemetry_file_path(pcap_file, RECEIVED_SUFFIX)
+    sent_file = telemetry_file_path(pcap_file, SENT_SUFFIX)
+    if not os.path.exists(received_file) or not os.path.exists(sent_file):
+        return None
+    received = np.loadtxt(received_file, delimiter=",", skiprows=1, ndmin=2).reshape(-1, 5)
+    if len(received):
+        _, unique = np.unique(received[:, 1:3], axis=0, return_index=True)
+        received = received[np.sort(unique)]
+    sent = {}
+    with open(sent_file, newline="") as f:
+        for node, count, first, last in csv.reader(f):
+            sent[int(node)] = (int(count), float(first), float(last))
+    return received, sent
+
+
+def traffic_stats(received, sent_count, first_sent, last_sent):
+    """
+    Goodput (payload bits per second over the sending period, up to the last
+    reception), loss ratio and latency percentiles of one set of datagrams.
+    """
+    stats = {"sent": sent_count, "received": len(received), "loss": None, "goodput": 0.0,
+             "latency_mean": None, "latency_max": None,
+             **{f"latency_p{p}": None for p in PERCENTILES}}
+    if sent_count:
+        stats["loss"] = max(0.0, 1 - len(received) / sent_count)
+    if len(received) == 0:
+        return stats
+    latencies = received[:, 0] - received[:, 3]
+    period = max(received[:, 0].max(), last_sent) - first_sent
+    if period > 0:
+        stats["goodput"] = float(received[:, 4].sum() * 8 / period)
+    stats["latency_mean"] = float(latencies.mean())
+    stats["latency_max"] = float(latencies.max())
+    for p, value in zip(PERCENTILES, np.percentile(latencies, PERCENTILES)):
+        stats[f"latency_p{p}"] = float(value)
+    return stats
+
+
+def sending_period(sent):
+    """
+    Returns (datagrams sent, first send time, last send time) over every sender
+    of a run, from the sent log returned by read_logs.
+    """
+    active = [(count, first, last) for count, first, last in sent.values() if count]
+    if not active:
+        return 0, 0.0, 0.0
+    return (sum(count for count, _, _ in active), min(first for _, first, _ in active),
+            max(last for _, _, last in active))
+
+
+def run_telemetry(pcap_file, topology):
+    """
+    Summarizes the telemetry of a run, per sending node and for the whole
+    network. Returns None if the run has no telemetry logs.
+    """
+    logs = read_logs(pcap_file)
+    if logs is None:
+        return None
+    received, sent = logs
+    names = [name for name, _ in topology["nodes"]]
+    summary = {"nodes": {}}
+    for node, (count, first, last) in sorted(sent.items()):
+        summary["nodes"][names[node]] = traffic_stats(received[received[:, 1] == node], count, first, last)
+    if sent:
+        summary["total"] = traffic_stats(received, *sending_period(sent))
+    return summary
+
+
+def summarize(runs):
+    """
+    Pools the datagrams of every iteration of each (scenario, topology): total
+    goodput per run, loss and latency percentiles over all of them.
+    runs maps (scenario, iteration, topology) to (received, sent) from read_logs.
+    """
+    groups = {}
+    for (scenario, iteration, topology), (received, sent) in runs.items():
+        groups.setdefault((scenario, topology), []).append((received, sent))
+
+    summary = []
+    for scenario, topology in sorted(groups, key=lambda key: run_sort_key((key[0], 0, key[1]))):
+        group = groups[(scenario, topology)]
+        goodputs = [traffic_stats(received, *sending_period(sent))["goodput"] for received, sent in group if sent]
+        pooled = np.concatenate([received for received, _ in group])
+        sent_total = sum(count for _, sent in group for count, _, _ in sent.values())
+        stats = traffic_stats(pooled, sent_total, 0.0, 0.0)
+        stats["goodput"] = float(np.mean(goodputs)) if goodputs else 0.0
+        summary.append({"scenario": scenario, "topology": topology, "runs": len(group), **stats})
+    return summary
+
+
+def format_latency(value):
+    return "-" if value is None else f"{value * 1e3:.2f}"
+
+
+def print_summary(summary):
+    print(f"{'scenario':<16} {'topology':<10} {'runs':>4} {'sent':>7} {'loss':>7} {'goodput (bit/s)':>16} "
+          + " ".join(f"{'p' + str(p) + ' (ms)':>10}" for p in PERCENTILES) + f" {'max (ms)':>10}")
+    for row in summary:
+        loss = "-" if row["loss"] is None else f"{row['loss']:.1%}"
+        print(f"{row['scenario']:<16} {str(row['topology']):<10} {row['runs']:>4} {row['sent']:>7} {loss:>7} "
+              f"{row['goodput']:>16.1f} "
+              + " ".join(f"{format_latency(row[f'latency_p{p}']):>10}" for p in PERCENTILES)
+              + f" {format_latency(row['latency_max']):>10}")
+
+
+def set_telemetry_parser():
+    parser = argparse.ArgumentParser(
+        description="Goodput, loss and latency of the UDP telemetry sent during the captures (network.py --traffic_rate).",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument('-f', '--pcap_folder', default=PCAP_FOLDER, help="Folder with the captures.")
+    parser.add_argument('-s', '--scenarios', nargs='+', default=None, help="Scenarios to include (all by default).")
+    parser.add_argument('-t', '--topologies', nargs='+', type=topology_id_arg, default=None,
+                        help="Topology IDs to include (all by default).")
+    parser.add_argument('-o', '--output', default=OUTPUT_FILE, help="JSON file for the per-run and summary results.")
+    return parser
+
+
+def main():
+    parsed_args = set_telemetry_parser().parse_args(sys.argv[1:])
+    pcaps = find_pcaps(parsed_args.pcap_folder, parsed_args.scenarios, None, parsed_args.topologies)
+    runs = {key: read_logs(pcap_file) for key, pcap_file in pcaps.items()}
+    runs = {key: logs for key, logs in runs.items() if logs is not None}
+    if not runs:
+        print(f"No telemetry logs found in {parsed_args.pcap_folder}")
+        return 1
+
+    summary = summarize(runs)
+    print_summary(summary)
+
+    os.makedirs(os.path.dirname(parsed_args.output) or ".", exist_ok=True)
+    with open(parsed_args.output, "w") as f:
+        json.dump({"summary": summary,
+                   "runs": [{"scenario": scenario, "iteration": iteration, "topology": topology,
+                             **run_telemetry(pcaps[(scenario, iteration, topology)], get_topology(topology))}
+                            for (scenario, iteration, topology) in sorted(runs, key=run_sort_key)]}, f, indent=2)
+    print(f"Results written to {parsed_args.output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
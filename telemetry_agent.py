@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+UDP telemetry sender and receiver run inside the sensors by telemetry.py. Only
+the standard library is used, as the sensor image has no other packages.
+
+    python3 telemetry_agent.py receive --port 9999 --output received.csv
+    python3 telemetry_agent.py send --dest fe80::1 --interface sensor2-pan0 --node 1 \
+        --rate 2 --size 64 --start_at <epoch> --duration 30 --output sent.csv
+
+Each datagram starts with the sender's node index, a sequence number and the
+send time (host clock, shared by every container), padded to --size bytes.
+"""
+
+import argparse
+import os
+import signal
+import socket
+import struct
+import sys
+import time
+
+HEADER = struct.Struct("!HId")
+DEFAULT_PORT = 9999
+
+RECEIVED_FIELDS = "received,node,seq,sent,size"
+SENT_FIELDS = "node,sent,first,last"
+
+
+def stop_on_sigterm():
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def receive(port, output):
+    stop_on_sigterm()
+    sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    sock.bind(("::", port))
+    with open(output, "w") as f:
+        f.write(RECEIVED_FIELDS + "\n")
+        try:
+            while True:
+                data, _ = sock.recvfrom(65535)
+                received = time.time()
+                if len(data) < HEADER.size:
+                    continue
+                node, seq, sent = HEADER.unpack_from(data)
+                f.write(f"{received:.6f},{node},{seq},{sent:.6f},{len(data)}\n")
+        finally:
+            f.flush()
+
+
+def send(dest, interface, port, node, rate, size, start_at, duration, output):
+    """
+    Sends rate datagrams per second of size bytes from start_at for duration
+    seconds, or until terminated, then appends the number sent to output.
+    """
+    stop_on_sigterm()
+    scoped = f"{dest}%{interface}" if dest.startswith("fe80") else dest
+    address = socket.getaddrinfo(scoped, port, socket.AF_INET6, socket.SOCK_DGRAM)[0][4]
+    sock = socket.socket(socket.AF_INET6, socket.SOCK_DGRAM)
+    padding = b"\0" * max(0, size - HEADER.size)
+    sent, first, last = 0, 0.0, 0.0
+    try:
+        while True:
+            due = start_at + sent / rate
+            if due >= start_at + duration:
+                break
+            delay = due - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            now = time.time()
+            try:
+                sock.sendto(HEADER.pack(node, sent, now) + padding, address)
+            except OSError:
+                # No route yet: the datagram counts as sent and lost
+                pass
+            first = first or now
+            last = now
+            sent += 1
+    finally:
+        # One short line per sender, so appends from several containers do not interleave
+        fd = os.open(output, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        os.write(fd, f"{node},{sent},{first:.6f},{last:.6f}\n".encode())
+        os.close(fd)
+
+
+def set_agent_parser():
+    parser = argparse.ArgumentParser(description="UDP telemetry sender and receiver.")
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+    parser_receive = subparsers.add_parser("receive")
+    parser_receive.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser_receive.add_argument("--output", required=True)
+    parser_send = subparsers.add_parser("send")
+    parser_send.add_argument("--dest", required=True)
+    parser_send.add_argument("--interface", required=True)
+    parser_send.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser_send.add_argument("--node", type=int, required=True)
+    parser_send.add_argument("--rate", type=float, required=True)
+    parser_send.add_argument("--size", type=int, required=True)
+    parser_send.add_argument("--start_at", type=float, required=True)
+    parser_send.add_argument("--duration", type=float, required=True)
+    parser_send.add_argument("--output", required=True)
+    return parser
+
+
+def main():
+    parsed_args = set_agent_parser().parse_args(sys.argv[1:])
+    if parsed_args.mode == "receive":
+        receive(parsed_args.port, parsed_args.output)
+    else:
+        send(parsed_args.dest, parsed_args.interface, parsed_args.port, parsed_args.node, parsed_args.rate,
+             parsed_args.size, parsed_args.start_at, parsed_args.duration, parsed_args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,469 +1,293 @@
-from mininet.log import info, error, setLogLevel
-from mn_wifi.sixLoWPAN.link import LoWPAN
-
-setLogLevel('info')
-
-def topology_1(net_obj, common_params, crypto_args_root, crypto_args_node):
-    """
-    1 
-    |
-    2
-    """
-    try:
-        info("*** Creating topology:\n"
-             " 1\n"
-             " |\n"
-             " 2\n")
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        sensor2 = net_obj.addSensor('sensorA', ip6='fe80::2/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links\n")
-        net_obj.addLink(sensor1, sensor2, cls=LoWPAN)
-
-        info("*** Starting network\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "sensor2": sensor2}
-    except Exception as e:
-        error(f"Failed to build star_topology_example: {e}\n")
-        return None
-    
-def topology_2(net_obj, common_params, crypto_args_root, crypto_args_node):
+import math
+import random
+from collections import deque
+
+# A topology is described as data: a list of (name, ip6) nodes, whose first node
+# is the DODAG root, and a list of (name, name) links. network.py builds any of
+# them with the same code, and the analysis tools can use them without Containernet.
+# The root is always named 'sensor1'; generated nodes use short names so that
+# interface names ('<prefix><name>-pan0') stay within 15 characters.
+
+ROOT_NAME = "sensor1"
+
+
+def make_topology(description, nodes, links, diagram=""):
+    return {"description": description, "diagram": diagram, "nodes": nodes, "links": links}
+
+
+TOPOLOGIES = {
+    1: make_topology(
+        "P2",
+        [("sensor1", "fe80::1"), ("sensorA", "fe80::2")],
+        [("sensor1", "sensorA")],
+        " 1\n"
+        " |\n"
+        " 2\n"),
+    2: make_topology(
+        "Tree (1 - 2 - {3, 4})",
+        [("sensor1", "fe80::1"), ("sensor2", "fe80::2"), ("sensor3", "fe80::3"), ("sensor4", "fe80::4")],
+        [("sensor1", "sensor2"), ("sensor2", "sensor3"), ("sensor2", "sensor4")],
+        "   1\n"
+        "   |\n"
+        "   2\n"
+        "  / \\\n"
+        " 3   4\n"),
+    3: make_topology(
+        "K1,4 (Star graph, 1 center, 4 leaves)",
+        [("sensor1", "fe80::1"), ("sA", "fe80::10"), ("sB", "fe80::11"), ("sC", "fe80::12"), ("sD", "fe80::13")],
+        [("sensor1", "sA"), ("sensor1", "sB"), ("sensor1", "sC"), ("sensor1", "sD")],
+        "    A---1---B\n"
+        "       / \\\n"
+        "      C   D\n"),
+    4: make_topology(
+        "2x3 Grid",
+        [("sensor1", "fe80::1"), ("s12", "fe80::2"), ("s13", "fe80::3"),
+         ("s21", "fe80::4"), ("s22", "fe80::5"), ("s23", "fe80::6")],
+        [("sensor1", "s12"), ("s12", "s13"), ("s21", "s22"), ("s22", "s23"),
+         ("sensor1", "s21"), ("s12", "s22"), ("s13", "s23")],
+        "    s11 -- s12 -- s13\n"
+        "     |      |      |\n"
+        "    s21 -- s22 -- s23\n"),
+    5: make_topology(
+        "C5 (Cycle of 5 nodes)",
+        [("sensor1", "fe80::1"), ("s2", "fe80::2"), ("s3", "fe80::3"), ("s4", "fe80::4"), ("s5", "fe80::5")],
+        [("sensor1", "s2"), ("s2", "s3"), ("s3", "s4"), ("s4", "s5"), ("s5", "sensor1")],
+        "        s1 -- s2\n"
+        "       /      \\\n"
+        "      s5      s3\n"
+        "       \\      /\n"
+        "        --s4--\n"),
+    6: make_topology(
+        "K3 (Triangle)",
+        [("sensor1", "fe80::1"), ("s2", "fe80::2"), ("s3", "fe80::3")],
+        [("sensor1", "s2"), ("sensor1", "s3"), ("s2", "s3")],
+        "        s1\n"
+        "       /  \\\n"
+        "      s2 -- s3\n"),
+    7: make_topology(
+        "C4 (Square)",
+        [("sensor1", "fe80::1"), ("s2", "fe80::2"), ("s3", "fe80::3"), ("s4", "fe80::4")],
+        [("sensor1", "s2"), ("s2", "s3"), ("s3", "s4"), ("s4", "sensor1")],
+        "      s1 -- s2\n"
+        "      |    |\n"
+        "      s4 -- s3\n"),
+    8: make_topology(
+        "K2,3 (Complete Bipartite)",
+        [("sensor1", "fe80::1"), ("u2", "fe80::2"), ("v1", "fe80::10"), ("v2", "fe80::11"), ("v3", "fe80::12")],
+        [("sensor1", "v1"), ("sensor1", "v2"), ("sensor1", "v3"), ("u2", "v1"), ("u2", "v2"), ("u2", "v3")],
+        "        u1          u2\n"
+        "       / | \\      / | \\\n"
+        "      v1 v2 v3  v1 v2 v3\n"),
+    9: make_topology(
+        "F2 (Bowtie/Hourglass)",
+        [("sensor1", "fe80::1"), ("s2", "fe80::2"), ("s3", "fe80::3"), ("s4", "fe80::4"), ("s5", "fe80::5")],
+        [("sensor1", "s2"), ("sensor1", "s3"), ("s2", "s3"), ("sensor1", "s4"), ("sensor1", "s5"), ("s4", "s5")],
+        "        s2 -- s1 -- s4\n"
+        "         \\  /  \\  /\n"
+        "          s3    s5\n"),
+    10: make_topology(
+        "W5 (Wheel graph - 1 center, 5 outer)",
+        [("sensor1", "fe80::1"), ("s1", "fe80::2"), ("s2", "fe80::3"), ("s3", "fe80::4"),
+         ("s4", "fe80::5"), ("s5", "fe80::6")],
+        [("sensor1", "s1"), ("sensor1", "s2"), ("sensor1", "s3"), ("sensor1", "s4"), ("sensor1", "s5"),
+         ("s1", "s2"), ("s2", "s3"), ("s3", "s4"), ("s4", "s5"), ("s5", "s1")],
+        "           s1--s2\n"
+        "          /|  /|\n"
+        "         sC--s3|\n"
+        "          \\|/ |\n"
+        "           s5--s4\n"),
+    11: make_topology(
+        "C6 (Cycle of 6 nodes)",
+        [("sensor1", "fe80::1"), ("s2", "fe80::2"), ("s3", "fe80::3"), ("s4", "fe80::4"),
+         ("s5", "fe80::5"), ("s6", "fe80::6")],
+        [("sensor1", "s2"), ("s2", "s3"), ("s3", "s4"), ("s4", "s5"), ("s5", "s6"), ("s6", "sensor1")],
+        "        s1 -- s2\n"
+        "       /        \\\n"
+        "      s6        s3\n"
+        "       \\        /\n"
+        "        s5 -- s4\n"),
+    12: make_topology(
+        "3x3 Grid",
+        [("sensor1", "fe80::1"), ("sensor2", "fe80::2"), ("sensor3", "fe80::3"),
+         ("sensor4", "fe80::4"), ("sensor5", "fe80::5"), ("sensor6", "fe80::6"),
+         ("sensor7", "fe80::7"), ("sensor8", "fe80::8"), ("sensor9", "fe80::9")],
+        [("sensor1", "sensor2"), ("sensor1", "sensor4"), ("sensor2", "sensor3"), ("sensor2", "sensor5"),
+         ("sensor3", "sensor6"), ("sensor4", "sensor5"), ("sensor4", "sensor7"), ("sensor5", "sensor6"),
+         ("sensor5", "sensor8"), ("sensor6", "sensor9"), ("sensor7", "sensor8"), ("sensor8", "sensor9")],
+        "    s11 -- s12 -- s13\n"
+        "     |      |      |\n"
+        "    s21 -- s22 -- s23\n"
+        "     |      |      |\n"
+        "    s31 -- s32 -- s33\n"),
+}
+
+
+def generated_nodes(num_nodes):
     """
-        1
-        |
-        2
-       / \ 
-      3   4
+    Returns num_nodes (name, ip6) pairs: the root 'sensor1' (fe80::1) followed by
+    's2', 's3', ... with addresses fe80::2, fe80::3, ... (hexadecimal interface IDs).
     """
-    try:
-        info("*** Creating topology:\n"
-             "   1\n"
-             "   |\n"
-             "   2\n"
-             "  / \\\n"
-             " 3   4\n")
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        sensor2 = net_obj.addSensor('sensor2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        sensor3 = net_obj.addSensor('sensor3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        sensor4 = net_obj.addSensor('sensor4', ip6='fe80::4/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links\n")
-        net_obj.addLink(sensor1, sensor2, cls=LoWPAN)
-        net_obj.addLink(sensor2, sensor3, cls=LoWPAN)
-        net_obj.addLink(sensor2, sensor4, cls=LoWPAN)
-
-        info("*** Starting network\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "sensor2": sensor2, "sensor3": sensor3, "sensor4": sensor4}
-    except Exception as e:
-        error(f"Failed to build topology_2: {e}\n")
-        return None
-    
-def topology_3(net_obj, common_params, crypto_args_root, crypto_args_node):
-    """
-    K1,4 (Star graph with 1 center, 4 leaves)
-          A   B   
-           \ /
-            1
-           / \
-          C   D
-    Node 1 is the center (root).
-    Nodes A, B, C, D are leaves.
-    """
-    try:
-        info("*** Creating topology: K1,4 (Star graph, 1 center, 4 leaves)\n"
-             "    A---1---B\n"
-             "       / \\\n"
-             "      C   D\n")
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        sA = net_obj.addSensor('sA', ip6='fe80::10/64', **common_params, **crypto_args_node)
-        sB = net_obj.addSensor('sB', ip6='fe80::11/64', **common_params, **crypto_args_node)
-        sC = net_obj.addSensor('sC', ip6='fe80::12/64', **common_params, **crypto_args_node)
-        sD = net_obj.addSensor('sD', ip6='fe80::13/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for K1,4\n")
-        net_obj.addLink(sensor1, sA, cls=LoWPAN)
-        net_obj.addLink(sensor1, sB, cls=LoWPAN)
-        net_obj.addLink(sensor1, sC, cls=LoWPAN)
-        net_obj.addLink(sensor1, sD, cls=LoWPAN)
-
-        info("*** Starting network for K1,4 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "sA": sA, "sB": sB, "sC": sC, "sD": sD, "description": "K1,4"}
-    except Exception as e:
-        error(f"Failed to build topology_3 (K1,4): {e}\n")
-        return None
-
-def topology_4(net_obj, common_params, crypto_args_root, crypto_args_node):
+    return [(ROOT_NAME if i == 1 else f"s{i}", f"fe80::{i:x}") for i in range(1, num_nodes + 1)]
+
+
+def node_name(index):
+    return ROOT_NAME if index == 1 else f"s{index}"
+
+
+def grid_topology(rows, cols):
     """
-    2x3 Grid (or C3 x P2)
-    s11 -- s12 -- s13
-     |      |      |
-    s21 -- s22 -- s23
-    s11 is the root.
+    rows x cols grid with the root in a corner.
     """
-    try:
-        info("*** Creating topology: 2x3 Grid\n"
-             "    s11 -- s12 -- s13\n"
-             "     |      |      |\n"
-             "    s21 -- s22 -- s23\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s12 = net_obj.addSensor('s12', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s13 = net_obj.addSensor('s13', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        s21 = net_obj.addSensor('s21', ip6='fe80::4/64', **common_params, **crypto_args_node)
-        s22 = net_obj.addSensor('s22', ip6='fe80::5/64', **common_params, **crypto_args_node)
-        s23 = net_obj.addSensor('s23', ip6='fe80::6/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for 2x3 Grid\n")
-        net_obj.addLink(sensor1, s12, cls=LoWPAN)
-        
-        net_obj.addLink(s12, s13, cls=LoWPAN)
-        net_obj.addLink(s21, s22, cls=LoWPAN)
-        net_obj.addLink(s22, s23, cls=LoWPAN)
-        
-        net_obj.addLink(sensor1, s21, cls=LoWPAN)
-        net_obj.addLink(s12, s22, cls=LoWPAN)
-        net_obj.addLink(s13, s23, cls=LoWPAN)
-
-        info("*** Starting network for 2x3 Grid (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s12": s12, "s13": s13, "s21": s21, "s22": s22, "s23": s23, "description": "2x3 Grid"}
-    except Exception as e:
-        error(f"Failed to build topology_4 (2x3 Grid): {e}\n")
-        return None
-
-def topology_5(net_obj, common_params, crypto_args_root, crypto_args_node):
+    nodes = generated_nodes(rows * cols)
+    links = []
+    for r in range(rows):
+        for c in range(cols):
+            i = r * cols + c + 1
+            if c + 1 < cols:
+                links.append((node_name(i), node_name(i + 1)))
+            if r + 1 < rows:
+                links.append((node_name(i), node_name(i + cols)))
+    return make_topology(f"{rows}x{cols} Grid", nodes, links)
+
+
+def tree_topology(arity, depth):
     """
-    C5 (Cycle graph with 5 nodes)
-        s1 -- s2
-       /      \
-      s5      s3
-       \      /
-        --s4--
-    s1 is the root.
+    Complete arity-ary tree of the given depth, rooted at the DODAG root.
     """
-    try:
-        info("*** Creating topology: C5 (Cycle of 5 nodes)\n"
-             "        s1 -- s2\n"
-             "       /      \\\n"
-             "      s5      s3\n"
-             "       \\      /\n"
-             "        --s4--\n")
-        
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s2 = net_obj.addSensor('s2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s3 = net_obj.addSensor('s3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        s4 = net_obj.addSensor('s4', ip6='fe80::4/64', **common_params, **crypto_args_node)
-        s5 = net_obj.addSensor('s5', ip6='fe80::5/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for C5\n")
-        net_obj.addLink(sensor1, s2, cls=LoWPAN)
-        net_obj.addLink(s2, s3, cls=LoWPAN)
-        net_obj.addLink(s3, s4, cls=LoWPAN)
-        net_obj.addLink(s4, s5, cls=LoWPAN)
-        net_obj.addLink(s5, sensor1, cls=LoWPAN)
-
-        info("*** Starting network for C5 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s2": s2, "s3": s3, "s4": s4, "s5": s5, "description": "C5"}
-    except Exception as e:
-        error(f"Failed to build topology_5 (C5): {e}\n")
-        return None
-
-def topology_6(net_obj, common_params, crypto_args_root, crypto_args_node):
+    num_nodes = sum(arity ** level for level in range(depth + 1))
+    nodes = generated_nodes(num_nodes)
+    links = [(node_name((i - 2) // arity + 1), node_name(i)) for i in range(2, num_nodes + 1)]
+    return make_topology(f"{arity}-ary tree of depth {depth}", nodes, links)
+
+
+def chain_topology(num_nodes):
     """
-    K3 (Complete graph with 3 nodes - triangle)
-      s1
-     /  \
-    s2 -- s3
-    s1 is the root.
+    Path of num_nodes nodes starting at the root.
     """
-    try:
-        info("*** Creating topology: K3 (Triangle)\n"
-             "        s1\n"
-             "       /  \\\n"
-             "      s2 -- s3\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s2 = net_obj.addSensor('s2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s3 = net_obj.addSensor('s3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for K3\n")
-        net_obj.addLink(sensor1, s2, cls=LoWPAN)
-        net_obj.addLink(sensor1, s3, cls=LoWPAN)
-        net_obj.addLink(s2, s3, cls=LoWPAN)
-
-        info("*** Starting network for K3 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s2": s2, "s3": s3, "description": "K3"}
-    except Exception as e:
-        error(f"Failed to build topology_6 (K3): {e}\n")
-        return None
-
-def topology_7(net_obj, common_params, crypto_args_root, crypto_args_node):
+    nodes = generated_nodes(num_nodes)
+    links = [(node_name(i), node_name(i + 1)) for i in range(1, num_nodes)]
+    return make_topology(f"Chain of {num_nodes} nodes", nodes, links)
+
+
+def star_topology(num_nodes):
     """
-    K4 / C4 / 2x2 Grid (Square graph)
-    s1 -- s2
-    |    |
-    s4 -- s3
-    s1 is the root.
+    Root at the center with num_nodes - 1 leaves.
     """
-    try:
-        info("*** Creating topology: C4 (Square)\n"
-             "      s1 -- s2\n"
-             "      |    |\n"
-             "      s4 -- s3\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s2 = net_obj.addSensor('s2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s3 = net_obj.addSensor('s3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        s4 = net_obj.addSensor('s4', ip6='fe80::4/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for C4\n")
-        net_obj.addLink(sensor1, s2, cls=LoWPAN)
-        net_obj.addLink(s2, s3, cls=LoWPAN)
-        net_obj.addLink(s3, s4, cls=LoWPAN)
-        net_obj.addLink(s4, sensor1, cls=LoWPAN)
-
-        info("*** Starting network for C4 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s2": s2, "s3": s3, "s4": s4, "description": "C4"}
-    except Exception as e:
-        error(f"Failed to build topology_7 (C4): {e}\n")
-        return None
-
-def topology_8(net_obj, common_params, crypto_args_root, crypto_args_node):
+    nodes = generated_nodes(num_nodes)
+    links = [(ROOT_NAME, node_name(i)) for i in range(2, num_nodes + 1)]
+    return make_topology(f"Star of {num_nodes} nodes", nodes, links)
+
+
+def wheel_topology(num_nodes):
     """
-    K2,3 (Complete bipartite graph)
-    Group U (2 nodes): u1, u2
-    Group V (3 nodes): v1, v2, v3
-    u1 (root) is in Group U.
-        u1          u2
-       / | \      / | \
-      v1 v2 v3  v1 v2 v3
+    Root at the center linked to num_nodes - 1 outer nodes, which form a cycle.
     """
-    try:
-        info("*** Creating topology: K2,3 (Complete Bipartite)\n"
-                "        u1          u2\n"
-                "       / | \\      / | \\\n"
-                "      v1 v2 v3  v1 v2 v3\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        u2 = net_obj.addSensor('u2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-
-        v1 = net_obj.addSensor('v1', ip6='fe80::10/64', **common_params, **crypto_args_node)
-        v2 = net_obj.addSensor('v2', ip6='fe80::11/64', **common_params, **crypto_args_node)
-        v3 = net_obj.addSensor('v3', ip6='fe80::12/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for K2,3\n")
-        net_obj.addLink(sensor1, v1, cls=LoWPAN)
-        net_obj.addLink(sensor1, v2, cls=LoWPAN)
-        net_obj.addLink(sensor1, v3, cls=LoWPAN)
-        
-        net_obj.addLink(u2, v1, cls=LoWPAN)
-        net_obj.addLink(u2, v2, cls=LoWPAN)
-        net_obj.addLink(u2, v3, cls=LoWPAN)
-
-        info("*** Starting network for K2,3 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "u2": u2, "v1": v1, "v2": v2, "v3": v3, "description": "K2,3"}
-    except Exception as e:
-        error(f"Failed to build topology_8 (K2,3): {e}\n")
-        return None
-
-def topology_9(net_obj, common_params, crypto_args_root, crypto_args_node):
+    nodes = generated_nodes(num_nodes)
+    outer = list(range(2, num_nodes + 1))
+    links = [(ROOT_NAME, node_name(i)) for i in outer]
+    if len(outer) > 2:
+        links += [(node_name(i), node_name(outer[(k + 1) % len(outer)])) for k, i in enumerate(outer)]
+    elif len(outer) == 2:
+        links.append((node_name(outer[0]), node_name(outer[1])))
+    return make_topology(f"Wheel of {num_nodes} nodes", nodes, links)
+
+
+def random_geometric_topology(num_nodes, radius, seed, max_attempts=1000):
     """
-    F2 (Friendship graph F2, also called Bull graph or Bowtie/Hourglass)
-    Two triangles sharing a common vertex.
-      s2 -- s1 -- s4
-       \  /  \  /
-        s3    s5
-    s1 is the central shared vertex and root.
+    Random geometric graph: num_nodes placed uniformly in the unit square and
+    linked when closer than radius, with the root at the node nearest the center.
+    Placements are drawn from seed until the graph is connected.
+    Raises ValueError if no connected placement is found in max_attempts.
     """
-    try:
-        info("*** Creating topology: F2 (Bowtie/Hourglass)\n"
-             "        s2 -- s1 -- s4\n"
-             "         \\  /  \\  /\n"
-             "          s3    s5\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s2 = net_obj.addSensor('s2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s3 = net_obj.addSensor('s3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        s4 = net_obj.addSensor('s4', ip6='fe80::4/64', **common_params, **crypto_args_node)
-        s5 = net_obj.addSensor('s5', ip6='fe80::5/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for F2\n")
-        net_obj.addLink(sensor1, s2, cls=LoWPAN)
-        net_obj.addLink(sensor1, s3, cls=LoWPAN)
-        net_obj.addLink(s2, s3, cls=LoWPAN)
-        
-        net_obj.addLink(sensor1, s4, cls=LoWPAN)
-        net_obj.addLink(sensor1, s5, cls=LoWPAN)
-        net_obj.addLink(s4, s5, cls=LoWPAN)
-        
-        info("*** Starting network for F2 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s2": s2, "s3": s3, "s4": s4, "s5": s5, "description": "F2 (Bowtie)"}
-    except Exception as e:
-        error(f"Failed to build topology_9 (F2): {e}\n")
-        return None
-
-def topology_10(net_obj, common_params, crypto_args_root, crypto_args_node):
+    rng = random.Random(seed)
+    for _ in range(max_attempts):
+        points = [(rng.random(), rng.random()) for _ in range(num_nodes)]
+        center = min(range(num_nodes), key=lambda k: math.dist(points[k], (0.5, 0.5)))
+        points[0], points[center] = points[center], points[0]
+
+        links = [(node_name(a + 1), node_name(b + 1))
+                 for a in range(num_nodes) for b in range(a + 1, num_nodes)
+                 if math.dist(points[a], points[b]) <= radius]
+        topology = make_topology(f"Random geometric graph ({num_nodes} nodes, r={radius}, seed={seed})",
+                                 generated_nodes(num_nodes), links)
+        if len(hop_depths(topology)) == num_nodes:
+            topology["positions"] = {node_name(k + 1): points[k] for k in range(num_nodes)}
+            return topology
+    raise ValueError(f"No connected random geometric graph with {num_nodes} nodes and radius {radius}")
+
+
+GENERATORS = {
+    "grid": (grid_topology, (int, int)),
+    "tree": (tree_topology, (int, int)),
+    "chain": (chain_topology, (int,)),
+    "star": (star_topology, (int,)),
+    "wheel": (wheel_topology, (int,)),
+    "rgg": (random_geometric_topology, (int, float, int)),
+}
+
+
+def parse_topology_id(topology_id):
     """
-    W5 (Wheel graph with 5 outer vertices + 1 center = 6 nodes total)
-    The image labels it W6, but visually it's W5.
-    sC (center, root) connected to s1,s2,s3,s4,s5 which form a C5.
-         s1--s2
-        /|  /|
-       sC--s3|
-        \|/ |
-         s5--s4
+    Normalizes a topology identifier: '1'..'12' (or ints) select the predefined
+    topologies and are returned as ints; generated families are written
+    '<family>-<arg>-<arg>...' and returned as strings, e.g. 'grid-10-10',
+    'tree-3-4' (arity, depth), 'chain-50', 'star-20', 'wheel-20' and
+    'rgg-100-0.15-42' (nodes, radius, seed). The identifier is also used in
+    capture file names, so it never contains '_'.
+    Raises ValueError for unknown identifiers, sizes below 1 and radii of 0 or less.
     """
+    topology_id = str(topology_id)
+    if topology_id.isdigit():
+        if int(topology_id) not in TOPOLOGIES:
+            raise ValueError(f"Unknown topology: {topology_id}")
+        return int(topology_id)
+
+    family, *args = topology_id.split("-")
+    if family not in GENERATORS or len(args) != len(GENERATORS[family][1]):
+        raise ValueError(f"Unknown topology: {topology_id}")
     try:
-        info("*** Creating topology: W5 (Wheel graph - 1 center, 5 outer)\n"
-             "           s1--s2\n"
-             "          /|  /|\n"
-             "         sC--s3|\n"
-             "          \\|/ |\n"
-             "           s5--s4\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s1 = net_obj.addSensor('s1', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s2 = net_obj.addSensor('s2', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        s3 = net_obj.addSensor('s3', ip6='fe80::4/64', **common_params, **crypto_args_node)
-        s4 = net_obj.addSensor('s4', ip6='fe80::5/64', **common_params, **crypto_args_node)
-        s5 = net_obj.addSensor('s5', ip6='fe80::6/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for W5\n")
-        net_obj.addLink(sensor1, s1, cls=LoWPAN)
-        net_obj.addLink(sensor1, s2, cls=LoWPAN)
-        net_obj.addLink(sensor1, s3, cls=LoWPAN)
-        net_obj.addLink(sensor1, s4, cls=LoWPAN)
-        net_obj.addLink(sensor1, s5, cls=LoWPAN)
-        
-        net_obj.addLink(s1, s2, cls=LoWPAN)
-        net_obj.addLink(s2, s3, cls=LoWPAN)
-        net_obj.addLink(s3, s4, cls=LoWPAN)
-        net_obj.addLink(s4, s5, cls=LoWPAN)
-        net_obj.addLink(s5, s1, cls=LoWPAN)
-        
-        info("*** Starting network for W5 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s1": s1, "s2": s2, "s3": s3, "s4": s4, "s5": s5, "description": "W5"}
-    except Exception as e:
-        error(f"Failed to build topology_10 (W5): {e}\n")
-        return None
-
-def topology_11(net_obj, common_params, crypto_args_root, crypto_args_node):
+        values = [arg_type(arg) for arg_type, arg in zip(GENERATORS[family][1], args)]
+    except ValueError:
+        raise ValueError(f"Invalid arguments for topology: {topology_id}")
+    # Every argument is a size, but the seed of the random geometric graphs
+    sizes = values[:2] if family == "rgg" else values
+    if any(size <= 0 for size in sizes):
+        raise ValueError(f"Topology sizes must be positive: {topology_id}")
+    return topology_id
+
+
+def get_topology(topology_id):
     """
-    C6 (Cycle graph with 6 nodes)
-        s1 -- s2
-       /        \
-      s6        s3
-       \        /
-        s5 -- s4
-    s1 is the root.
+    Returns the topology for an identifier accepted by parse_topology_id.
     """
-    try:
-        info("*** Creating topology: C6 (Cycle of 6 nodes)\n"
-             "        s1 -- s2\n"
-             "       /        \\\n"
-             "      s6        s3\n"
-             "       \\        /\n"
-             "        s5 -- s4\n")
-        
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        s2 = net_obj.addSensor('s2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        s3 = net_obj.addSensor('s3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        s4 = net_obj.addSensor('s4', ip6='fe80::4/64', **common_params, **crypto_args_node)
-        s5 = net_obj.addSensor('s5', ip6='fe80::5/64', **common_params, **crypto_args_node)
-        s6 = net_obj.addSensor('s6', ip6='fe80::6/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        info("*** Adding links for C6\n")
-        net_obj.addLink(sensor1, s2, cls=LoWPAN)
-        net_obj.addLink(s2, s3, cls=LoWPAN)
-        net_obj.addLink(s3, s4, cls=LoWPAN)
-        net_obj.addLink(s4, s5, cls=LoWPAN)
-        net_obj.addLink(s5, s6, cls=LoWPAN)
-        net_obj.addLink(s6, sensor1, cls=LoWPAN)
-
-        info("*** Starting network for C6 (calling build)\n")
-        net_obj.build()
-        return {"sensor1": sensor1, "s2": s2, "s3": s3, "s4": s4, "s5": s5, "s6": s6, "description": "C6"}
-    except Exception as e:
-        error(f"Failed to build topology_11 (C6): {e}\n")
-        return None
-
-def topology_12(net_obj, common_params, crypto_args_root, crypto_args_node):
+    topology_id = parse_topology_id(topology_id)
+    if isinstance(topology_id, int):
+        return TOPOLOGIES[topology_id]
+    family, *args = topology_id.split("-")
+    generator, arg_types = GENERATORS[family]
+    return generator(*[arg_type(arg) for arg_type, arg in zip(arg_types, args)])
+
+
+def neighbors(topology):
+    adjacency = {name: [] for name, _ in topology["nodes"]}
+    for a, b in topology["links"]:
+        adjacency[a].append(b)
+        adjacency[b].append(a)
+    return adjacency
+
+
+def hop_depths(topology):
     """
-    3x3 Grid
-    s11 -- s12 -- s13
-     |      |      |
-    s21 -- s22 -- s23
-     |      |      |
-    s31 -- s32 -- s33
-    s11 is the root.
+    Returns {name: hops from the root} for every node reachable from the root.
     """
-    try:
-        info("*** Creating topology: 3x3 Grid\n"
-             "    s11 -- s12 -- s13\n"
-             "     |      |      |\n"
-             "    s21 -- s22 -- s23\n"
-             "     |      |      |\n"
-             "    s31 -- s32 -- s33\n")
-
-        sensor1 = net_obj.addSensor('sensor1', ip6='fe80::1/64', dodag_root=True, **common_params, **crypto_args_root)
-        sensor2 = net_obj.addSensor('sensor2', ip6='fe80::2/64', **common_params, **crypto_args_node)
-        sensor3 = net_obj.addSensor('sensor3', ip6='fe80::3/64', **common_params, **crypto_args_node)
-        sensor4 = net_obj.addSensor('sensor4', ip6='fe80::4/64', **common_params, **crypto_args_node)
-        sensor5 = net_obj.addSensor('sensor5', ip6='fe80::5/64', **common_params, **crypto_args_node)
-        sensor6 = net_obj.addSensor('sensor6', ip6='fe80::6/64', **common_params, **crypto_args_node)
-        sensor7 = net_obj.addSensor('sensor7', ip6='fe80::7/64', **common_params, **crypto_args_node)
-        sensor8 = net_obj.addSensor('sensor8', ip6='fe80::8/64', **common_params, **crypto_args_node)
-        sensor9 = net_obj.addSensor('sensor9', ip6='fe80::9/64', **common_params, **crypto_args_node)
-
-        net_obj.configureNodes()
-
-        net_obj.addLink(sensor1, sensor2, cls=LoWPAN)
-        net_obj.addLink(sensor1, sensor4, cls=LoWPAN)
-        net_obj.addLink(sensor2, sensor3, cls=LoWPAN)
-        net_obj.addLink(sensor2, sensor5, cls=LoWPAN)
-        net_obj.addLink(sensor3, sensor6, cls=LoWPAN)
-        
-        net_obj.addLink(sensor4, sensor5, cls=LoWPAN)
-        net_obj.addLink(sensor4, sensor7, cls=LoWPAN)
-        net_obj.addLink(sensor5, sensor6, cls=LoWPAN)
-        net_obj.addLink(sensor5, sensor8, cls=LoWPAN)
-        net_obj.addLink(sensor6, sensor9, cls=LoWPAN)
-        
-        net_obj.addLink(sensor7, sensor8, cls=LoWPAN)
-        net_obj.addLink(sensor8, sensor9, cls=LoWPAN)
-
-        net_obj.build()
-        return {"sensor1": sensor1, "sensor2": sensor2, "sensor3": sensor3, "sensor4": sensor4, "sensor5": sensor5, "sensor6": sensor6, "sensor7": sensor7, "sensor8": sensor8, "sensor9": sensor9}
-    except Exception as e:
-        error(f"Failed to build topology_12 (3x3 Grid): {e}\n")
-        return None
+    adjacency = neighbors(topology)
+    root = topology["nodes"][0][0]
+    depths = {root: 0}
+    pending = deque([root])
+    while pending:
+        name = pending.popleft()
+        for neighbor in adjacency[name]:
+            if neighbor not in depths:
+                depths[neighbor] = depths[name] + 1
+                pending.append(neighbor)
+    return depths